@@ -0,0 +1,212 @@
+""" Run Bone Chain Tools operators over many .blend files with a pool of headless Blender processes.
+
+Usage:
+    python batch.py jobs.json [--workers N] [--blender PATH]
+
+Job spec:
+    {
+        "files": ["assets/*.blend"],
+        "operations": [
+            {"operator": "boneskirt.create", "object": "Skirt", "params": {"num_chains": 12}},
+            {"operator": "autokeyset.create", "object": "SkirtRigArmature", "mode": "POSE", "select_all": true},
+            {"operator": "keyall.create", "object": "SkirtRigArmature", "mode": "POSE", "select_all": true},
+            {"operator": "bonelight.add_system"}
+        ],
+        "output_dir": "processed",
+        "workers": 8,
+        "timeout": 600,
+        "report": "batch_report.json"
+    }
+
+Every file is opened by its own "blender -b <file> --python-expr ..." process, up to "workers" (default:
+one per core) at a time. Operations run in order with "object" made active and selected (plus any names
+in "select"), in "mode", optionally with all its bones selected. Files are saved to "output_dir", or in
+place without it, unless an operation failed. Inside "output_dir" the files keep their paths relative to
+the deepest folder all inputs share, so equal file names from different folders do not collide. Paths
+in the spec are relative to the spec file.
+This module does not import bpy at the top, Blender only loads it inside the workers.
+"""
+
+import argparse
+import glob
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Started inside every Blender worker, the job, result and output paths follow "--" on its command line
+WORKER_EXPR = "import sys; sys.path.insert(0, {directory!r}); import batch; batch.worker_main()"
+
+## ------------------ BLENDER WORKER --------------------------------------------------------
+
+def prepare_context(bpy, step):
+    """ Make the step's object active and selected and put it into the requested mode. """
+    view_layer = bpy.context.view_layer
+    if "object" not in step:
+        return
+    obj = bpy.data.objects.get(step["object"])
+    if obj is None:
+        raise ValueError(f"Object '{step['object']}' not found.")
+
+    if view_layer.objects.active and view_layer.objects.active.mode != 'OBJECT':
+        bpy.ops.object.mode_set(mode='OBJECT')
+    selected = set(step.get("select", []))
+    for other in view_layer.objects:
+        other.select_set(other.name in selected)
+    obj.select_set(True)
+    view_layer.objects.active = obj
+
+    mode = step.get("mode", "OBJECT")
+    if mode != 'OBJECT':
+        bpy.ops.object.mode_set(mode=mode)
+    if step.get("select_all"):
+        if mode == 'POSE':
+            bpy.ops.pose.select_all(action='SELECT')
+        elif mode == 'EDIT' and obj.type == 'ARMATURE':
+            bpy.ops.armature.select_all(action='SELECT')
+
+def run_operation(bpy, step):
+    """ Run one operator step, returns its timing and result or error. """
+    entry = {"operator": step["operator"]}
+    start = time.perf_counter()
+    try:
+        prepare_context(bpy, step)
+        category, name = step["operator"].split(".")
+        operator = getattr(getattr(bpy.ops, category), name)
+        entry["result"] = sorted(operator(**step.get("params", {})))
+        if "FINISHED" not in entry["result"]:
+            entry["error"] = "Operator did not finish."
+    except Exception as e:
+        # Error reports of operators are raised as RuntimeError in background mode
+        entry["error"] = f"{type(e).__name__}: {e}"
+    entry["seconds"] = time.perf_counter() - start
+    return entry
+
+def worker_main():
+    """ Entry point inside a headless Blender: run the job on the open file and write the result JSON. """
+    import bpy
+    import addon_utils
+
+    job_path, result_path, output = sys.argv[sys.argv.index("--") + 1:]
+    with open(job_path) as file:
+        job = json.load(file)
+
+    result = {"operations": []}
+    try:
+        addon = job.get("addon", "BCTools")
+        if not addon_utils.check(addon)[1] and not addon_utils.enable(addon, default_set=False):
+            raise RuntimeError(f"Could not enable the add-on '{addon}'.")
+
+        for step in job["operations"]:
+            result["operations"].append(run_operation(bpy, step))
+            if "error" in result["operations"][-1]:
+                break
+        else:
+            if bpy.context.view_layer.objects.active and bpy.context.view_layer.objects.active.mode != 'OBJECT':
+                bpy.ops.object.mode_set(mode='OBJECT')
+            # An empty output path saves in place
+            output = output or bpy.data.filepath
+            bpy.ops.wm.save_as_mainfile(filepath=output)
+            result["output"] = output
+    except Exception as e:
+        result["error"] = f"{type(e).__name__}: {e}"
+
+    with open(result_path, "w") as file:
+        json.dump(result, file)
+
+## ------------------ BATCH DRIVER --------------------------------------------------------
+
+def run_file(blender, job_path, path, result_path, output, timeout, factory_startup):
+    """ Process one .blend file in its own Blender process and collect its result. """
+    command = [blender, "-b", path]
+    if factory_startup:
+        command.insert(1, "--factory-startup")
+    command += ["--python-exit-code", "1", "--python-expr", WORKER_EXPR.format(directory=os.path.dirname(os.path.abspath(__file__))), "--", job_path, result_path, output]
+
+    start = time.perf_counter()
+    try:
+        process = subprocess.run(command, capture_output=True, text=True, timeout=timeout)
+    except subprocess.TimeoutExpired:
+        result = {"error": f"Timed out after {timeout} seconds."}
+    except OSError as e:
+        result = {"error": f"Could not start Blender: {e}"}
+    else:
+        if os.path.exists(result_path):
+            with open(result_path) as file:
+                result = json.load(file)
+        else:
+            result = {"error": f"Blender exited with code {process.returncode}: {process.stderr.strip()[-2000:]}"}
+    result["file"] = path
+    result["seconds"] = time.perf_counter() - start
+    failed = "error" in result or any("error" in entry for entry in result.get("operations", []))
+    result["status"] = "error" if failed else "ok"
+    return result
+
+def output_paths(files, output_dir):
+    """ Output path of every input file, relative to the deepest folder all inputs share. Empty without output_dir. """
+    if not output_dir:
+        return ["" for path in files]
+    root = os.path.commonpath([os.path.dirname(path) for path in files])
+    return [os.path.join(output_dir, os.path.relpath(path, root)) for path in files]
+
+def collect_files(patterns, base):
+    """ Expand the file patterns of a job spec into a sorted list of absolute .blend paths. """
+    files = set()
+    for pattern in patterns:
+        files.update(glob.glob(os.path.join(base, pattern), recursive=True))
+    return sorted(os.path.abspath(path) for path in files if path.endswith(".blend"))
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run Bone Chain Tools operators over many .blend files.")
+    parser.add_argument("job", help="JSON job spec")
+    parser.add_argument("--workers", type=int, help="Number of Blender processes, overrides the job spec")
+    parser.add_argument("--blender", help="Blender executable, overrides the job spec and $BLENDER")
+    args = parser.parse_args(argv)
+
+    with open(args.job) as file:
+        job = json.load(file)
+    base = os.path.dirname(os.path.abspath(args.job))
+    if not job.get("operations"):
+        parser.error("The job spec has no operations.")
+    files = collect_files(job.get("files", []), base)
+    if not files:
+        parser.error("The job spec matches no .blend files.")
+
+    blender = args.blender or job.get("blender") or os.environ.get("BLENDER", "blender")
+    workers = args.workers or job.get("workers") or os.cpu_count() or 1
+    if job.get("output_dir"):
+        job["output_dir"] = os.path.join(base, job["output_dir"])
+    outputs = output_paths(files, job.get("output_dir"))
+    for output in outputs:
+        if output:
+            os.makedirs(os.path.dirname(output), exist_ok=True)
+
+    with tempfile.TemporaryDirectory(prefix="bct_batch_") as directory:
+        job_path = os.path.join(directory, "job.json")
+        with open(job_path, "w") as file:
+            json.dump(job, file)
+
+        # Threads only wait on the Blender processes, the work happens in the processes
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(run_file, blender, job_path, path, os.path.join(directory, f"result_{index}.json"), output, job.get("timeout"), job.get("factory_startup", False))
+                       for index, (path, output) in enumerate(zip(files, outputs))]
+            results = []
+            for future in futures:
+                result = future.result()
+                results.append(result)
+                errors = [result["error"]] if "error" in result else [f"{entry['operator']}: {entry['error']}" for entry in result.get("operations", []) if "error" in entry]
+                print(f"{result['status']:<6}{result['seconds']:>9.2f}s  {result['file']}" + (f"  ({'; '.join(errors)})" if errors else ""))
+
+    report_path = os.path.join(base, job.get("report", "batch_report.json"))
+    with open(report_path, "w") as file:
+        json.dump(results, file, indent=2)
+
+    failed = sum(result["status"] != "ok" for result in results)
+    print(f"{len(results) - failed} of {len(results)} files processed, report written to {report_path}")
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
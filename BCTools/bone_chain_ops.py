@@ -1,8 +1,18 @@
 import bpy
-import bmesh
 import mathutils
-from mathutils import Vector
+from mathutils import Vector, Matrix
+from mathutils.bvhtree import BVHTree
 import math
+import time
+import os
+import re
+import json
+import hashlib
+import inspect
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from bpy_extras.io_utils import ExportHelper, ImportHelper
+from bpy.app.handlers import persistent
 
 ## ------------------ BONE CHAIN TOOLS -------------------------------------------------------- 
 # funny   
@@ -12,16 +22,6 @@ import math
 #print it out
 #ignore the current name of function and class
 
-def calculate_island_bounds(island_verts):
-    """ Calculate the bounds of an island. """
-    min_coord = [float('inf')] * 3
-    max_coord = [float('-inf')] * 3
-    for vert in island_verts:
-        for i in range(3):
-            min_coord[i] = min(min_coord[i], vert.co[i])
-            max_coord[i] = max(max_coord[i], vert.co[i])
-    return min_coord, max_coord
-
 def calculate_center_point(min_coord, max_coord):
     """ Calculate the center point of the bounds. """
     return [(min_coord[i] + max_coord[i]) / 2 for i in range(3)]
@@ -35,58 +35,936 @@ def calculate_general_scale(min_coord, max_coord):
     scale = calculate_scale(min_coord, max_coord)
     return (scale[0]**2 + scale[1]**2)**0.5
 
-def create_bone_chain(context, root_bone_size):
+## ------------------ SHARED CHAIN HELPERS --------------------------------------------------------
+
+def get_bone_chains(bones):
+    """ Group bones (Bone, EditBone or PoseBone) into chains ordered from root to tip. """
+    names = {bone.name for bone in bones}
+    starts = [bone for bone in bones if not (bone.parent and bone.parent.name in names)]
+    chains = []
+    while starts:
+        chain = [starts.pop(0)]
+        while True:
+            children = [child for child in chain[-1].children if child.name in names]
+            if not children:
+                break
+            # Branches start their own chain
+            starts.extend(children[1:])
+            chain.append(children[0])
+        chains.append(chain)
+    return chains
+
+def mesh_vertex_coords(mesh, matrix=None):
+    """ Read all vertex coordinates as an (N, 3) array, optionally transformed by matrix. """
+    coords = np.empty(len(mesh.vertices) * 3, dtype=np.float32)
+    mesh.vertices.foreach_get("co", coords)
+    coords = coords.reshape(-1, 3).astype(np.float64)
+    if matrix is not None:
+        mat = np.array(matrix)
+        coords = coords @ mat[:3, :3].T + mat[:3, 3]
+    return coords
+
+def mesh_fingerprint(mesh):
+    """ Cheap fingerprint of a mesh from its element counts and coordinate/edge buffers. """
+    digest = hashlib.sha1()
+    digest.update(np.array((len(mesh.vertices), len(mesh.edges)), dtype=np.int64).tobytes())
+    coords = np.empty(len(mesh.vertices) * 3, dtype=np.float32)
+    mesh.vertices.foreach_get("co", coords)
+    digest.update(coords.tobytes())
+    edges = np.empty(len(mesh.edges) * 2, dtype=np.int32)
+    mesh.edges.foreach_get("vertices", edges)
+    digest.update(edges.tobytes())
+    return digest.hexdigest()
+
+def mesh_edge_indices(mesh):
+    """ Read all edges as an (N, 2) array of vertex indices. """
+    edges = np.empty(len(mesh.edges) * 2, dtype=np.int64)
+    mesh.edges.foreach_get("vertices", edges)
+    return edges.reshape(-1, 2)
+
+def connected_components(count, pairs):
+    """ Label the connected components of a graph given as (N, 2) index pairs. """
+    labels = np.arange(count)
+    pairs = np.asarray(pairs, dtype=np.int64).reshape(-1, 2)
+    if len(pairs):
+        src = np.concatenate((pairs[:, 0], pairs[:, 1]))
+        dst = np.concatenate((pairs[:, 1], pairs[:, 0]))
+        order = np.argsort(src, kind="stable")
+        src, dst = src[order], dst[order]
+        nodes, starts = np.unique(src, return_index=True)
+        # Min-label propagation with pointer jumping, converges in a few passes
+        while True:
+            new = labels.copy()
+            new[nodes] = np.minimum(labels[nodes], np.minimum.reduceat(labels[dst], starts))
+            new = new[new]
+            if np.array_equal(new, labels):
+                break
+            labels = new
+    return np.unique(labels, return_inverse=True)[1].reshape(-1)
+
+# Edit bone settings carried over to bones generated from existing ones
+BONE_COPY_ATTRS = ("use_deform", "use_inherit_rotation", "inherit_scale", "use_local_location", "bbone_segments")
+
+def chain_polyline(chain):
+    """ Joint positions (every head plus the last tail) of a chain of edit bones. """
+    return np.array([bone.head for bone in chain] + [chain[-1].tail])
+
+def arc_parameters(points):
+    """ Normalized arc length position of every point of a polyline. """
+    arc = np.concatenate(([0.0], np.cumsum(np.linalg.norm(np.diff(points, axis=0), axis=1))))
+    return arc / max(arc[-1], 1e-12)
+
+def resample_polylines(polylines, counts):
+    """ Redistribute polylines by arc length into counts[i] equal segments each.
+
+    All polylines are processed together: they are concatenated and given a parameter that is
+    offset by the polyline index, so a single searchsorted finds every sample. Returns a list
+    of (counts[i] + 1, 3) arrays.
+    """
+    sizes = np.array([len(points) for points in polylines])
+    counts = np.asarray(counts, dtype=np.int64)
+    points = np.concatenate(polylines).astype(np.float64)
+    offsets = np.concatenate(([0], np.cumsum(sizes)[:-1]))
+
+    segments = np.linalg.norm(np.diff(points, axis=0), axis=1)
+    segments[offsets[1:] - 1] = 0.0  # gaps between two polylines
+    arc = np.concatenate(([0.0], np.cumsum(segments)))
+    arc -= np.repeat(arc[offsets], sizes)
+    totals = arc[offsets + sizes - 1]
+    owner = np.repeat(np.arange(len(sizes)), sizes)
+    key = owner * 2.0 + arc / np.maximum(totals[owner], 1e-12)
+
+    samples = counts + 1
+    out_owner = np.repeat(np.arange(len(sizes)), samples)
+    out_index = np.arange(samples.sum()) - np.repeat(np.cumsum(samples) - samples, samples)
+    out_key = out_owner * 2.0 + out_index / np.maximum(counts[out_owner], 1)
+
+    index = np.searchsorted(key, out_key, side='right') - 1
+    index = np.clip(index, offsets[out_owner], offsets[out_owner] + sizes[out_owner] - 2)
+    t = np.clip((out_key - key[index]) / np.maximum(key[index + 1] - key[index], 1e-12), 0.0, 1.0)
+    result = points[index] + (points[index + 1] - points[index]) * t[:, None]
+    return np.split(result, np.cumsum(samples)[:-1])
+
+def pad_polylines(polylines):
+    """ Stack polylines into a (C, J, 3) array plus a validity mask, short ones repeat their last point. """
+    sizes = np.array([len(points) for points in polylines])
+    size = sizes.max()
+    padded = np.array([np.concatenate((points, np.repeat(points[-1:], size - len(points), axis=0))) for points in polylines])
+    return padded, np.arange(size)[None, :] < sizes[:, None]
+
+def restore_lengths(points, lengths):
+    """ Walk from the root joint and put every joint back at its segment length, in place. """
+    for j in range(1, points.shape[1]):
+        offset = points[:, j] - points[:, j - 1]
+        dist = np.maximum(np.linalg.norm(offset, axis=1, keepdims=True), 1e-9)
+        points[:, j] = points[:, j - 1] + offset / dist * lengths[:, j - 1, None]
+    return points
+
+def segment_distances(points, heads, tails):
+    """ Distance from each point to its matching segment, all arrays are (N, 3). """
+    seg = tails - heads
+    length_sq = np.maximum(np.einsum("ij,ij->i", seg, seg), 1e-12)
+    t = np.clip(np.einsum("ij,ij->i", points - heads, seg) / length_sq, 0.0, 1.0)
+    return np.linalg.norm(points - (heads + seg * t[:, None]), axis=1)
+
+## ------------------ SHARED ANIMATION HELPERS --------------------------------------------------------
+
+# Axis application order of Blender euler rotation modes
+EULER_AXES = {'XYZ': (0, 1, 2), 'XZY': (0, 2, 1), 'YXZ': (1, 0, 2), 'YZX': (1, 2, 0), 'ZXY': (2, 0, 1), 'ZYX': (2, 1, 0)}
+
+def read_matrices(collection, attr):
+    """ Read a matrix property of every item in a collection as an (N, 4, 4) array. """
+    data = np.empty(len(collection) * 16, dtype=np.float32)
+    collection.foreach_get(attr, data)
+    # Blender stores matrices column by column
+    return data.reshape(-1, 4, 4).transpose(0, 2, 1).astype(np.float64)
+
+def pose_sample_steps(scene, armature, frames, bone_indices):
+    """ Step generator of sample_pose_matrices, yields (done, total) frames and returns (samples, worlds). """
+    current_frame = scene.frame_current
+    samples = np.empty((len(frames), len(bone_indices), 4, 4))
+    worlds = np.empty((len(frames), 4, 4))
+    try:
+        for index, frame in enumerate(frames):
+            scene.frame_set(int(frame))
+            samples[index] = read_matrices(armature.pose.bones, "matrix")[bone_indices]
+            worlds[index] = np.array(armature.matrix_world)
+            yield index + 1, len(frames)
+    finally:
+        scene.frame_set(current_frame)
+    return samples, worlds
+
+def sample_pose_matrices(context, armature, frames, bone_indices):
+    """ Evaluate the scene once per frame and read the pose matrices of the given bones. """
+    return run_steps(pose_sample_steps(context.scene, armature, frames, bone_indices))
+
+def pose_to_basis(pose, rest, parent_pose=None, parent_rest=None):
+    """ Convert pose space matrices to local channel matrices, arrays broadcast over leading axes. """
+    local = np.linalg.inv(rest)
+    if parent_pose is not None:
+        local = local @ parent_rest @ np.linalg.inv(parent_pose)
+    return local @ pose
+
+def matrix_rotations(mats):
+    """ Rotation part of (..., 4, 4) matrices with the scale removed. """
+    rot = mats[..., :3, :3]
+    return rot / np.maximum(np.linalg.norm(rot, axis=-2, keepdims=True), 1e-12)
+
+def swing_matrices(a, b):
+    """ Shortest rotations turning unit vectors a onto unit vectors b, as (..., 3, 3) matrices. """
+    cross = np.cross(a, b)
+    dot = np.einsum("...i,...i->...", a, b)
+    skew = np.zeros(a.shape[:-1] + (3, 3))
+    skew[..., 0, 1], skew[..., 0, 2] = -cross[..., 2], cross[..., 1]
+    skew[..., 1, 0], skew[..., 1, 2] = cross[..., 2], -cross[..., 0]
+    skew[..., 2, 0], skew[..., 2, 1] = -cross[..., 1], cross[..., 0]
+    scale = 1.0 / np.maximum(1.0 + dot, 1e-9)
+    result = np.eye(3) + skew + skew @ skew * scale[..., None, None]
+
+    # Opposite vectors turn half way around any perpendicular axis
+    opposite = dot < -1.0 + 1e-6
+    if np.any(opposite):
+        flipped = a[opposite]
+        axis = np.cross(flipped, (1.0, 0.0, 0.0))
+        weak = np.linalg.norm(axis, axis=-1) < 1e-6
+        axis[weak] = np.cross(flipped[weak], (0.0, 1.0, 0.0))
+        axis /= np.linalg.norm(axis, axis=-1, keepdims=True)
+        result[opposite] = 2.0 * axis[:, :, None] * axis[:, None, :] - np.eye(3)
+    return result
+
+def matrices_to_quaternions(rot):
+    """ Convert (..., 3, 3) rotation matrices to (..., 4) quaternions in WXYZ order. """
+    m = rot.reshape(-1, 3, 3)
+    quat = np.empty((len(m), 4))
+    trace = m[:, 0, 0] + m[:, 1, 1] + m[:, 2, 2]
+    cases = np.argmax(np.stack((trace, m[:, 0, 0], m[:, 1, 1], m[:, 2, 2]), axis=1), axis=1)
+
+    c = m[cases == 0]
+    s = np.sqrt(np.maximum(1.0 + c[:, 0, 0] + c[:, 1, 1] + c[:, 2, 2], 1e-12)) * 2.0
+    quat[cases == 0] = np.stack((0.25 * s, (c[:, 2, 1] - c[:, 1, 2]) / s, (c[:, 0, 2] - c[:, 2, 0]) / s, (c[:, 1, 0] - c[:, 0, 1]) / s), axis=1)
+
+    c = m[cases == 1]
+    s = np.sqrt(np.maximum(1.0 + c[:, 0, 0] - c[:, 1, 1] - c[:, 2, 2], 1e-12)) * 2.0
+    quat[cases == 1] = np.stack(((c[:, 2, 1] - c[:, 1, 2]) / s, 0.25 * s, (c[:, 0, 1] + c[:, 1, 0]) / s, (c[:, 0, 2] + c[:, 2, 0]) / s), axis=1)
+
+    c = m[cases == 2]
+    s = np.sqrt(np.maximum(1.0 + c[:, 1, 1] - c[:, 0, 0] - c[:, 2, 2], 1e-12)) * 2.0
+    quat[cases == 2] = np.stack(((c[:, 0, 2] - c[:, 2, 0]) / s, (c[:, 0, 1] + c[:, 1, 0]) / s, 0.25 * s, (c[:, 1, 2] + c[:, 2, 1]) / s), axis=1)
+
+    c = m[cases == 3]
+    s = np.sqrt(np.maximum(1.0 + c[:, 2, 2] - c[:, 0, 0] - c[:, 1, 1], 1e-12)) * 2.0
+    quat[cases == 3] = np.stack(((c[:, 1, 0] - c[:, 0, 1]) / s, (c[:, 0, 2] + c[:, 2, 0]) / s, (c[:, 1, 2] + c[:, 2, 1]) / s, 0.25 * s), axis=1)
+
+    return quat.reshape(rot.shape[:-2] + (4,))
+
+def make_quaternions_continuous(quat):
+    """ Flip quaternion signs along the first axis so neighbouring keys never jump hemispheres. """
+    flips = np.einsum("...i,...i->...", quat[1:], quat[:-1]) < 0
+    signs = np.cumprod(np.where(flips, -1.0, 1.0), axis=0)
+    quat[1:] *= signs[..., None]
+    return quat
+
+def matrices_to_eulers(rot, order='XYZ'):
+    """ Convert (..., 3, 3) rotation matrices to (..., 3) euler angles in a Blender rotation order. """
+    i, j, k = EULER_AXES[order]
+    sign = 1.0 if (j - i) % 3 == 1 else -1.0
+    euler = np.empty(rot.shape[:-2] + (3,))
+    euler[..., i] = np.arctan2(sign * rot[..., k, j], rot[..., k, k])
+    euler[..., j] = np.arctan2(-sign * rot[..., k, i], np.hypot(rot[..., i, i], rot[..., j, i]))
+    euler[..., k] = np.arctan2(sign * rot[..., j, i], rot[..., i, i])
+    return euler
+
+def run_steps(steps):
+    """ Run a step generator to the end and return its result. """
+    while True:
+        try:
+            next(steps)
+        except StopIteration as stop:
+            return stop.value
+
+def restore_action(action, backup):
+    """ Make an action match a backup copy again. The action itself is kept, so its users stay untouched. """
+    saved = {(fcurve.data_path, fcurve.array_index): fcurve for fcurve in backup.fcurves}
+    for fcurve in list(action.fcurves):
+        if (fcurve.data_path, fcurve.array_index) not in saved:
+            action.fcurves.remove(fcurve)
+    for (data_path, index), source in saved.items():
+        fcurve = action.fcurves.find(data_path, index=index)
+        if not fcurve:
+            fcurve = action.fcurves.new(data_path, index=index, action_group=source.group.name if source.group else "")
+        data = read_keyframe_points(source)
+        rewrite_keyframe_points(fcurve, data, np.ones(len(source.keyframe_points), dtype=bool))
+        fcurve.mute = source.mute
+
+# Events a time-sliced run lets through to the viewport
+NAVIGATION_EVENTS = {'MIDDLEMOUSE', 'WHEELUPMOUSE', 'WHEELDOWNMOUSE', 'TRACKPADPAN', 'TRACKPADZOOM'}
+
+class TimeSlicedOperator:
+    """ Mixin running an operator as a modal timer that does a bounded chunk of work per tick.
+
+    Operators implement make_steps(context), a generator that validates its input before its first
+    yield and then yields (done, total) progress, and finished(result) for its return value.
+    Esc stops the generator and puts the action of the active object back as it was.
+    """
+    # Seconds of work per timer tick, the chunk size adapts to it
+    tick_budget = 0.05
+
+    def execute(self, context):
+        try:
+            result = run_steps(self.make_steps(context))
+        except ValueError as e:
+            self.report({'ERROR'}, str(e))
+            return {'CANCELLED'}
+        return self.finished(result)
+
+    def invoke(self, context, event):
+        self.object = context.active_object
+        obj = self.object
+        self.action = obj.animation_data.action if obj and obj.animation_data else None
+        self.backup = self.action.copy() if self.action else None
+        self.timer = None
+        self.steps = self.make_steps(context)
+        try:
+            self.done, self.total = next(self.steps)
+        except ValueError as e:
+            self.end_steps(context)
+            self.report({'ERROR'}, str(e))
+            return {'CANCELLED'}
+        except Exception:
+            self.end_steps(context)
+            raise
+
+        self.chunk = 1
+        wm = context.window_manager
+        wm.progress_begin(0, max(self.total, 1))
+        self.timer = wm.event_timer_add(0.001, window=context.window)
+        wm.modal_handler_add(self)
+        return {'RUNNING_MODAL'}
+
+    def modal(self, context, event):
+        if event.type == 'ESC':
+            self.cancel(context)
+            self.report({'WARNING'}, f"{self.bl_label} cancelled")
+            return {'CANCELLED'}
+        if event.type in NAVIGATION_EVENTS or event.type.startswith("NDOF_"):
+            # The viewport can still be navigated while the work runs
+            return {'PASS_THROUGH'}
+        if event.type != 'TIMER':
+            # Anything else could undo, reselect or delete the data the steps hold on to
+            return {'RUNNING_MODAL'}
+
+        start = time.perf_counter()
+        stepped = False
+        try:
+            for _ in range(self.chunk):
+                self.done, self.total = next(self.steps)
+            stepped = True
+        except StopIteration as stop:
+            stepped = True
+            self.end_steps(context)
+            return self.finished(stop.value)
+        except ValueError as e:
+            self.report({'ERROR'}, str(e))
+            return {'CANCELLED'}
+        finally:
+            # Any failure, not only ValueError, must stop the timer and roll back partial work
+            if not stepped:
+                self.cancel(context)
+
+        # Size the next chunk to fill the tick budget, growing at most twofold per tick
+        elapsed = time.perf_counter() - start
+        self.chunk = int(min(max(self.chunk * self.tick_budget / max(elapsed, 1e-6), 1), self.chunk * 2))
+        context.window_manager.progress_update(self.done)
+        context.workspace.status_text_set(f"{self.bl_label}: {self.done} / {self.total}, Esc to cancel")
+        return {'RUNNING_MODAL'}
+
+    def cancel(self, context):
+        # Closing the generator runs its cleanup, then partial results are rolled back
+        self.steps.close()
+        animation_data = self.object.animation_data if self.object else None
+        if self.backup:
+            restore_action(self.action, self.backup)
+        elif animation_data and animation_data.action:
+            # The action was created by the cancelled run
+            bpy.data.actions.remove(animation_data.action)
+        context.scene.frame_set(context.scene.frame_current)
+        self.end_steps(context)
+
+    def end_steps(self, context):
+        wm = context.window_manager
+        if self.timer:
+            wm.event_timer_remove(self.timer)
+            self.timer = None
+            wm.progress_end()
+            context.workspace.status_text_set(None)
+        if self.backup:
+            bpy.data.actions.remove(self.backup)
+            self.backup = None
+
+def ensure_action(obj):
+    """ Return the action of an object, creating one if needed. """
+    if not obj.animation_data:
+        obj.animation_data_create()
+    if not obj.animation_data.action:
+        obj.animation_data.action = bpy.data.actions.new(f"{obj.name}Action")
+    return obj.animation_data.action
+
+def write_fcurve(action, data_path, index, frames, values, group=""):
+    """ Replace the keys of one fcurve inside the sampled range with the given samples in a single bulk write.
+
+    Keys outside frames[0]..frames[-1] are kept.
+    """
+    fcurve = action.fcurves.find(data_path, index=index)
+    if fcurve is None:
+        fcurve = action.fcurves.new(data_path, index=index, action_group=group)
+    else:
+        points = fcurve.keyframe_points
+        co = np.empty(len(points) * 2, dtype=np.float32)
+        points.foreach_get("co", co)
+        inside = (co[0::2] >= frames[0] - 1e-4) & (co[0::2] <= frames[-1] + 1e-4)
+        for point_index in np.flatnonzero(inside)[::-1]:
+            points.remove(points[int(point_index)], fast=True)
+
+    kept = len(fcurve.keyframe_points)
+    fcurve.keyframe_points.add(len(frames))
+    co = np.empty((kept + len(frames)) * 2, dtype=np.float32)
+    fcurve.keyframe_points.foreach_get("co", co)
+    co[kept * 2::2] = frames
+    co[kept * 2 + 1::2] = values
+    fcurve.keyframe_points.foreach_set("co", co)
+    # Sorts the merged keys by frame and recalculates the handles
+    fcurve.update()
+    return fcurve
+
+def write_bone_channels(action, pose_bone, attr, frames, values):
+    """ Key every array index of a pose bone property from (F, N) samples. """
+    data_path = pose_bone.path_from_id(attr)
+    for index in range(values.shape[1]):
+        write_fcurve(action, data_path, index, frames, values[:, index], group=pose_bone.name)
+
+def write_bone_rotation(action, pose_bone, frames, rot):
+    """ Key the rotation channels of a pose bone from (F, 3, 3) local rotation matrices. """
+    mode = pose_bone.rotation_mode
+    if mode == 'QUATERNION':
+        quat = make_quaternions_continuous(matrices_to_quaternions(rot))
+        write_bone_channels(action, pose_bone, "rotation_quaternion", frames, quat)
+    elif mode == 'AXIS_ANGLE':
+        quat = make_quaternions_continuous(matrices_to_quaternions(rot))
+        angle = 2.0 * np.arccos(np.clip(quat[:, 0], -1.0, 1.0))
+        axis = quat[:, 1:] / np.maximum(np.linalg.norm(quat[:, 1:], axis=1, keepdims=True), 1e-12)
+        axis[angle < 1e-9] = (0.0, 1.0, 0.0)
+        write_bone_channels(action, pose_bone, "rotation_axis_angle", frames, np.column_stack((angle, axis)))
+    else:
+        euler = np.unwrap(matrices_to_eulers(rot, mode), axis=0)
+        write_bone_channels(action, pose_bone, "rotation_euler", frames, euler)
+
+## ------------------ RIG CACHE --------------------------------------------------------
+
+# Bump when a generator changes so old cached rigs are not reused
+RIG_CACHE_VERSION = 1
+RIG_CACHE_KEY = "bct_cache_key"
+RIG_CACHE_USED = "bct_cache_used"
+RIG_CACHE_MAX_ENTRIES = 16
+RIG_CACHE_MAX_BONES = 20000
+
+def rig_cache_key(generator, params, fingerprint=""):
+    """ Hash of a generator name, its parameters and the fingerprint of its input. """
+    text = json.dumps({"version": RIG_CACHE_VERSION, "generator": generator, "params": params, "fingerprint": fingerprint}, sort_keys=True)
+    return hashlib.sha1(text.encode()).hexdigest()
+
+def rig_cache_entries():
+    """ Cached armature datablocks, most recently used first. """
+    entries = [data for data in bpy.data.armatures if RIG_CACHE_KEY in data]
+    return sorted(entries, key=lambda data: data.get(RIG_CACHE_USED, 0), reverse=True)
+
+def touch_rig_cache(data):
+    """ Mark a cache entry as the most recently used one. """
+    data[RIG_CACHE_USED] = max((entry.get(RIG_CACHE_USED, 0) for entry in rig_cache_entries()), default=0) + 1
+
+def rig_cache_lookup(key):
+    for data in rig_cache_entries():
+        if data[RIG_CACHE_KEY] == key:
+            touch_rig_cache(data)
+            return data
+    return None
+
+def evict_rig_cache(max_entries=RIG_CACHE_MAX_ENTRIES, max_bones=RIG_CACHE_MAX_BONES):
+    """ Drop the least recently used entries once the cache holds too many rigs or bones. """
+    total_bones = 0
+    for index, data in enumerate(rig_cache_entries()):
+        total_bones += len(data.bones)
+        if index > 0 and (index >= max_entries or total_bones > max_bones):
+            bpy.data.armatures.remove(data)
+
+def rig_cache_store(key, data):
+    cached = data.copy()
+    cached.name = f"BCT Cache {key[:12]}"
+    cached.use_fake_user = True
+    cached[RIG_CACHE_KEY] = key
+    touch_rig_cache(cached)
+    evict_rig_cache()
+
+def clear_rig_cache():
+    entries = rig_cache_entries()
+    for data in entries:
+        bpy.data.armatures.remove(data)
+    return len(entries)
+
+def new_rig_from_cache(context, cached, name, location, meshes):
+    """ Create a rig object from a copy of cached armature data, selected like a freshly built rig. """
+    if context.mode != 'OBJECT':
+        bpy.ops.object.mode_set(mode='OBJECT')
+    data = cached.copy()
+    data.use_fake_user = False
+    for key in (RIG_CACHE_KEY, RIG_CACHE_USED):
+        del data[key]
+
+    armature = bpy.data.objects.new(name, data)
+    context.collection.objects.link(armature)
+    armature.location = location
+
+    # Only the new rig and the meshes it was built from stay selected, like after armature_add
+    for other in context.view_layer.objects:
+        other.select_set(False)
+    for mesh_obj in meshes:
+        mesh_obj.select_set(True)
+    armature.select_set(True)
+    context.view_layer.objects.active = armature
+    return armature
+
+class BONECACHE_OT_Clear(bpy.types.Operator):
+    """Remove every cached generated rig from the file"""
+    bl_idname = "bonecache.clear"
+    bl_label = "Clear Rig Cache"
+    bl_options = {"REGISTER", "UNDO"}
+    
+    def execute(self, context):
+        cleared = clear_rig_cache()
+        self.report({'INFO'}, f"Removed {cleared} cached rigs")
+        return {'FINISHED'}
+
+## ------------------ BONE SHAPES --------------------------------------------------------
+
+# Widget meshes live in one hidden collection, every bone using a shape shares its single object
+WIDGET_COLLECTION = "BCT Widgets"
+WIDGET_PREFIX = "WGT-BCT-"
+WIDGET_SHAPE_ITEMS = [
+    ('NONE', "Default", "Draw bones with the armature display type"),
+    ('CIRCLE', "Circle", "Ring around the bone head"),
+    ('SPHERE', "Sphere", "Three rings around the bone center"),
+    ('BOX', "Box", "Thin box along the bone"),
+    ('DIAMOND', "Diamond", "Wire octahedron along the bone"),
+]
+BONE_COLOR_ITEMS = [
+    ('NONE', "Keep", "Leave the bone colors as they are"),
+    ('CHAIN', "Per Chain", "Cycle through the theme colors, one per chain"),
+    ('SINGLE', "Single", "Give every chain the same theme color"),
+]
+# Theme color sets available in every supported Blender version
+THEME_COUNT = 15
+
+def ring_points(radius, y, axes, segments=16):
+    """ Closed circle of points in the plane of two axes, at height y along the bone. """
+    angles = np.linspace(0.0, 2.0 * np.pi, segments, endpoint=False)
+    points = np.zeros((segments, 3))
+    points[:, 1] = y
+    points[:, axes[0]] = np.cos(angles) * radius
+    points[:, axes[1]] = np.sin(angles) * radius
+    return points
+
+def widget_geometry(shape):
+    """ Vertices and edges of a widget in bone space, where the bone runs from 0 to 1 along Y. """
+    if shape == 'CIRCLE':
+        rings = [ring_points(0.25, 0.0, (0, 2))]
+    elif shape == 'SPHERE':
+        rings = [ring_points(0.2, 0.5, (0, 2)), ring_points(0.2, 0.0, (0, 1)) + (0.0, 0.5, 0.0), ring_points(0.2, 0.0, (2, 1)) + (0.0, 0.5, 0.0)]
+    else:
+        if shape == 'BOX':
+            verts = np.array([(x, y, z) for y in (0.0, 1.0) for x, z in ((-0.1, -0.1), (0.1, -0.1), (0.1, 0.1), (-0.1, 0.1))])
+            edges = [(i, (i + 1) % 4) for i in range(4)] + [(4 + i, 4 + (i + 1) % 4) for i in range(4)] + [(i, i + 4) for i in range(4)]
+        else:
+            verts = np.array([(0.0, 0.0, 0.0), (0.0, 1.0, 0.0), (0.1, 0.2, 0.0), (0.0, 0.2, 0.1), (-0.1, 0.2, 0.0), (0.0, 0.2, -0.1)])
+            edges = [(end, i) for end in (0, 1) for i in range(2, 6)] + [(2 + i, 2 + (i + 1) % 4) for i in range(4)]
+        return verts, edges
+
+    # Rings are closed loops of consecutive vertices
+    verts = np.concatenate(rings)
+    edges = []
+    for ring in rings:
+        start = len(edges)
+        edges += [(start + i, start + (i + 1) % len(ring)) for i in range(len(ring))]
+    return verts, edges
+
+def widget_object(scene, shape):
+    """ Get or create the shared widget object of a shape in the hidden widget collection. """
+    name = f"{WIDGET_PREFIX}{shape.title()}"
+    widget = bpy.data.objects.get(name)
+    if widget and widget.type == 'MESH':
+        return widget
+
+    collection = bpy.data.collections.get(WIDGET_COLLECTION)
+    if not collection:
+        collection = bpy.data.collections.new(WIDGET_COLLECTION)
+        collection.hide_viewport = True
+        collection.hide_render = True
+    if collection.name not in scene.collection.children:
+        scene.collection.children.link(collection)
+
+    verts, edges = widget_geometry(shape)
+    mesh = bpy.data.meshes.new(name)
+    mesh.from_pydata(verts.tolist(), edges, [])
+    widget = bpy.data.objects.new(name, mesh)
+    collection.objects.link(widget)
+    return widget
+
+def set_chain_theme(obj, chain, theme):
+    """ Give the pose bones of a chain a theme color, with bone groups before Blender 4.0. """
+    if hasattr(chain[0], "color"):
+        for pb in chain:
+            pb.color.palette = theme
+        return
+    group = obj.pose.bone_groups.get(f"BCT {theme}")
+    if not group:
+        group = obj.pose.bone_groups.new(name=f"BCT {theme}")
+        group.color_set = theme
+    for pb in chain:
+        pb.bone_group = group
+
+def assign_bone_shapes(scene, obj, chains, shape, scale, colors, theme=1):
+    """ Give pose bone chains a shared widget with an even size along each chain and a color per chain.
+
+    Widgets scale with the bone length, so the scale of every bone is set to the chain's mean length
+    over its own length. A widget_scale property on a chain root multiplies the scale of that chain.
+    """
+    widget = widget_object(scene, shape) if shape != 'NONE' else None
+    pose_bones = obj.pose.bones
+    bone_index = {pb.name: i for i, pb in enumerate(pose_bones)}
+
+    scales = np.empty(len(pose_bones) * 3, dtype=np.float32)
+    pose_bones.foreach_get("custom_shape_scale_xyz", scales)
+    scales = scales.reshape(-1, 3)
+    for index, chain in enumerate(chains):
+        lengths = np.array([pb.bone.length for pb in chain])
+        size = scale * float(chain[0].get("widget_scale", 1.0)) * lengths.mean()
+        scales[[bone_index[pb.name] for pb in chain]] = (size / np.maximum(lengths, 1e-9))[:, None]
+        for pb in chain:
+            pb.custom_shape = widget
+        if colors != 'NONE':
+            number = index % THEME_COUNT + 1 if colors == 'CHAIN' else theme
+            set_chain_theme(obj, chain, f"THEME{number:02d}")
+    pose_bones.foreach_set("custom_shape_scale_xyz", scales.ravel())
+    return sum(len(chain) for chain in chains)
+
+def create_bone_shapes(context, shape, scale, colors, theme):
+    obj = context.active_object
+
+    # Ensure armature is selected, we are in pose mode, and there are selected bones
+    if not obj or obj.type != 'ARMATURE' or context.mode != 'POSE' or not context.selected_pose_bones:
+        raise ValueError("An armature must be selected, in pose mode, with selected bones.")
+
+    return assign_bone_shapes(context.scene, obj, get_bone_chains(context.selected_pose_bones), shape, scale, colors, theme)
+
+class BONESHAPE_OT_Create(bpy.types.Operator):
+    """Give the selected chains a shared custom bone shape and a color per chain"""
+    bl_idname = "boneshape.create"
+    bl_label = "Bone Shapes"
+    bl_options = {"REGISTER", "UNDO"}
+
+    shape: bpy.props.EnumProperty(
+        name="Shape",
+        items=WIDGET_SHAPE_ITEMS,
+        default='CIRCLE',
+        description="Custom shape of the bones, shared by every bone that uses it",
+    )
+    
+    scale: bpy.props.FloatProperty(
+        name="Shape Scale",
+        default=1.0,
+        min=0.01,
+        max=100.0,
+        description="Size of the shapes relative to the mean bone length of their chain",
+    )
+    
+    colors: bpy.props.EnumProperty(
+        name="Colors",
+        items=BONE_COLOR_ITEMS,
+        default='CHAIN',
+        description="How the chains are colored",
+    )
+    
+    theme: bpy.props.IntProperty(
+        name="Theme Color",
+        default=1,
+        min=1,
+        max=THEME_COUNT,
+        description="Theme color set of every chain",
+    )
+    
+    def draw(self, context):
+        layout = self.layout
+        layout.prop(self, "shape")
+        layout.prop(self, "scale")
+        layout.prop(self, "colors")
+        if self.colors == 'SINGLE':
+            layout.prop(self, "theme")
+    
+    def execute(self, context):
+        try:
+            shaped = create_bone_shapes(context, shape = self.shape, scale = self.scale, colors = self.colors, theme = self.theme)
+        except ValueError as e:
+            self.report({'ERROR'}, str(e))
+            return {'CANCELLED'}
+        self.report({'INFO'}, f"Shaped {shaped} bones")
+        return {'FINISHED'}
+
+## ------------------ HAIR TOOLS --------------------------------------------------------
+
+# Per vertex attribute with the index of the hair bone (island cluster) a vertex belongs to,
+# valid while the mesh fingerprint matches the one stored next to it
+CLUSTER_ATTRIBUTE = "bct_cluster"
+CLUSTER_PROP = "bct_cluster_fingerprint"
+
+def group_bounds(labels, mins, maxs):
+    """ Combined bounds of every group of items, given a group label (0..G-1) per item. """
+    order = np.argsort(labels, kind="stable")
+    starts = np.searchsorted(labels[order], np.arange(labels.max() + 1))
+    return np.minimum.reduceat(mins[order], starts, axis=0), np.maximum.reduceat(maxs[order], starts, axis=0)
+
+def analyze_mesh_islands(coords, edges):
+    """ Island labels and per island bounds of one mesh. Pure NumPy, so it can run in a worker thread. """
+    labels = connected_components(len(coords), edges)
+    if not len(coords):
+        return labels, np.empty((0, 3)), np.empty((0, 3))
+    mins, maxs = group_bounds(labels, coords, coords)
+    return labels, mins, maxs
+
+def cluster_islands(mins, maxs, threshold, block_size=1024):
+    """ Cluster islands whose bounding boxes are at most threshold apart, returns a cluster label per island. """
+    count = len(mins)
+    if count < 2:
+        return np.zeros(count, dtype=np.int64)
+
+    # Spatial hash: every island goes into all grid cells its bounds, grown by half the threshold, touch.
+    # Two islands within threshold of each other then always share at least one cell.
+    cell_size = max(threshold, float(np.median((maxs - mins).max(axis=1))), 1e-6)
+    lo = np.floor((mins - threshold / 2) / cell_size).astype(np.int64)
+    hi = np.floor((maxs + threshold / 2) / cell_size).astype(np.int64)
+    spans = hi - lo + 1
+    counts = spans.prod(axis=1)
+    owners = np.repeat(np.arange(count), counts)
+    local = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    size_x, size_y = spans[owners, 0], spans[owners, 1]
+    cells = lo[owners] + np.stack((local % size_x, local // size_x % size_y, local // (size_x * size_y)), axis=1)
+    cell_ids = np.unique(cells, axis=0, return_inverse=True)[1].reshape(-1)
+    order = np.argsort(cell_ids, kind="stable")
+    cell_ids, owners = cell_ids[order], owners[order]
+    starts = np.flatnonzero(np.diff(cell_ids, prepend=-1))
+    ends = np.append(starts[1:], len(cell_ids))
+
+    # Test the bounds gap of all island pairs sharing a cell, in blocks to bound memory in crowded cells
+    pairs = []
+    for start, end in zip(starts[ends - starts > 1], ends[ends - starts > 1]):
+        members = owners[start:end]
+        for block in range(0, len(members), block_size):
+            rows = members[block:block + block_size]
+            gap = np.maximum(mins[members][None] - maxs[rows][:, None], mins[rows][:, None] - maxs[members][None]).max(axis=2)
+            a, b = np.nonzero(gap <= threshold)
+            keep = rows[a] < members[b]
+            pairs.append(np.stack((rows[a][keep], members[b][keep]), axis=1))
+    return connected_components(count, np.concatenate(pairs) if pairs else [])
+
+def cluster_islands_to_budget(mins, maxs, bone_budget, iterations=24):
+    """ Cluster islands with the smallest threshold that keeps the cluster count within the bone budget. """
+    labels = cluster_islands(mins, maxs, 0.0)
+    if not len(labels) or labels.max() < bone_budget:
+        return labels, 0.0
+
+    # Grow the threshold until the budget is met, then bisect between the last two thresholds
+    low, high = 0.0, max(float(np.median((maxs - mins).max(axis=1))), 1e-6)
+    while True:
+        labels = cluster_islands(mins, maxs, high)
+        if labels.max() < bone_budget:
+            break
+        low, high = high, high * 2
+    for _ in range(iterations):
+        middle = (low + high) / 2
+        candidate = cluster_islands(mins, maxs, middle)
+        if candidate.max() < bone_budget:
+            labels, high = candidate, middle
+        else:
+            low = middle
+    return labels, high
+
+def write_int_attribute(mesh, name, values):
+    """ Store one integer per vertex as a point attribute, replacing an attribute of another type. """
+    attribute = mesh.attributes.get(name)
+    if attribute and (attribute.data_type != 'INT' or attribute.domain != 'POINT'):
+        mesh.attributes.remove(attribute)
+        attribute = None
+    if not attribute:
+        attribute = mesh.attributes.new(name, 'INT', 'POINT')
+    attribute.data.foreach_set("value", np.asarray(values, dtype=np.int32))
+
+def read_int_attribute(mesh, name):
+    """ Integer point attribute as an array, None if the mesh has no such attribute. """
+    attribute = mesh.attributes.get(name)
+    if not attribute or attribute.data_type != 'INT' or attribute.domain != 'POINT':
+        return None
+    values = np.empty(len(mesh.vertices), dtype=np.int32)
+    attribute.data.foreach_get("value", values)
+    return values
+
+def write_cluster_labels(mesh, fingerprint, clusters):
+    """ Store the island cluster of every vertex together with the fingerprint of the mesh it belongs to. """
+    write_int_attribute(mesh, CLUSTER_ATTRIBUTE, clusters)
+    mesh[CLUSTER_PROP] = fingerprint
+
+def clear_cluster_labels(mesh):
+    """ Remove stored island clusters, so Auto Weight falls back to plain islands. """
+    attribute = mesh.attributes.get(CLUSTER_ATTRIBUTE)
+    if attribute:
+        mesh.attributes.remove(attribute)
+    if CLUSTER_PROP in mesh:
+        del mesh[CLUSTER_PROP]
+
+def read_cluster_labels(mesh, fingerprint):
+    """ Island cluster of every vertex, None when missing or the mesh changed since they were stored. """
+    if mesh.get(CLUSTER_PROP) != fingerprint:
+        return None
+    return read_int_attribute(mesh, CLUSTER_ATTRIBUTE)
+
+# Island analysis stored on the mesh: labels as a point attribute, fingerprint and local bounds as an ID property
+ISLAND_ATTRIBUTE = "bct_island"
+ANALYSIS_PROP = "bct_analysis"
+
+def read_island_cache(mesh, fingerprint):
+    """ Island labels and local bounds of an earlier analysis, None when missing or the mesh changed since. """
+    info = mesh.get(ANALYSIS_PROP)
+    if not info or info.get("fingerprint") != fingerprint:
+        return None
+    labels = read_int_attribute(mesh, ISLAND_ATTRIBUTE)
+    if labels is None:
+        return None
+    mins = np.array(info["mins"], dtype=np.float64).reshape(-1, 3)
+    maxs = np.array(info["maxs"], dtype=np.float64).reshape(-1, 3)
+    return labels.astype(np.int64), mins, maxs
+
+def write_island_cache(mesh, fingerprint, labels, mins, maxs):
+    """ Store an island analysis on the mesh so unchanged meshes can skip it next time. """
+    write_int_attribute(mesh, ISLAND_ATTRIBUTE, labels)
+    mesh[ANALYSIS_PROP] = {
+        "fingerprint": fingerprint,
+        "vertices": len(labels),
+        "islands": len(mins),
+        "mins": mins.ravel().tolist(),
+        "maxs": maxs.ravel().tolist(),
+    }
+
+def placed_island_bounds(mesh, labels, mins, maxs, matrix):
+    """ Island bounds after transforming the mesh. Translations shift the bounds, rotations need the vertices again. """
+    mat = np.array(matrix)
+    if np.allclose(mat[:3, :3], np.eye(3)):
+        return mins + mat[:3, 3], maxs + mat[:3, 3]
+    if not len(labels):
+        return mins, maxs
+    coords = mesh_vertex_coords(mesh, matrix)
+    return group_bounds(labels, coords, coords)
+
+def island_info_from_bounds(mins, maxs):
+    """ Island info entries (center, bounds, scale, general scale) from island bound arrays. """
+    island_info = []
+    for min_coord, max_coord in zip(mins.tolist(), maxs.tolist()):
+        island_info.append({
+            "center": calculate_center_point(min_coord, max_coord),
+            "bounds": [min_coord[2], max_coord[2]],  # Top and bottom Z-coordinates
+            "scale": calculate_scale(min_coord, max_coord),
+            "general_scale": calculate_general_scale(min_coord, max_coord),
+            "min": min_coord,
+            "max": max_coord
+        })
+    return island_info
+
+def create_bone_chain(context, root_bone_size, use_cache=False, use_selected=False, cluster_mode='NONE', cluster_distance=0.01, bone_budget=100, widget_shape='NONE', widget_scale=1.0, widget_colors='NONE'):
     obj = context.active_object
         
     if not obj or obj.type != 'MESH':
         raise ValueError("The selected object is not a mesh.")
+
+    # The active mesh comes first, other selected meshes share its armature
+    meshes = [obj]
+    if use_selected:
+        meshes += [other for other in context.selected_objects if other.type == 'MESH' and other != obj]
     
-    if any(axis_scale != 1 for axis_scale in obj.scale):
-        raise ValueError("The mesh scale must be 1. Current scale is: " + str(obj.scale))   
+    for mesh_obj in meshes:
+        if any(axis_scale != 1 for axis_scale in mesh_obj.scale):
+            raise ValueError(f"The mesh scale must be 1. Current scale of {mesh_obj.name} is: " + str(mesh_obj.scale))   
         
     mesh_origin = obj.location.copy()
-    bpy.ops.object.mode_set(mode='EDIT')
-    bm = bmesh.from_edit_mesh(obj.data)
-    bm.verts.ensure_lookup_table()
+    if obj.mode != 'OBJECT':
+        bpy.ops.object.mode_set(mode='OBJECT')
+
+    # Mesh coordinates relative to the armature placed at the active mesh origin
+    to_armature = [Matrix.Translation(-mesh_origin) @ mesh_obj.matrix_world for mesh_obj in meshes]
+
+    fingerprints = [mesh_fingerprint(mesh_obj.data) for mesh_obj in meshes]
+
+    cache_key = None
+    if use_cache:
+        fingerprint = [[digest, [round(value, 6) for row in matrix for value in row]] for digest, matrix in zip(fingerprints, to_armature)]
+        params = {"root_bone_size": root_bone_size, "cluster_mode": cluster_mode, "cluster_distance": cluster_distance, "bone_budget": bone_budget}
+        cache_key = rig_cache_key("hair", params, fingerprint)
     
     # MESH VERTEX DATA PART
-    
-    for vert in bm.verts:
-        vert.tag = False
-
-    islands = []
-    for vert in bm.verts:
-        if not vert.tag:
-            island_verts = []
-            verts_to_check = [vert]
-            while verts_to_check:
-                current_vert = verts_to_check.pop()
-                current_vert.tag = True
-                island_verts.append(current_vert)
-                for edge in current_vert.link_edges:
-                    linked_vert = edge.other_vert(current_vert)
-                    if not linked_vert.tag:
-                        verts_to_check.append(linked_vert)
-            islands.append(island_verts)
 
+    # Meshes that did not change since their last analysis skip it
+    analyses = [read_island_cache(mesh_obj.data, fingerprint) for mesh_obj, fingerprint in zip(meshes, fingerprints)]
+    stale = [index for index, analysis in enumerate(analyses) if analysis is None]
 
-    # Gather and print the required information for each island
-    island_info = []
-    for index, island in enumerate(islands):
-        min_coord, max_coord = calculate_island_bounds(island)
-        center = calculate_center_point(min_coord, max_coord)
-        scale = calculate_scale(min_coord, max_coord)
-        general_scale = calculate_general_scale(min_coord, max_coord)
-        bounds = [min_coord[2], max_coord[2]]  # Top and bottom Z-coordinates
+    # Read buffers on the main thread, then analyze the other meshes in parallel (NumPy releases the GIL)
+    if stale:
+        buffers = [(mesh_vertex_coords(meshes[index].data), mesh_edge_indices(meshes[index].data)) for index in stale]
+        with ThreadPoolExecutor(max_workers=min(len(buffers), os.cpu_count() or 1)) as pool:
+            for index, analysis in zip(stale, pool.map(lambda buffer: analyze_mesh_islands(*buffer), buffers)):
+                write_island_cache(meshes[index].data, fingerprints[index], *analysis)
+                analyses[index] = analysis
 
-        island_info.append({
-            "center": center,
-            "bounds": bounds,
-            "scale": scale,
-            "general_scale": general_scale
-        })
-        print(f"Island {index + 1}: Center {center}, Bounds {bounds}, Scale {scale}, General Scale {general_scale}")
-    bpy.ops.object.mode_set(mode='OBJECT')
+    # Analyses are in mesh space, bounds are needed relative to the armature
+    results = [(labels, *placed_island_bounds(mesh_obj.data, labels, mins, maxs, matrix)) for mesh_obj, matrix, (labels, mins, maxs) in zip(meshes, to_armature, analyses)]
+
+    # Islands of all meshes share one index space
+    offsets = np.cumsum([0] + [len(mins) for labels, mins, maxs in results])
+    mins = np.concatenate([result[1] for result in results])
+    maxs = np.concatenate([result[2] for result in results])
+
+    # Group nearby islands so each cluster gets a single bone
+    if cluster_mode == 'DISTANCE':
+        clusters = cluster_islands(mins, maxs, cluster_distance)
+    elif cluster_mode == 'BUDGET':
+        clusters, _ = cluster_islands_to_budget(mins, maxs, bone_budget)
+    else:
+        clusters = np.arange(len(mins))
+    if len(mins):
+        mins, maxs = group_bounds(clusters, mins, maxs)
+
+    # Island to cluster mapping of every vertex, used by Auto Weight to keep chains on their own hair
+    for mesh_obj, fingerprint, (labels, _, _), offset in zip(meshes, fingerprints, results, offsets):
+        if cluster_mode != 'NONE':
+            write_cluster_labels(mesh_obj.data, fingerprint, clusters[labels + offset])
+        else:
+            clear_cluster_labels(mesh_obj.data)
+
+    # Reuse a rig generated before from the same meshes and settings. The mesh attributes above
+    # are written first, so Auto Weight sees the same clusters whether the rig was cached or not
+    if cache_key:
+        cached = rig_cache_lookup(cache_key)
+        if cached:
+            armature = new_rig_from_cache(context, cached, 'HairRigArmature', mesh_origin, meshes)
+            return finish_hair_rig(context, armature, widget_shape, widget_scale, widget_colors)
+
+    # Gather and print the required information for each island
+    island_info = island_info_from_bounds(mins, maxs)
+    for index, island_data in enumerate(island_info):
+        print(f"Island {index + 1}: Center {island_data['center']}, Bounds {island_data['bounds']}, Scale {island_data['scale']}, General Scale {island_data['general_scale']}")
     
     # ARMATURE PART
     
@@ -98,8 +976,9 @@ def create_bone_chain(context, root_bone_size):
     # Set the armature's location to the mesh origin
     armature.location = mesh_origin
 
-    # Keep the mesh selected
-    obj.select_set(True)
+    # Keep the meshes selected
+    for mesh_obj in meshes:
+        mesh_obj.select_set(True)
 
     # Set the armature as the active object for editing
     bpy.context.view_layer.objects.active = armature
@@ -123,11 +1002,18 @@ def create_bone_chain(context, root_bone_size):
         bone.head = center
         bone.tail = (center[0], center[1], center[2] + root_bone_size)  # Setting tail above the head
   
-  
-  
-  
-  
     bpy.ops.object.mode_set(mode='OBJECT')
+
+    if cache_key:
+        rig_cache_store(cache_key, armature.data)
+    return finish_hair_rig(context, armature, widget_shape, widget_scale, widget_colors)
+
+def finish_hair_rig(context, armature, widget_shape, widget_scale, widget_colors):
+    """ Give the island bones of a generated hair rig their shapes. Runs after caching, the cache only holds the bones. """
+    if widget_shape != 'NONE' or widget_colors != 'NONE':
+        island_bones = [pb for pb in armature.pose.bones if pb.name != 'ROOT']
+        assign_bone_shapes(context.scene, armature, get_bone_chains(island_bones), widget_shape, widget_scale, widget_colors)
+    return armature
  
  
  # INTERFACE CLASS
@@ -145,10 +1031,73 @@ class BONECHAIN_OT_Create(bpy.types.Operator):
         min=0.1,
         max=5.0
     )
+    
+    use_selected: bpy.props.BoolProperty(
+        name="All Selected Meshes",
+        default=False,
+        description="Build one rig for every selected mesh instead of only the active one",
+    )
+    
+    cluster_mode: bpy.props.EnumProperty(
+        name="Cluster Islands",
+        items=[
+            ('NONE', "None", "One bone per mesh island"),
+            ('DISTANCE', "Distance", "Islands closer than the cluster distance share one bone"),
+            ('BUDGET', "Bone Budget", "Cluster islands until the bone count fits the budget"),
+        ],
+        default='NONE',
+        description="Group nearby islands to reduce the bone count",
+    )
+    
+    cluster_distance: bpy.props.FloatProperty(
+        name="Cluster Distance",
+        default=0.01,
+        description="Maximum gap between island bounds that are clustered together",
+        min=0.0,
+        max=10.0
+    )
+    
+    bone_budget: bpy.props.IntProperty(
+        name="Bone Budget",
+        default=100,
+        description="Maximum number of island bones",
+        min=1,
+        max=100000
+    )
+    
+    widget_shape: bpy.props.EnumProperty(
+        name="Bone Shape",
+        items=WIDGET_SHAPE_ITEMS,
+        default='NONE',
+        description="Shared custom shape of the generated bones",
+    )
+    
+    widget_scale: bpy.props.FloatProperty(
+        name="Shape Scale",
+        default=1.0,
+        min=0.01,
+        max=100.0,
+        description="Size of the shapes relative to the mean bone length of their chain",
+    )
+    
+    widget_colors: bpy.props.EnumProperty(
+        name="Bone Colors",
+        items=BONE_COLOR_ITEMS,
+        default='NONE',
+        description="How the generated chains are colored",
+    )
+    
+    use_cache: bpy.props.BoolProperty(
+        name="Use Rig Cache",
+        default=True,
+        description="Reuse a rig generated before from the same mesh and settings",
+    )
         
     def execute(self, context):
         try:
-            create_bone_chain(context, root_bone_size = self.root_bone_size)
+            create_bone_chain(context, root_bone_size = self.root_bone_size, use_cache = self.use_cache, use_selected = self.use_selected,
+                              cluster_mode = self.cluster_mode, cluster_distance = self.cluster_distance, bone_budget = self.bone_budget,
+                              widget_shape = self.widget_shape, widget_scale = self.widget_scale, widget_colors = self.widget_colors)
         except ValueError as e:
             self.report({'ERROR'}, str(e))
             return {'CANCELLED'}
@@ -156,123 +1105,277 @@ class BONECHAIN_OT_Create(bpy.types.Operator):
         
 ## ------------------ SKIRT TOOLS --------------------------------------------------------
 
-def create_skirt_chain(context, rad, chain_length, root_bone_size, num_chains, chain_angle, flare_angle, auto_rotation_step, curve_angle, edit_size):
-    
-    if not context.selected_objects:
-        raise ValueError("No objects selected.")
-    obj = context.active_object
-        
-    if not obj or obj.type != 'MESH':
-        raise ValueError("The selected object is not a mesh.")
-    
-    # Save the mesh's origin point
-    mesh_origin = obj.location.copy()
-    
-    flare_radians = math.radians(flare_angle)
-    chains_dict = {}
-    
-   # Using the bounding box to find top and bottom Z-coordinates
-    bbox_corners = [obj.matrix_world @ Vector(corner) for corner in obj.bound_box]
-    top_point = max(bbox_corners, key=lambda c: c.z)
-    bottom_point = min(bbox_corners, key=lambda c: c.z)
-
-    # Calculate top and bottom centers
-    top_center = Vector((top_point.x, top_point.y, top_point.z))
-    bottom_center = Vector((bottom_point.x, bottom_point.y, bottom_point.z))
-
-    # Create an armature
-    bpy.ops.object.armature_add()
-    armature = bpy.context.object
-    armature.name = 'SkirtRigArmature'
-    armature.location = mesh_origin
-    
-    # Keep the mesh selected
-    obj.select_set(True)
-    
-    # Set the armature as the active object for editing
-    bpy.context.view_layer.objects.active = armature
-    bpy.ops.object.mode_set(mode='EDIT')
+SKIRT_BONE_PATTERN = re.compile(r"^skirt\.([a-z])\.(\d{3})$")
 
-    bones = armature.data.edit_bones
-    # Remove the default bone
-    if "Bone" in bones:
-        bones.remove(bones["Bone"])
+def update_skirt_bones(bones, settings):
+    """ Create, move and remove skirt edit bones in place so they match the settings. """
+    num_chains = settings.num_chains
+    chain_length = settings.chain_length
 
     # Create the ROOT bone
-    root_bone = bones.new('ROOT')
+    root_bone = bones.get('ROOT') or bones.new('ROOT')
     root_bone.head = (0, 0, 0)
-    root_bone.tail = (0, 0, root_bone_size)
+    root_bone.tail = (0, 0, settings.root_bone_size)
+
+    # Remove bones that are no longer part of the skirt
+    for bone in list(bones):
+        match = SKIRT_BONE_PATTERN.match(bone.name)
+        if match and (ord(match.group(1)) - 97 >= num_chains or int(match.group(2)) >= chain_length):
+            bones.remove(bone)
 
     # Calculate the total length for the bone chain
-    total_chain_length = (top_center.z - bottom_center.z) * edit_size
-    # chain lenght variable ---------------V
-    bone_length = total_chain_length / chain_length
+    bone_length = settings.height * settings.edit_size / chain_length
 
     # Positioning and rotation of chains
-    radius = rad  # Radius for positioning the chains in a circle
-    if auto_rotation_step == True:
-        rotation_step = math.radians(360 / num_chains)   
+    if settings.auto_rotation_step == True:
+        rotation_step = math.radians(360 / num_chains)
     else:
-        rotation_step = math.radians(chain_angle)
+        rotation_step = math.radians(settings.chain_angle)
+
+    # Flare and curve are rotations around the bone Z axis, composed like posed bones
+    flare_matrix = Matrix.Rotation(-math.radians(settings.flare_angle), 4, 'Z')
+    curve_radians = math.radians(settings.curve_angle)
+    step_matrix = Matrix.Translation((0, bone_length, 0))
 
     for chain_id in range(num_chains):
         angle = rotation_step * chain_id
-        chain_start = Vector((math.cos(angle) * rad, math.sin(angle) * rad, top_center.z))
-        bone_roll = -angle
+        chain_start = Vector((math.cos(angle) * settings.chain_radius, math.sin(angle) * settings.chain_radius, settings.top_z))
 
         # Generate the chain letter (a, b, c, etc.) based on chain_id
         chain_letter = chr(97 + chain_id)  # ASCII 'a' is 97
 
         prev_bone = root_bone
-        
-        
+        matrix = None
         for i in range(chain_length):
             bone_name = f'skirt.{chain_letter}.{i:03d}'
-            bone = bones.new(bone_name)
+            bone = bones.get(bone_name) or bones.new(bone_name)
+            bone.use_connect = False
             bone.parent = prev_bone
-            bone.use_connect = (i != 0)
-
-            bone.head = chain_start if i == 0 else prev_bone.tail
-            bone.tail = bone.head + Vector((0, 0, -bone_length))
 
-            # Rotate bone around its Y-axis
-            bone.roll = bone_roll
+            bone.head = chain_start
+            bone.tail = chain_start + Vector((0, 0, -bone_length))
+            if i == 0:
+                # Rotate bone around its Y-axis, then flare it outward
+                bone.roll = -angle
+                matrix = bone.matrix @ flare_matrix
+            else:
+                matrix = matrix @ step_matrix @ Matrix.Rotation(-curve_radians * i, 4, 'Z')
+            bone.matrix = matrix
 
+            bone.use_connect = (i != 0)
             prev_bone = bone
 
-    bpy.ops.object.mode_set(mode='OBJECT')
-    
-    bpy.ops.object.mode_set(mode='POSE')
+def update_skirt_rig(self, context):
+    """ Rebuild a live skirt rig in place when one of its settings changes.
 
-    flare_radians = math.radians(flare_angle)
-    curve_radians = math.radians(curve_angle)
+    Only the skirt bones are updated. LOD chains, Spline IK curves and bone shapes added by the
+    generator keep their old layout and have to be rebuilt with their tools after editing.
+    """
+    obj = context.active_object
+    if not self.is_live or not obj or obj.data != self.id_data:
+        return
 
-    for chain_id in range(num_chains):
-        chain_letter = chr(97 + chain_id)
-        cumulative_curve = 0  # Initialize the cumulative curve rotation
+    mode = obj.mode
+    if mode != 'EDIT':
+        bpy.ops.object.mode_set(mode='EDIT')
+    update_skirt_bones(obj.data.edit_bones, self)
+    if mode != 'EDIT':
+        bpy.ops.object.mode_set(mode=mode)
 
-        for bone_id in range(chain_length):
-            bone_name = f'skirt.{chain_letter}.{bone_id:03d}'
-            bone = armature.pose.bones.get(bone_name)
+class SkirtRigSettings(bpy.types.PropertyGroup):
+    """Generator settings stored on a skirt rig armature"""
 
-            if bone:
-                bone.rotation_mode = 'XYZ'
-                
-                if bone_id == 0:
-                    # Apply flare angle only to the first bone in each chain
-                    bone.rotation_euler[2] = -flare_radians
-                else:
-                    # Apply additional curve angle to subsequent bones
-                    cumulative_curve += curve_radians
-                    bone.rotation_euler[2] = -cumulative_curve
+    is_generated: bpy.props.BoolProperty(
+        name="Generated Skirt",
+        default=False,
+        description="The armature was built by the skirt generator",
+    )
+    
+    is_live: bpy.props.BoolProperty(
+        name="Live Update",
+        default=False,
+        description="Update the skirt bones in place when a setting changes. LOD chains, Spline IK curves and bone shapes are not updated",
+    )
+    
+    chain_radius: bpy.props.FloatProperty(
+        name="Skirt Radius",
+        default=1,
+        description="The radius of the chain",
+        update=update_skirt_rig
+    )
+    
+    chain_angle: bpy.props.FloatProperty(
+        name="Skirt Angle",
+        default=45,
+        description="The angle of the chain",
+        update=update_skirt_rig
+    )
+    
+    flare_angle: bpy.props.FloatProperty(
+        name="Flare Angle",
+        default=0.0,
+        description="Angle to flare the chains outward",
+        min=-90.0,
+        max=90.0,
+        update=update_skirt_rig
+    )
+     
+    curve_angle: bpy.props.FloatProperty(
+        name="Curve Angle",
+        default=0.0,
+        description="Angle to curve the chains",
+        min=-90.0,
+        max=90.0,
+        update=update_skirt_rig
+    )
+    
+    chain_length: bpy.props.IntProperty(
+        name="Chain Length",
+        default=4,
+        description="Number of bones in each chain",
+        min=1,
+        max=20,
+        update=update_skirt_rig
+    )
+    
+    num_chains: bpy.props.IntProperty(
+        name="Number Of Chains",
+        default=8,
+        description="Number of bone chains",
+        min=1,
+        max=20,
+        update=update_skirt_rig
+    )
+    
+    root_bone_size: bpy.props.FloatProperty(
+        name="Root Bone Size",
+        default=0.5,
+        description="Length of the root bone",
+        update=update_skirt_rig
+    )
+    
+    edit_size: bpy.props.FloatProperty(
+        name="Skirt Size",
+        default=1,
+        description="Length of the skirt",
+        update=update_skirt_rig
+    ) 
+    
+    auto_rotation_step: bpy.props.BoolProperty(
+        name="Auto Rotation Step",
+        description="Automatically calculate the rotation step",
+        default=True,
+        update=update_skirt_rig
+    )
+    
+    top_z: bpy.props.FloatProperty(
+        name="Top Height",
+        default=1,
+        description="Height the chains start at",
+        update=update_skirt_rig
+    )
+    
+    height: bpy.props.FloatProperty(
+        name="Mesh Height",
+        default=1,
+        description="Height of the skirt mesh the rig was built for",
+        update=update_skirt_rig
+    )
+
+def create_skirt_chain(context, rad, chain_length, root_bone_size, num_chains, chain_angle, flare_angle, auto_rotation_step, curve_angle, edit_size, use_cache=False, lod_bone_count=0, spline_points=0, spline_controls=True, widget_shape='NONE', widget_scale=1.0, widget_colors='NONE'):
+    
+    if not context.selected_objects:
+        raise ValueError("No objects selected.")
+    obj = context.active_object
+        
+    if not obj or obj.type != 'MESH':
+        raise ValueError("The selected object is not a mesh.")
+    if spline_points == 1:
+        raise ValueError("Spline IK curves need at least two control points, use 0 to disable them.")
+    
+    # Save the mesh's origin point
+    mesh_origin = obj.location.copy()
+    
+   # Using the bounding box to find top and bottom Z-coordinates
+    bbox_corners = [obj.matrix_world @ Vector(corner) for corner in obj.bound_box]
+    top_point = max(bbox_corners, key=lambda c: c.z)
+    bottom_point = min(bbox_corners, key=lambda c: c.z)
+
+    # Calculate top and bottom centers
+    top_center = Vector((top_point.x, top_point.y, top_point.z))
+    bottom_center = Vector((bottom_point.x, bottom_point.y, bottom_point.z))
+
+    # Reuse a rig generated before with the same settings and mesh height
+    cache_key = None
+    if use_cache:
+        params = {
+            "rad": rad, "chain_length": chain_length, "root_bone_size": root_bone_size, "num_chains": num_chains,
+            "chain_angle": chain_angle, "flare_angle": flare_angle, "auto_rotation_step": auto_rotation_step,
+            "curve_angle": curve_angle, "edit_size": edit_size,
+        }
+        cache_key = rig_cache_key("skirt", params, f"{top_center.z:.6f}/{bottom_center.z:.6f}")
+        cached = rig_cache_lookup(cache_key)
+        if cached:
+            return finish_skirt_rig(new_rig_from_cache(context, cached, 'SkirtRigArmature', mesh_origin, [obj]), lod_bone_count, spline_points, spline_controls, widget_shape, widget_scale, widget_colors)
+
+    # Create an armature
+    bpy.ops.object.armature_add()
+    armature = bpy.context.object
+    armature.name = 'SkirtRigArmature'
+    armature.location = mesh_origin
     
-            bpy.context.view_layer.update()
+    # Keep the mesh selected
+    obj.select_set(True)
+    
+    # Set the armature as the active object for editing
+    bpy.context.view_layer.objects.active = armature
+    bpy.ops.object.mode_set(mode='EDIT')
+
+    bones = armature.data.edit_bones
+    # Remove the default bone
+    if "Bone" in bones:
+        bones.remove(bones["Bone"])
+
+    # Store the generator settings on the armature so the rig can be updated in place later
+    settings = armature.data.bct_skirt
+    settings.is_live = False
+    settings.chain_radius = rad
+    settings.chain_angle = chain_angle
+    settings.flare_angle = flare_angle
+    settings.curve_angle = curve_angle
+    settings.chain_length = chain_length
+    settings.num_chains = num_chains
+    settings.root_bone_size = root_bone_size
+    settings.edit_size = edit_size
+    settings.auto_rotation_step = auto_rotation_step
+    settings.top_z = top_center.z
+    settings.height = top_center.z - bottom_center.z
 
-    # Apply the pose as the rest pose
-    bpy.ops.pose.armature_apply()
+    update_skirt_bones(bones, settings)
+    settings.is_live = True
+    settings.is_generated = True
 
-    # Switch back to object mode after rotations
     bpy.ops.object.mode_set(mode='OBJECT')
+
+    if cache_key:
+        rig_cache_store(cache_key, armature.data)
+    return finish_skirt_rig(armature, lod_bone_count, spline_points, spline_controls, widget_shape, widget_scale, widget_colors)
+
+def finish_skirt_rig(armature, lod_bone_count, spline_points, spline_controls, widget_shape, widget_scale, widget_colors):
+    """ Add Spline IK curves, LOD chains and bone shapes to a generated skirt rig. Runs after caching, the cache only holds the bones. """
+    if spline_points or lod_bone_count:
+        bpy.ops.object.mode_set(mode='EDIT')
+        if spline_points:
+            skirt_bones = [bone for bone in armature.data.edit_bones if SKIRT_BONE_PATTERN.match(bone.name)]
+            add_spline_ik(armature, get_bone_chains(skirt_bones), spline_points, spline_controls)
+        if lod_bone_count:
+            skirt_bones = [bone for bone in armature.data.edit_bones if SKIRT_BONE_PATTERN.match(bone.name)]
+            add_lod_chains(armature, get_bone_chains(skirt_bones), lod_bone_count)
+        bpy.ops.object.mode_set(mode='OBJECT')
+    if widget_shape != 'NONE' or widget_colors != 'NONE':
+        skirt_bones = [pb for pb in armature.pose.bones if SKIRT_BONE_PATTERN.match(pb.name)]
+        assign_bone_shapes(bpy.context.scene, armature, get_bone_chains(skirt_bones), widget_shape, widget_scale, widget_colors)
+    return armature
     
 class BONESKIRT_OT_Create(bpy.types.Operator):
     """Create a circular bone array resembling a skirt"""
@@ -342,6 +1445,56 @@ class BONESKIRT_OT_Create(bpy.types.Operator):
         default=True
     )
     
+    lod_bone_count: bpy.props.IntProperty(
+        name="LOD Bones",
+        default=0,
+        description="Also build LOD chains with this many bones for fast playback, 0 disables them",
+        min=0,
+        max=20
+    )
+    
+    spline_points: bpy.props.IntProperty(
+        name="Spline IK Points",
+        default=0,
+        description="Drive each chain with a Spline IK curve of this many control points (at least 2), 0 disables it",
+        min=0,
+        max=32
+    )
+    
+    spline_controls: bpy.props.BoolProperty(
+        name="Spline Control Bones",
+        default=True,
+        description="Add a bone per curve control point that moves the curve through a hook",
+    )
+    
+    widget_shape: bpy.props.EnumProperty(
+        name="Bone Shape",
+        items=WIDGET_SHAPE_ITEMS,
+        default='NONE',
+        description="Shared custom shape of the generated bones",
+    )
+    
+    widget_scale: bpy.props.FloatProperty(
+        name="Shape Scale",
+        default=1.0,
+        min=0.01,
+        max=100.0,
+        description="Size of the shapes relative to the mean bone length of their chain",
+    )
+    
+    widget_colors: bpy.props.EnumProperty(
+        name="Bone Colors",
+        items=BONE_COLOR_ITEMS,
+        default='NONE',
+        description="How the generated chains are colored",
+    )
+    
+    use_cache: bpy.props.BoolProperty(
+        name="Use Rig Cache",
+        default=True,
+        description="Reuse a rig generated before with the same settings",
+    )
+    
     def draw(self, context):
         layout = self.layout
         
@@ -366,9 +1519,20 @@ class BONESKIRT_OT_Create(bpy.types.Operator):
         layout.prop(self, "root_bone_size")
         layout.prop(self, "edit_size")
         
+        layout.separator(factor=2)
+        layout.prop(self, "spline_points")
+        if self.spline_points:
+            layout.prop(self, "spline_controls")
+        layout.prop(self, "lod_bone_count")
+        layout.prop(self, "widget_shape")
+        if self.widget_shape != 'NONE':
+            layout.prop(self, "widget_scale")
+        layout.prop(self, "widget_colors")
+        layout.prop(self, "use_cache")
+        
     def execute(self, context):
         try:
-            create_skirt_chain(context, rad=self.chain_radius, chain_length=self.chain_length, root_bone_size=self.root_bone_size, num_chains=self.num_chains, chain_angle=self.chain_angle, flare_angle=self.flare_angle, auto_rotation_step=self.auto_rotation_step, curve_angle=self.curve_angle, edit_size = self.edit_size)
+            create_skirt_chain(context, rad=self.chain_radius, chain_length=self.chain_length, root_bone_size=self.root_bone_size, num_chains=self.num_chains, chain_angle=self.chain_angle, flare_angle=self.flare_angle, auto_rotation_step=self.auto_rotation_step, curve_angle=self.curve_angle, edit_size = self.edit_size, use_cache = self.use_cache, lod_bone_count = self.lod_bone_count, spline_points = self.spline_points, spline_controls = self.spline_controls, widget_shape = self.widget_shape, widget_scale = self.widget_scale, widget_colors = self.widget_colors)
         except ValueError as e:
             self.report({'ERROR'}, str(e))
             return {'CANCELLED'}
@@ -435,6 +1599,149 @@ class BONEFIX_OT_Create(bpy.types.Operator):
             return {'CANCELLED'}
         return {'FINISHED'}
 
+# Text datablock receiving the JSON report of the rig profiler
+PROFILE_TEXT = "BCT Rig Profile.json"
+
+def constraint_groups(pose_bones):
+    """ Active constraints of the pose bones grouped per chain and per constraint type. """
+    groups = {}
+    for chain in get_bone_chains(pose_bones):
+        for pose_bone in chain:
+            for constraint in pose_bone.constraints:
+                if not constraint.mute:
+                    groups.setdefault(("chain", chain[0].name), []).append(constraint)
+                    groups.setdefault(("type", constraint.type), []).append(constraint)
+    return groups
+
+def time_frame_range(scene, frames, repeats):
+    """ Fastest of several timed evaluations of the frame range, in seconds. """
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        for frame in frames:
+            scene.frame_set(frame)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def time_muted(scene, frames, repeats, constraints):
+    """ Time the frame range with the constraints muted, then unmute them again. """
+    for constraint in constraints:
+        constraint.mute = True
+    try:
+        return time_frame_range(scene, frames, repeats)
+    finally:
+        for constraint in constraints:
+            constraint.mute = False
+
+def profile_rig(context, frame_start, frame_end, repeats):
+    obj = context.active_object
+    if not obj or obj.type != 'ARMATURE':
+        raise ValueError("Active object must be an Armature.")
+    if frame_end < frame_start:
+        raise ValueError("The end frame must not be before the start frame.")
+
+    # Selected bones in pose mode, otherwise the whole rig
+    pose_bones = list(obj.pose.bones)
+    if context.mode == 'POSE' and context.selected_pose_bones:
+        pose_bones = context.selected_pose_bones
+
+    groups = constraint_groups(pose_bones)
+    if not groups:
+        raise ValueError("No active constraints to profile.")
+
+    scene = context.scene
+    frames = range(frame_start, frame_end + 1)
+    current_frame = scene.frame_current
+    rows = []
+    try:
+        # Warm up so the first timing does not pay for building the depsgraph
+        scene.frame_set(frame_start)
+        baseline = time_frame_range(scene, frames, repeats)
+        all_constraints = [constraint for (kind, name), constraints in groups.items() if kind == "type" for constraint in constraints]
+        unconstrained = time_muted(scene, frames, repeats, all_constraints)
+
+        # The cost of a group is the time saved when its constraints are muted
+        for (kind, name), constraints in groups.items():
+            elapsed = time_muted(scene, frames, repeats, constraints)
+            rows.append({
+                "group": kind,
+                "name": name,
+                "constraints": len(constraints),
+                # Timing noise can make a cheap group look faster than free
+                "ms_per_frame": max(baseline - elapsed, 0.0) * 1000 / len(frames),
+            })
+    finally:
+        scene.frame_set(current_frame)
+    rows.sort(key=lambda row: row["ms_per_frame"], reverse=True)
+
+    # Stretch constraints Fix Constraints would still change
+    unfixed = [f"{pose_bone.name}: {constraint.name}" for pose_bone in pose_bones for constraint in pose_bone.constraints
+               if constraint.type == "STRETCH_TO" and constraint.rest_length != 0]
+
+    report = {
+        "armature": obj.name,
+        "frames": [frame_start, frame_end],
+        "repeats": repeats,
+        "ms_per_frame": baseline * 1000 / len(frames),
+        "constraints_ms_per_frame": max(baseline - unconstrained, 0.0) * 1000 / len(frames),
+        "groups": rows,
+        "unfixed_stretch": unfixed,
+    }
+
+    lines = [f"{'Group':<8}{'Name':<40}{'Constraints':>12}{'ms/frame':>10}"]
+    lines += [f"{row['group']:<8}{row['name']:<40}{row['constraints']:>12}{row['ms_per_frame']:>10.3f}" for row in rows]
+    print("\n".join(lines))
+
+    text = bpy.data.texts.get(PROFILE_TEXT) or bpy.data.texts.new(PROFILE_TEXT)
+    text.clear()
+    text.write(json.dumps(report, indent=2))
+    return report
+
+class BONEPROFILE_OT_Create(bpy.types.Operator):
+    """Time the frame range with groups of constraints muted to find the slowest chains and constraint types"""
+    bl_idname = "boneprofile.create"
+    bl_label = "Profile Rig"
+    bl_options = {"REGISTER", "UNDO"}    
+    
+    use_scene_range: bpy.props.BoolProperty(
+        name="Scene Frame Range",
+        default=True,
+        description="Profile the scene frame range instead of a custom one",
+    )
+    
+    frame_start: bpy.props.IntProperty(
+        name="Start Frame",
+        default=1,
+        description="First frame to evaluate",
+    )
+    
+    frame_end: bpy.props.IntProperty(
+        name="End Frame",
+        default=50,
+        description="Last frame to evaluate",
+    )
+    
+    repeats: bpy.props.IntProperty(
+        name="Repeats",
+        default=3,
+        description="Number of timed runs per group, the fastest run is used",
+        min=1,
+        max=20
+    )
+    
+    def execute(self, context):
+        frame_start, frame_end = self.frame_start, self.frame_end
+        if self.use_scene_range:
+            frame_start, frame_end = context.scene.frame_start, context.scene.frame_end
+        try:
+            report = profile_rig(context, frame_start = frame_start, frame_end = frame_end, repeats = self.repeats)
+        except ValueError as e:
+            self.report({'ERROR'}, str(e))
+            return {'CANCELLED'}
+        slowest = ", ".join(f"{row['name']} {row['ms_per_frame']:.2f}" for row in report["groups"][:3])
+        self.report({'INFO'}, f"{report['ms_per_frame']:.2f} ms per frame, slowest (ms): {slowest}. Full report in '{PROFILE_TEXT}'")
+        return {'FINISHED'}
+
 ### ------------------ BONE NAME TOOLS AND PANEL --------------------------------------------------------   
 
 def bone_chain_name(context, chain_name, reverse, custom_letter, da_letter, skip_letter):
@@ -609,230 +1916,2564 @@ class BONECONNECT_OT_Create(bpy.types.Operator):
             return {'CANCELLED'}
         return {'FINISHED'}    
     
-### ------------------ ROLL ALIGN TOOLS AND PANEL --------------------------------------------------------   
+### ------------------ BONE MIRROR TOOLS AND PANEL --------------------------------------------------------   
 
-def bone_roll_align(context):
+# Only upper case sides, lower case letters are chain letters in [name.l.000]
+SIDE_PATTERN = re.compile(r"([._-])([LR])((?:\.\d+)?)$")
+SIDE_SWAP = {'L': 'R', 'R': 'L'}
+CHAIN_NAME_PATTERN = re.compile(r"^(.+)\.([a-z])\.(\d{3})$")
+
+def flip_side_name(name):
+    """ Swap the .L/.R style side suffix of a name, returns None if it has none. """
+    match = SIDE_PATTERN.search(name)
+    if not match:
+        return None
+    return f"{name[:match.start()]}{match.group(1)}{SIDE_SWAP[match.group(2)]}{match.group(3)}"
+
+def next_chain_letter(existing_names, base_name):
+    """ First chain letter not used yet by a [base_name.x.000] chain. """
+    for letter in 'abcdefghijklmnopqrstuvwxyz':
+        if f"{base_name}.{letter}.000" not in existing_names:
+            return letter
+    raise ValueError(f"No free chain letter left for {base_name}.")
+
+def mirror_chain_names(chain, naming, side, existing):
+    """ Names of the mirrored bones of one chain, renames the sources when they need a side suffix. """
+    # Chains mirrored before keep their counterpart
+    partners = [bone.get("bct_mirror") for bone in chain]
+    if all(partner in existing for partner in partners):
+        return partners
+
+    match = CHAIN_NAME_PATTERN.match(chain[0].name)
+    if naming == 'LETTER' and match:
+        letter = next_chain_letter(existing, match.group(1))
+        names = []
+        for bone in chain:
+            bone_match = CHAIN_NAME_PATTERN.match(bone.name)
+            if bone_match:
+                names.append(f"{bone_match.group(1)}.{letter}.{bone_match.group(3)}")
+            else:
+                names.append(f"{bone.name}.{letter}")
+        return names
+
+    names = []
+    for bone in chain:
+        flipped = flip_side_name(bone.name)
+        if flipped is None:
+            del existing[bone.name]
+            bone.name = f"{bone.name}.{side}"
+            existing[bone.name] = bone
+            flipped = flip_side_name(bone.name)
+        names.append(flipped)
+    return names
+
+def mirror_chains(context, axis, naming):
     obj = context.active_object
     # Check if an armature is selected and it's in edit mode
     if not obj or obj.type != 'ARMATURE' or context.mode != 'EDIT_ARMATURE':
         raise ValueError("No armature selected or not in edit mode.")
-        
-     # Ensure Blender is in Edit Mode
-    if bpy.context.object.mode != 'EDIT':
-        return  # Exit if not in Edit Mode
 
-    obj = bpy.context.object
-    if obj.type == 'ARMATURE' and obj.data.edit_bones.active:
-        active_bone = obj.data.edit_bones.active
-        active_roll = active_bone.roll
+    edit_bones = obj.data.edit_bones
+    selected_bones = [bone for bone in edit_bones if bone.select]
+    if not selected_bones:
+        raise ValueError("No bones selected.")
 
-        for bone in obj.data.edit_bones:
-            if bone.select and bone != active_bone:
-                bone.roll = active_roll
+    chains = get_bone_chains(selected_bones)
+    sources = [bone for chain in chains for bone in chain]
 
-class BONEROLL_OT_Create(bpy.types.Operator):
-    """Align roll of inactive bones to active bone"""
-    bl_idname = "boneroll.create"
-    bl_label = "Align Bone roll"
+    # Mirror every head, tail and roll axis in one step
+    axis_index = 'XYZ'.index(axis)
+    flip = np.ones(3)
+    flip[axis_index] = -1.0
+    heads = np.array([bone.head for bone in sources])
+    tails = np.array([bone.tail for bone in sources])
+    mirrored_heads = heads * flip
+    mirrored_tails = tails * flip
+    mirrored_z = np.array([bone.z_axis for bone in sources]) * flip
+    centered = (np.abs(heads[:, axis_index]) < 1e-6) & (np.abs(tails[:, axis_index]) < 1e-6)
+
+    # Name index, counterparts are looked up instead of searched
+    existing = {bone.name: bone for bone in edit_bones}
+    pairs = []
+    offset = 0
+    for chain in chains:
+        count = len(chain)
+        if not centered[offset:offset + count].all():
+            side = 'L' if heads[offset:offset + count, axis_index].mean() >= 0 else 'R'
+            names = mirror_chain_names(chain, naming, side, existing)
+            for index, (bone, name) in enumerate(zip(chain, names)):
+                target = existing.get(name)
+                if target is None:
+                    target = edit_bones.new(name)
+                    existing[target.name] = target
+                pairs.append((offset + index, bone, target))
+        offset += count
+
+    mirrored = {bone.name: target for _, bone, target in pairs}
+    for index, bone, target in pairs:
+        target.use_connect = False
+        target.head = mirrored_heads[index]
+        target.tail = mirrored_tails[index]
+        target.align_roll(mirrored_z[index])
+        for attr in BONE_COPY_ATTRS:
+            setattr(target, attr, getattr(bone, attr))
+        bone["bct_mirror"] = target.name
+        target["bct_mirror"] = bone.name
+
+    # Parent to mirrored parents, existing counterparts, or the shared center parent
+    for index, bone, target in pairs:
+        parent = bone.parent
+        if parent is None:
+            target.parent = None
+        elif parent.name in mirrored:
+            target.parent = mirrored[parent.name]
+        else:
+            counterpart = existing.get(parent.get("bct_mirror") or flip_side_name(parent.name) or "")
+            target.parent = counterpart or parent
+        target.use_connect = bone.use_connect
+
+    return len(pairs)
+
+class BONEMIRROR_OT_Create(bpy.types.Operator):
+    """Mirror the selected bone chains and name them as counterparts"""
+    bl_idname = "bonemirror.create"
+    bl_label = "Mirror Chains"
     bl_options = {"REGISTER", "UNDO"}    
     
+    axis: bpy.props.EnumProperty(
+        name="Axis",
+        items=[
+            ('X', "X", "Mirror across the YZ plane"),
+            ('Y', "Y", "Mirror across the XZ plane"),
+            ('Z', "Z", "Mirror across the XY plane"),
+        ],
+        default='X',
+        description="Armature axis to mirror across",
+    )
+    
+    naming: bpy.props.EnumProperty(
+        name="Naming",
+        items=[
+            ('SIDE', "Side Suffix", "Name mirrored bones with a .L/.R suffix"),
+            ('LETTER', "Chain Letter", "Give mirrored [name.a.000] chains the next free letter"),
+        ],
+        default='SIDE',
+        description="How mirrored bones are named",
+    )
     
     def execute(self, context):
         try:
-            bone_roll_align(context)
+            mirrored = mirror_chains(context, axis = self.axis, naming = self.naming)
         except ValueError as e:
             self.report({'ERROR'}, str(e))
             return {'CANCELLED'}
-        return {'FINISHED'}     
-           
-### ------------------ AUTO WEIGHT TOOLS AND PANEL --------------------------------------------------------   
+        self.report({'INFO'}, f"Mirrored {mirrored} bones")
+        return {'FINISHED'}    
+    
+### ------------------ BONE RESAMPLE TOOLS AND PANEL --------------------------------------------------------   
 
-#Automatically recalculates weight for selected bones
-def re_weight():
-    pass
+NUMBERED_NAME_PATTERN = re.compile(r"^(.*?)(\d+)$")
 
-class BONEWEIGHT_OT_Create(bpy.types.Operator):
-    bl_idname = "reweight.create"
-    bl_label = "Auto Weight"
-    bl_options = {"REGISTER", "UNDO"}    
-    
-    
-    def execute(self, context):
-        re_weight()
-        return {'FINISHED'}     
+def rebuild_chain(edit_bones, chain, joints, rolls):
+    """ Fit an edit bone chain to new joints, adding or removing bones at the tip. Returns the new chain. """
+    count = len(joints) - 1
+    old_count = len(chain)
+    chain_names = {bone.name for bone in chain}
+    root_parent = chain[0].parent
+    root_connect = chain[0].use_connect
 
-### ------------------ DIRECTION TOOLS AND PANEL --------------------------------------------------------   
+    # Children hanging off the chain move to the bone at the same relative position
+    outside_children = [(child, index) for index, bone in enumerate(chain) for child in bone.children if child.name not in chain_names]
 
-def switch_chain(context):
-    
+    for bone in chain[count:]:
+        edit_bones.remove(bone)
+    bones = chain[:count]
+
+    match = NUMBERED_NAME_PATTERN.match(chain[0].name)
+    for i in range(old_count, count):
+        if match:
+            name = f"{match.group(1)}{int(match.group(2)) + i:0{len(match.group(2))}d}"
+        else:
+            name = f"{chain[0].name}.{i:03d}"
+        bone = edit_bones.new(name)
+        for attr in BONE_COPY_ATTRS:
+            setattr(bone, attr, getattr(bones[-1], attr))
+        bones.append(bone)
+
+    for i, bone in enumerate(bones):
+        bone.use_connect = False
+        bone.parent = root_parent if i == 0 else bones[i - 1]
+        bone.head = joints[i]
+        bone.tail = joints[i + 1]
+        bone.roll = rolls[i]
+        bone.use_connect = root_connect if i == 0 else True
+
+    for child, index in outside_children:
+        child.parent = bones[min(index * count // old_count, count - 1)]
+    return bones
+
+def resample_chains(context, mode, bone_count, bone_length):
     obj = context.active_object
     # Check if an armature is selected and it's in edit mode
     if not obj or obj.type != 'ARMATURE' or context.mode != 'EDIT_ARMATURE':
         raise ValueError("No armature selected or not in edit mode.")
-        
-    armature = context.active_object
-    if not armature or armature.type != 'ARMATURE':
-        print("No armature selected.")
-        return
-
-    bpy.ops.object.mode_set(mode='EDIT')
 
-    bones = armature.data.edit_bones
-    selected_bones = [bone for bone in bones if bone.select]
+    edit_bones = obj.data.edit_bones
+    selected_bones = [bone for bone in edit_bones if bone.select]
     if not selected_bones:
-        print("No bones selected.")
-        return
-    
-    # Identify the first bone in the chain
-    first_bone = None
-    for bone in selected_bones:
-        if not bone.parent or bone.parent not in selected_bones:
-            first_bone = bone
-            break
+        raise ValueError("No bones selected.")
 
-    # Identify the last bone in the chain
-    last_bone = None
-    for bone in selected_bones:
-        if not any(child in selected_bones for child in bone.children):
-            last_bone = bone
-            break
+    chains = get_bone_chains(selected_bones)
+    polylines = [chain_polyline(chain) for chain in chains]
+    if mode == 'LENGTH':
+        totals = np.array([np.linalg.norm(np.diff(points, axis=0), axis=1).sum() for points in polylines])
+        counts = np.maximum(np.round(totals / bone_length), 1).astype(np.int64)
+    else:
+        counts = np.full(len(chains), bone_count)
 
-    if not first_bone or not last_bone:
-        print("Could not determine the first or last bone in the chain.")
-        return
+    # Redistribute every chain in one pass
+    resampled = resample_polylines(polylines, counts)
 
-    # Store the parent of the first bone
+    bone_total = 0
+    for chain, points, joints in zip(chains, polylines, resampled):
+        # Rolls follow the arc length position of the original bones
+        params = arc_parameters(points)
+        old_mid = (params[:-1] + params[1:]) / 2
+        new_mid = (np.arange(len(joints) - 1) + 0.5) / (len(joints) - 1)
+        rolls = np.interp(new_mid, old_mid, np.unwrap([bone.roll for bone in chain]))
+        bone_total += len(rebuild_chain(edit_bones, chain, joints, rolls))
+    return len(chains), bone_total
+
+class BONERESAMPLE_OT_Create(bpy.types.Operator):
+    """Redistribute the selected chains by arc length to a new bone count"""
+    bl_idname = "boneresample.create"
+    bl_label = "Resample Chains"
+    bl_options = {"REGISTER", "UNDO"}    
+    
+    mode: bpy.props.EnumProperty(
+        name="Target",
+        items=[
+            ('COUNT', "Bone Count", "Give every chain the same number of bones"),
+            ('LENGTH', "Bone Length", "Pick the bone count of each chain from a target bone length"),
+        ],
+        default='COUNT',
+        description="How the new number of bones is chosen",
+    )
+    
+    bone_count: bpy.props.IntProperty(
+        name="Number Of Bones",
+        default=4,
+        description="Number of bones in each chain",
+        min=1,
+        max=100
+    )
+    
+    bone_length: bpy.props.FloatProperty(
+        name="Bone Length",
+        default=0.1,
+        description="Target length of the bones",
+        min=0.001
+    )
+    
+    def draw(self, context):
+        layout = self.layout
+        layout.prop(self, "mode")
+        if self.mode == 'COUNT':
+            layout.prop(self, "bone_count")
+        else:
+            layout.prop(self, "bone_length")
+    
+    def execute(self, context):
+        try:
+            chains, bones = resample_chains(context, mode = self.mode, bone_count = self.bone_count, bone_length = self.bone_length)
+        except ValueError as e:
+            self.report({'ERROR'}, str(e))
+            return {'CANCELLED'}
+        self.report({'INFO'}, f"Resampled {chains} chains to {bones} bones")
+        return {'FINISHED'}    
+    
+### ------------------ BONE SMOOTH TOOLS AND PANEL --------------------------------------------------------   
+
+def smooth_polylines(points, valid, iterations, factor, curvature_weight):
+    """ Laplacian smoothing of padded (C, J, 3) chains that keeps roots and segment lengths.
+
+    Joints with a sharper bend are smoothed more when curvature_weight is above zero.
+    """
+    points = points.copy()
+    lengths = np.linalg.norm(np.diff(points, axis=1), axis=2)
+    # Only joints with a valid neighbour on both sides move, the root stays and the tip follows
+    interior = valid[:, 1:-1] & valid[:, 2:]
+
+    for _ in range(iterations):
+        prev, mid, next = points[:, :-2], points[:, 1:-1], points[:, 2:]
+        laplacian = (prev + next) / 2 - mid
+
+        a, b = mid - prev, next - mid
+        cos = np.einsum("cji,cji->cj", a, b) / np.maximum(np.linalg.norm(a, axis=2) * np.linalg.norm(b, axis=2), 1e-12)
+        bend = np.arccos(np.clip(cos, -1.0, 1.0)) / math.pi
+        weight = factor * ((1.0 - curvature_weight) + curvature_weight * bend) * interior
+
+        points[:, 1:-1] += laplacian * weight[..., None]
+        restore_lengths(points, lengths)
+    return points
+
+def smooth_chains(context, iterations, factor, curvature_weight):
+    obj = context.active_object
+    # Check if an armature is selected and it's in edit mode
+    if not obj or obj.type != 'ARMATURE' or context.mode != 'EDIT_ARMATURE':
+        raise ValueError("No armature selected or not in edit mode.")
+
+    selected_bones = [bone for bone in obj.data.edit_bones if bone.select]
+    if not selected_bones:
+        raise ValueError("No bones selected.")
+
+    chains = [chain for chain in get_bone_chains(selected_bones) if len(chain) > 1]
+    if not chains:
+        raise ValueError("Chains need at least two bones to be smoothed.")
+
+    points, valid = pad_polylines([chain_polyline(chain) for chain in chains])
+    points = smooth_polylines(points, valid, iterations, factor, curvature_weight)
+
+    # Write everything back in one pass
+    for chain, joints in zip(chains, points):
+        for i, bone in enumerate(chain):
+            bone.head = joints[i]
+            bone.tail = joints[i + 1]
+    return len(chains)
+
+class BONESMOOTH_OT_Create(bpy.types.Operator):
+    """Smooth the joints of the selected chains, keeping roots and lengths"""
+    bl_idname = "bonesmooth.create"
+    bl_label = "Smooth Chains"
+    bl_options = {"REGISTER", "UNDO"}    
+    
+    iterations: bpy.props.IntProperty(
+        name="Iterations",
+        default=5,
+        description="Number of smoothing passes",
+        min=1,
+        max=100
+    )
+    
+    factor: bpy.props.FloatProperty(
+        name="Factor",
+        default=0.5,
+        description="How far joints move towards their neighbours per pass",
+        min=0.0,
+        max=1.0
+    )
+    
+    curvature_weight: bpy.props.FloatProperty(
+        name="Curvature Weight",
+        default=0.5,
+        description="Smooth sharp bends more than gentle curves",
+        min=0.0,
+        max=1.0
+    )
+    
+    def execute(self, context):
+        try:
+            smooth_chains(context, iterations = self.iterations, factor = self.factor, curvature_weight = self.curvature_weight)
+        except ValueError as e:
+            self.report({'ERROR'}, str(e))
+            return {'CANCELLED'}
+        return {'FINISHED'}    
+    
+### ------------------ LOD CHAIN TOOLS AND PANEL --------------------------------------------------------   
+
+LOD_PREFIX = "LOD."
+LOD_CONSTRAINT = "BCT LOD"
+# Pose bone property listing the constraints the LOD switch muted
+LOD_MUTED = "bct_lod_muted"
+# Armature property set while a render temporarily switched the LOD chains off
+LOD_RENDER = "bct_lod_render"
+LOD_COLLECTIONS = ("Chains Full", "Chains LOD")
+
+def lod_bone_name(chain, index):
+    """ Name of a LOD bone of a chain, numbered like the chain itself. """
+    match = NUMBERED_NAME_PATTERN.match(chain[0].name)
+    if match:
+        return f"{LOD_PREFIX}{match.group(1)}{int(match.group(2)) + index:0{len(match.group(2))}d}"
+    return f"{LOD_PREFIX}{chain[0].name}.{index:03d}"
+
+def build_lod_bones(edit_bones, chains, bone_count):
+    """ Create reduced LOD edit bone chains that follow the arc length of the full chains.
+
+    Returns the LOD bone names and a (full bone, LOD bone, head_tail) link per full bone: the point
+    of the LOD chain the tail of the full bone tracks.
+    """
+    counts = np.minimum(bone_count, [len(chain) for chain in chains])
+    polylines = [chain_polyline(chain) for chain in chains]
+    resampled = resample_polylines(polylines, counts)
+
+    lod_names, links = [], []
+    for chain, points, joints, count in zip(chains, polylines, resampled, counts):
+        # Drop the LOD bones of an earlier build
+        index = 0
+        while edit_bones.get(lod_bone_name(chain, index)):
+            edit_bones.remove(edit_bones[lod_bone_name(chain, index)])
+            index += 1
+
+        params = arc_parameters(points)
+        old_mid = (params[:-1] + params[1:]) / 2
+        new_mid = (np.arange(count) + 0.5) / count
+        rolls = np.interp(new_mid, old_mid, np.unwrap([bone.roll for bone in chain]))
+
+        bones = []
+        for i in range(count):
+            bone = edit_bones.new(lod_bone_name(chain, i))
+            bone.head = joints[i]
+            bone.tail = joints[i + 1]
+            bone.roll = rolls[i]
+            bone.use_deform = False
+            bone.parent = chain[0].parent if i == 0 else bones[-1]
+            bone.use_connect = chain[0].use_connect if i == 0 else True
+            bones.append(bone)
+        lod_names += [bone.name for bone in bones]
+
+        # LOD joints sit at equal arc length steps, so a tail parameter maps straight to a LOD bone
+        position = params[1:] * count
+        lod_index = np.minimum(np.floor(position), count - 1).astype(np.int64)
+        head_tail = np.clip(position - lod_index, 0.0, 1.0)
+        links += [(bone.name, bones[j].name, float(t)) for bone, j, t in zip(chain, lod_index, head_tail)]
+    return lod_names, links
+
+def assign_lod_collections(armature, full_names, lod_names):
+    """ Put full and LOD bones into their own bone collections, where bone collections exist. """
+    if not hasattr(armature, "collections"):
+        return
+    for collection_name, bone_names in zip(LOD_COLLECTIONS, (full_names, lod_names)):
+        collection = armature.collections.get(collection_name) or armature.collections.new(collection_name)
+        for name in bone_names:
+            collection.assign(armature.bones[name])
+
+def apply_lod_state(obj):
+    """ Evaluate either the full or the LOD chains of an armature object, following its LOD switch. """
+    armature = obj.data
+    use_lod = armature.bct_use_lod
+    full_names, lod_names = set(), set()
+    for pose_bone in obj.pose.bones:
+        lod_constraint = pose_bone.constraints.get(LOD_CONSTRAINT)
+        if not lod_constraint:
+            continue
+        full_names.add(pose_bone.name)
+        lod_names.add(lod_constraint.subtarget)
+        lod_constraint.mute = not use_lod
+
+        # The constraints of the full chain are muted while the LOD chain drives it
+        others = [constraint for constraint in pose_bone.constraints if constraint != lod_constraint]
+        muted = set(pose_bone.get(LOD_MUTED, []))
+        if use_lod:
+            muted |= {constraint.name for constraint in others if not constraint.mute}
+            for constraint in others:
+                constraint.mute = True
+            pose_bone[LOD_MUTED] = sorted(muted)
+        else:
+            for constraint in others:
+                if constraint.name in muted:
+                    constraint.mute = False
+            if LOD_MUTED in pose_bone:
+                del pose_bone[LOD_MUTED]
+
+    if hasattr(armature, "collections"):
+        for collection_name, visible in zip(LOD_COLLECTIONS, (not use_lod, use_lod)):
+            collection = armature.collections.get(collection_name)
+            if collection:
+                collection.is_visible = visible
+    else:
+        for name in full_names:
+            armature.bones[name].hide = use_lod
+        for name in lod_names:
+            if name in armature.bones:
+                armature.bones[name].hide = not use_lod
+
+def update_lod_switch(self, context):
+    """ Apply the LOD switch to every object using the armature. """
+    for obj in bpy.data.objects:
+        if obj.type == 'ARMATURE' and obj.data == self:
+            apply_lod_state(obj)
+
+@persistent
+def lod_render_init(scene, *args):
+    """ Render with the full chains, LOD chains are meant for viewport playback only. """
+    for armature in bpy.data.armatures:
+        if armature.bct_use_lod:
+            armature[LOD_RENDER] = True
+            armature.bct_use_lod = False
+
+@persistent
+def lod_render_done(scene, *args):
+    """ Switch the LOD chains back on after a render. """
+    for armature in bpy.data.armatures:
+        if armature.get(LOD_RENDER):
+            del armature[LOD_RENDER]
+            armature.bct_use_lod = True
+
+LOD_HANDLERS = (
+    (bpy.app.handlers.render_init, lod_render_init),
+    (bpy.app.handlers.render_complete, lod_render_done),
+    (bpy.app.handlers.render_cancel, lod_render_done),
+)
+
+def add_lod_chains(obj, chains, bone_count):
+    """ Build LOD chains for edit bone chains of an armature in edit mode and hook up the switch. """
+    lod_names, links = build_lod_bones(obj.data.edit_bones, chains, bone_count)
+    full_names = [bone.name for chain in chains for bone in chain]
+
+    # Constraints live on the pose bones
+    bpy.ops.object.mode_set(mode='POSE')
+    for full_name, lod_name, head_tail in links:
+        pose_bone = obj.pose.bones[full_name]
+        old_constraint = pose_bone.constraints.get(LOD_CONSTRAINT)
+        if old_constraint:
+            pose_bone.constraints.remove(old_constraint)
+        constraint = pose_bone.constraints.new('DAMPED_TRACK')
+        constraint.name = LOD_CONSTRAINT
+        constraint.target = obj
+        constraint.subtarget = lod_name
+        constraint.head_tail = head_tail
+    assign_lod_collections(obj.data, full_names, lod_names)
+    apply_lod_state(obj)
+    bpy.ops.object.mode_set(mode='EDIT')
+    return len(lod_names)
+
+def create_lod_chains(context, bone_count):
+    obj = context.active_object
+    # Check if an armature is selected and it's in edit mode
+    if not obj or obj.type != 'ARMATURE' or context.mode != 'EDIT_ARMATURE':
+        raise ValueError("No armature selected or not in edit mode.")
+
+    selected_bones = [bone for bone in obj.data.edit_bones if bone.select and not bone.name.startswith((LOD_PREFIX, CONTROL_PREFIX))]
+    if not selected_bones:
+        raise ValueError("No bones selected.")
+
+    chains = get_bone_chains(selected_bones)
+    return len(chains), add_lod_chains(obj, chains, bone_count)
+
+class BONELOD_OT_Create(bpy.types.Operator):
+    """Build reduced LOD chains that drive the selected chains for fast playback"""
+    bl_idname = "bonelod.create"
+    bl_label = "Build LOD Chains"
+    bl_options = {"REGISTER", "UNDO"}    
+    
+    bone_count: bpy.props.IntProperty(
+        name="LOD Bones",
+        default=2,
+        description="Number of bones in each LOD chain",
+        min=1,
+        max=100
+    )
+    
+    def execute(self, context):
+        try:
+            chain_count, bone_total = create_lod_chains(context, bone_count = self.bone_count)
+        except ValueError as e:
+            self.report({'ERROR'}, str(e))
+            return {'CANCELLED'}
+        self.report({'INFO'}, f"Built {bone_total} LOD bones for {chain_count} chains")
+        return {'FINISHED'}
+    
+### ------------------ SPLINE IK TOOLS AND PANEL --------------------------------------------------------   
+
+SPLINE_CONSTRAINT = "BCT Spline IK"
+SPLINE_HOOK = "BCT Hook"
+CONTROL_PREFIX = "CTRL."
+
+def spline_control_name(chain, index):
+    """ Name of a curve control bone of a chain, numbered like the chain itself. """
+    match = NUMBERED_NAME_PATTERN.match(chain[0].name)
+    if match:
+        return f"{CONTROL_PREFIX}{match.group(1)}{int(match.group(2)) + index:0{len(match.group(2))}d}"
+    return f"{CONTROL_PREFIX}{chain[0].name}.{index:03d}"
+
+def spline_curve(name, points, collection, curve_obj=None):
+    """ Fill a curve object with one endpoint NURBS spline through the control points, a new one is created if none is given. """
+    if not curve_obj or curve_obj.type != 'CURVE':
+        curve_obj = bpy.data.objects.new(name, bpy.data.curves.new(name, 'CURVE'))
+        collection.objects.link(curve_obj)
+    curve = curve_obj.data
+    curve.dimensions = '3D'
+    curve.splines.clear()
+    spline = curve.splines.new('NURBS')
+    spline.points.add(len(points) - 1)
+    spline.points.foreach_set("co", np.hstack((points, np.ones((len(points), 1)))).ravel())
+    spline.order_u = min(4, len(points))
+    spline.use_endpoint_u = True
+    return curve_obj
+
+def add_spline_ik(obj, chains, point_count, use_controls):
+    """ Drive edit bone chains of an armature in edit mode with one Spline IK curve each. Returns the curve count. """
+    if point_count < 2:
+        raise ValueError("Spline IK curves need at least two control points.")
+    edit_bones = obj.data.edit_bones
+
+    # Control points of every chain in one resampling pass
+    polylines = [chain_polyline(chain) for chain in chains]
+    controls = resample_polylines(polylines, np.full(len(chains), point_count - 1))
+    chain_names = [[bone.name for bone in chain] for chain in chains]
+
+    control_names = []
+    for chain, points in zip(chains, controls):
+        names = []
+        if use_controls:
+            # Small bones along the chain direction, one per control point
+            size = np.linalg.norm(points[1] - points[0]) / 2
+            for i, point in enumerate(points):
+                direction = points[min(i + 1, len(points) - 1)] - points[max(i - 1, 0)]
+                bone = edit_bones.get(spline_control_name(chain, i)) or edit_bones.new(spline_control_name(chain, i))
+                bone.use_connect = False
+                bone.parent = chain[0].parent
+                bone.head = point
+                bone.tail = point + direction / max(np.linalg.norm(direction), 1e-12) * size
+                bone.use_deform = False
+                names.append(bone.name)
+        control_names.append(names)
+
+    bpy.ops.object.mode_set(mode='POSE')
+    collection = obj.users_collection[0]
+    for names, points, bones in zip(control_names, controls, chain_names):
+        # Reuse the curve of an earlier run, other rigs can have chains with the same names
+        tip = obj.pose.bones[bones[-1]]
+        existing = next((constraint.target for constraint in tip.constraints if constraint.name == SPLINE_CONSTRAINT), None)
+
+        # Curves live in armature space, so they follow the rig
+        curve_obj = spline_curve(f"{obj.name}.{bones[0]}.curve", points, collection, existing)
+        curve_obj.parent = obj
+        curve_obj.matrix_parent_inverse = Matrix.Identity(4)
+        curve_obj.hide_render = True
+
+        for modifier in [modifier for modifier in curve_obj.modifiers if modifier.name.startswith(SPLINE_HOOK)]:
+            curve_obj.modifiers.remove(modifier)
+        for i, name in enumerate(names):
+            hook = curve_obj.modifiers.new(f"{SPLINE_HOOK} {i}", 'HOOK')
+            hook.object = obj
+            hook.subtarget = name
+            hook.vertex_indices_set([i])
+            hook.matrix_inverse = obj.data.bones[name].matrix_local.inverted()
+
+        # One constraint on the tip replaces the per bone constraints of the chain
+        for name in bones:
+            for constraint in list(obj.pose.bones[name].constraints):
+                if constraint.name == SPLINE_CONSTRAINT:
+                    obj.pose.bones[name].constraints.remove(constraint)
+                elif constraint.name != LOD_CONSTRAINT:
+                    constraint.mute = True
+        constraint = obj.pose.bones[bones[-1]].constraints.new('SPLINE_IK')
+        constraint.name = SPLINE_CONSTRAINT
+        constraint.target = curve_obj
+        constraint.chain_count = len(bones)
+        constraint.use_curve_radius = False
+    bpy.ops.object.mode_set(mode='EDIT')
+    return len(chains)
+
+def create_spline_ik(context, point_count, use_controls):
+    obj = context.active_object
+    # Check if an armature is selected and it's in edit mode
+    if not obj or obj.type != 'ARMATURE' or context.mode != 'EDIT_ARMATURE':
+        raise ValueError("No armature selected or not in edit mode.")
+
+    selected_bones = [bone for bone in obj.data.edit_bones if bone.select and not bone.name.startswith((LOD_PREFIX, CONTROL_PREFIX))]
+    if not selected_bones:
+        raise ValueError("No bones selected.")
+
+    return add_spline_ik(obj, get_bone_chains(selected_bones), point_count, use_controls)
+
+class BONESPLINE_OT_Create(bpy.types.Operator):
+    """Drive every selected chain with a Spline IK curve instead of per bone constraints"""
+    bl_idname = "bonespline.create"
+    bl_label = "Spline IK Chains"
+    bl_options = {"REGISTER", "UNDO"}    
+    
+    point_count: bpy.props.IntProperty(
+        name="Control Points",
+        default=4,
+        description="Number of control points of each chain curve",
+        min=2,
+        max=32
+    )
+    
+    use_controls: bpy.props.BoolProperty(
+        name="Control Bones",
+        default=True,
+        description="Add a bone per control point that moves the curve through a hook",
+    )
+    
+    def execute(self, context):
+        try:
+            curves = create_spline_ik(context, point_count = self.point_count, use_controls = self.use_controls)
+        except ValueError as e:
+            self.report({'ERROR'}, str(e))
+            return {'CANCELLED'}
+        self.report({'INFO'}, f"Added Spline IK to {curves} chains")
+        return {'FINISHED'}
+    
+### ------------------ CHAIN LAYOUT EXPORT TOOLS AND PANEL --------------------------------------------------------   
+
+def export_chain_layout(context, filepath):
+    obj = context.active_object
+    # Check if an armature is selected and it's in edit mode
+    if not obj or obj.type != 'ARMATURE' or context.mode != 'EDIT_ARMATURE':
+        raise ValueError("No armature selected or not in edit mode.")
+
+    selected_bones = [bone for bone in obj.data.edit_bones if bone.select]
+    if not selected_bones:
+        raise ValueError("No bones selected.")
+
+    bones = [bone for chain in get_bone_chains(selected_bones) for bone in chain]
+    index = {bone.name: i for i, bone in enumerate(bones)}
+
+    # Constraint summary, enough to rebuild the usual chain setups
+    constraints = []
+    for bone in bones:
+        pose_bone = obj.pose.bones.get(bone.name)
+        entries = []
+        for constraint in (pose_bone.constraints if pose_bone else ()):
+            entry = {"type": constraint.type, "name": constraint.name, "influence": constraint.influence}
+            target = getattr(constraint, "target", None)
+            if target == obj:
+                entry["subtarget"] = constraint.subtarget
+            elif target:
+                entry["target"] = target.name
+            entries.append(entry)
+        constraints.append(entries)
+
+    np.savez_compressed(
+        filepath,
+        names=np.array([bone.name for bone in bones]),
+        heads=np.array([bone.head for bone in bones], dtype=np.float32),
+        tails=np.array([bone.tail for bone in bones], dtype=np.float32),
+        rolls=np.array([bone.roll for bone in bones], dtype=np.float32),
+        parents=np.array([index.get(bone.parent.name, -1) if bone.parent else -1 for bone in bones], dtype=np.int32),
+        parent_names=np.array([bone.parent.name if bone.parent else "" for bone in bones]),
+        connected=np.array([bone.use_connect for bone in bones]),
+        constraints=np.array(json.dumps(constraints)),
+    )
+    return len(bones)
+
+def fit_layout_to_mesh(heads, tails, armature, mesh):
+    """ Uniform scale and offset that fit a layout into a mesh bounding box, in armature space. """
+    to_armature = np.linalg.inv(np.array(armature.matrix_world)) @ np.array(mesh.matrix_world)
+    corners = np.array(mesh.bound_box) @ to_armature[:3, :3].T + to_armature[:3, 3]
+    points = np.concatenate((heads, tails))
+    layout_size = points.max(axis=0) - points.min(axis=0)
+    mesh_size = corners.max(axis=0) - corners.min(axis=0)
+    usable = layout_size > 1e-6
+    scale = (mesh_size[usable] / layout_size[usable]).min() if usable.any() else 1.0
+    offset = (corners.max(axis=0) + corners.min(axis=0)) / 2 - (points.max(axis=0) + points.min(axis=0)) / 2 * scale
+    return scale, offset
+
+def import_chain_layout(context, filepath, scale, fit_to_mesh, replace_existing, import_constraints):
+    obj = context.active_object
+    # Check if an armature is selected and it's in edit mode
+    if not obj or obj.type != 'ARMATURE' or context.mode != 'EDIT_ARMATURE':
+        raise ValueError("No armature selected or not in edit mode.")
+
+    try:
+        with np.load(filepath, allow_pickle=False) as layout:
+            names = [str(name) for name in layout["names"]]
+            heads = layout["heads"].astype(np.float64)
+            tails = layout["tails"].astype(np.float64)
+            rolls = layout["rolls"]
+            parents = layout["parents"]
+            parent_names = layout["parent_names"]
+            connected = layout["connected"]
+            constraints = json.loads(str(layout["constraints"]))
+    except (OSError, ValueError, KeyError) as e:
+        raise ValueError(f"Could not read layout: {e}")
+
+    offset = np.zeros(3)
+    if fit_to_mesh:
+        meshes = [other for other in context.selected_objects if other.type == 'MESH']
+        if not meshes:
+            raise ValueError("Select a mesh to fit the layout to.")
+        fit_scale, offset = fit_layout_to_mesh(heads, tails, obj, meshes[0])
+        scale *= fit_scale
+    heads = heads * scale + offset
+    tails = tails * scale + offset
+
+    # Build every bone in one edit mode pass
+    edit_bones = obj.data.edit_bones
+    bones = []
+    for name, head, tail, roll in zip(names, heads, tails, rolls):
+        bone = edit_bones.get(name) if replace_existing else None
+        if bone is None:
+            bone = edit_bones.new(name)
+        bone.use_connect = False
+        bone.head = head
+        bone.tail = tail
+        bone.roll = float(roll)
+        bones.append(bone)
+
+    for bone, parent, parent_name, is_connected in zip(bones, parents, parent_names, connected):
+        if parent >= 0:
+            bone.parent = bones[parent]
+        else:
+            bone.parent = edit_bones.get(str(parent_name))
+        bone.use_connect = bool(is_connected) and bone.parent is not None
+
+    # Imported bones may have been renamed, constraints follow the new names
+    renamed = {name: bone.name for name, bone in zip(names, bones)}
+    bone_names = list(renamed.values())
+    skipped = 0
+    if import_constraints:
+        bpy.ops.object.mode_set(mode='POSE')
+        try:
+            for bone_name, entries in zip(bone_names, constraints):
+                pose_bone = obj.pose.bones[bone_name]
+                if replace_existing:
+                    for constraint in list(pose_bone.constraints):
+                        pose_bone.constraints.remove(constraint)
+                for entry in entries:
+                    # Constraints on other objects only come back when that object is in this file
+                    target = bpy.data.objects.get(entry["target"]) if "target" in entry else None
+                    if "target" in entry and target is None:
+                        skipped += 1
+                        continue
+                    try:
+                        constraint = pose_bone.constraints.new(entry["type"])
+                    except TypeError:
+                        raise ValueError(f"Unknown constraint type '{entry['type']}' in the layout.")
+                    constraint.name = entry["name"]
+                    constraint.influence = entry["influence"]
+                    if "subtarget" in entry:
+                        constraint.target = obj
+                        constraint.subtarget = renamed.get(entry["subtarget"], entry["subtarget"])
+                    elif target:
+                        constraint.target = target
+        finally:
+            bpy.ops.object.mode_set(mode='EDIT')
+    return len(bone_names), skipped
+
+class BONELAYOUTEXPORT_OT_Create(bpy.types.Operator, ExportHelper):
+    """Export the selected chains to a compact layout file"""
+    bl_idname = "bonelayout.export"
+    bl_label = "Export Chain Layout"
+    
+    filename_ext = ".npz"
+    
+    filter_glob: bpy.props.StringProperty(
+        default="*.npz",
+        options={'HIDDEN'},
+    )
+    
+    def execute(self, context):
+        try:
+            exported = export_chain_layout(context, filepath = self.filepath)
+        except ValueError as e:
+            self.report({'ERROR'}, str(e))
+            return {'CANCELLED'}
+        self.report({'INFO'}, f"Exported {exported} bones")
+        return {'FINISHED'}    
+
+class BONELAYOUTIMPORT_OT_Create(bpy.types.Operator, ImportHelper):
+    """Build chains from a layout file into the active armature"""
+    bl_idname = "bonelayout.import"
+    bl_label = "Import Chain Layout"
+    bl_options = {"REGISTER", "UNDO"}    
+    
+    filename_ext = ".npz"
+    
+    filter_glob: bpy.props.StringProperty(
+        default="*.npz",
+        options={'HIDDEN'},
+    )
+    
+    scale: bpy.props.FloatProperty(
+        name="Scale",
+        default=1.0,
+        description="Scale applied to the layout",
+        min=0.001
+    )
+    
+    fit_to_mesh: bpy.props.BoolProperty(
+        name="Fit To Mesh",
+        default=False,
+        description="Scale and move the layout into the bounding box of the selected mesh",
+    )
+    
+    replace_existing: bpy.props.BoolProperty(
+        name="Replace Existing",
+        default=True,
+        description="Update bones with the same name instead of adding new ones",
+    )
+    
+    import_constraints: bpy.props.BoolProperty(
+        name="Constraints",
+        default=True,
+        description="Rebuild the constraints stored in the layout",
+    )
+    
+    def execute(self, context):
+        try:
+            imported, skipped = import_chain_layout(context, filepath = self.filepath, scale = self.scale, fit_to_mesh = self.fit_to_mesh, replace_existing = self.replace_existing, import_constraints = self.import_constraints)
+        except ValueError as e:
+            self.report({'ERROR'}, str(e))
+            return {'CANCELLED'}
+        if skipped:
+            self.report({'WARNING'}, f"Imported {imported} bones, skipped {skipped} constraints whose target object is not in this file")
+        else:
+            self.report({'INFO'}, f"Imported {imported} bones")
+        return {'FINISHED'}    
+    
+### ------------------ ROLL ALIGN TOOLS AND PANEL --------------------------------------------------------   
+
+def bone_roll_align(context):
+    obj = context.active_object
+    # Check if an armature is selected and it's in edit mode
+    if not obj or obj.type != 'ARMATURE' or context.mode != 'EDIT_ARMATURE':
+        raise ValueError("No armature selected or not in edit mode.")
+    if not obj.data.edit_bones.active:
+        raise ValueError("No active bone to take the roll from.")
+
+    active_bone = obj.data.edit_bones.active
+    active_roll = active_bone.roll
+
+    for bone in obj.data.edit_bones:
+        if bone.select and bone != active_bone:
+            bone.roll = active_roll
+
+class BONEROLL_OT_Create(bpy.types.Operator):
+    """Align roll of inactive bones to active bone"""
+    bl_idname = "boneroll.create"
+    bl_label = "Align Bone roll"
+    bl_options = {"REGISTER", "UNDO"}    
+    
+    
+    def execute(self, context):
+        try:
+            bone_roll_align(context)
+        except ValueError as e:
+            self.report({'ERROR'}, str(e))
+            return {'CANCELLED'}
+        return {'FINISHED'}     
+           
+### ------------------ SURFACE ROLL TOOLS AND PANEL --------------------------------------------------------   
+
+def chain_index_layout(chains):
+    """ Padded (chains, bones) index table into the flattened chain order plus a validity mask. """
+    sizes = np.array([len(chain) for chain in chains])
+    starts = np.cumsum(sizes) - sizes
+    columns = np.arange(sizes.max())
+    layout = starts[:, None] + np.minimum(columns[None, :], sizes[:, None] - 1)
+    return layout, columns[None, :] < sizes[:, None]
+
+def surface_roll_axes(y_axes, normals, fallback, axis, invert, layout, valid):
+    """ Target Z axes that turn each bone's chosen axis towards the surface without flips inside a chain. """
+    # Project the normals onto the plane perpendicular to each bone
+    normals = normals - y_axes * np.einsum("ij,ij->i", normals, y_axes)[:, None]
+    length = np.linalg.norm(normals, axis=1)
+    normals = np.where((length > 1e-6)[:, None], normals / np.maximum(length, 1e-12)[:, None], fallback)
+
+    targets = np.cross(normals, y_axes) if axis == 'X' else normals
+    if invert:
+        targets = -targets
+
+    # Keep neighbours in the same hemisphere, then face the side most bones agree on
+    padded = targets[layout]
+    flips = (np.einsum("cbi,cbi->cb", padded[:, 1:], padded[:, :-1]) < 0) & valid[:, 1:]
+    signs = np.concatenate((np.ones((len(layout), 1)), np.cumprod(np.where(flips, -1.0, 1.0), axis=1)), axis=1)
+    signs *= np.where((signs * valid).sum(axis=1) < 0, -1.0, 1.0)[:, None]
+    return (padded * signs[..., None])[valid]
+
+def solve_surface_rolls(context, axis, invert):
+    obj = context.active_object
+    # Check if an armature is selected and it's in edit mode
+    if not obj or obj.type != 'ARMATURE' or context.mode != 'EDIT_ARMATURE':
+        raise ValueError("No armature selected or not in edit mode.")
+
+    surfaces = [other for other in context.selected_objects if other.type == 'MESH']
+    if not surfaces:
+        raise ValueError("Select the surface mesh together with the armature.")
+    surface = surfaces[0]
+
+    selected_bones = [bone for bone in obj.data.edit_bones if bone.select]
+    if not selected_bones:
+        raise ValueError("No bones selected.")
+
+    chains = get_bone_chains(selected_bones)
+    bones = [bone for chain in chains for bone in chain]
+    heads = np.array([bone.head for bone in bones])
+    tails = np.array([bone.tail for bone in bones])
+    y_axes = (tails - heads) / np.maximum(np.linalg.norm(tails - heads, axis=1, keepdims=True), 1e-12)
+
+    # Bone midpoints in the local space of the surface
+    to_mesh = np.linalg.inv(np.array(surface.matrix_world)) @ np.array(obj.matrix_world)
+    midpoints = (heads + tails) / 2 @ to_mesh[:3, :3].T + to_mesh[:3, 3]
+
+    tree = BVHTree.FromObject(surface, context.evaluated_depsgraph_get())
+    normals = np.zeros((len(bones), 3))
+    for index, co in enumerate(midpoints):
+        normal = tree.find_nearest(Vector(co))[1]
+        if normal is not None:
+            normals[index] = normal
+
+    # Normals back to armature space use the inverse transpose
+    normals = normals @ to_mesh[:3, :3]
+    fallback = np.array([bone.z_axis for bone in bones])
+    layout, valid = chain_index_layout(chains)
+    targets = surface_roll_axes(y_axes, normals, fallback, axis, invert, layout, valid)
+
+    for bone, target in zip(bones, targets):
+        bone.align_roll(Vector(target))
+    return len(bones)
+
+class BONESURFACEROLL_OT_Create(bpy.types.Operator):
+    """Roll the selected bones so they face the surface of the selected mesh"""
+    bl_idname = "bonesurfaceroll.create"
+    bl_label = "Roll To Surface"
+    bl_options = {"REGISTER", "UNDO"}    
+    
+    axis: bpy.props.EnumProperty(
+        name="Axis",
+        items=[
+            ('Z', "Z", "Point the bone Z axis along the surface normal"),
+            ('X', "X", "Point the bone X axis along the surface normal"),
+        ],
+        default='Z',
+        description="Bone axis facing the surface",
+    )
+    
+    invert: bpy.props.BoolProperty(
+        name="Invert",
+        default=False,
+        description="Face away from the surface",
+    )
+    
+    def execute(self, context):
+        try:
+            solve_surface_rolls(context, axis = self.axis, invert = self.invert)
+        except ValueError as e:
+            self.report({'ERROR'}, str(e))
+            return {'CANCELLED'}
+        return {'FINISHED'}     
+           
+### ------------------ AUTO WEIGHT TOOLS AND PANEL --------------------------------------------------------   
+
+def nearest_segment_indices(points, heads, tails):
+    """ Index of the closest segment for every point. """
+    seg = tails - heads
+    length_sq = np.maximum(np.einsum("ij,ij->i", seg, seg), 1e-12)
+    nearest = np.empty(len(points), dtype=np.int64)
+    step = max(1, 2000000 // max(len(heads), 1))
+    for start in range(0, len(points), step):
+        p = points[start:start + step, None, :]
+        t = np.clip(np.einsum("pbi,bi->pb", p - heads, seg) / length_sq, 0.0, 1.0)
+        dist = np.linalg.norm(p - (heads + seg * t[..., None]), axis=2)
+        nearest[start:start + step] = np.argmin(dist, axis=1)
+    return nearest
+
+def nearest_island_segments(points, point_labels, heads, tails, bone_islands):
+    """ Index of the closest segment on the same island for every point, any segment for islands without one.
+
+    Points are grouped by island so only the segments of that island are measured.
+    """
+    nearest = np.empty(len(points), dtype=np.int64)
+    order = np.argsort(point_labels, kind="stable")
+    islands, starts = np.unique(point_labels[order], return_index=True)
+    ends = np.append(starts[1:], len(order))
+    homeless = []
+    for island, start, end in zip(islands, starts, ends):
+        candidates = np.flatnonzero(bone_islands == island)
+        if not len(candidates):
+            homeless.append(order[start:end])
+            continue
+        group = order[start:end]
+        nearest[group] = candidates[nearest_segment_indices(points[group], heads[candidates], tails[candidates])]
+    if homeless:
+        group = np.concatenate(homeless)
+        nearest[group] = nearest_segment_indices(points[group], heads, tails)
+    return nearest
+
+def points_in_spheres(points, centers, radii):
+    """ Every (point, sphere) index pair with the point inside the sphere.
+
+    Points are sorted into a uniform grid by cell key. Each sphere covers a block of cells whose
+    rows along X are contiguous key ranges, so one searchsorted finds the candidates of all spheres.
+    """
+    low = points.min(axis=0)
+    extent = (points.max(axis=0) - low).max()
+    cell = max(float(np.median(radii)), extent / 1000, 1e-9)
+    grid = np.floor((points - low) / cell).astype(np.int64)
+    size = grid.max(axis=0) + 1
+    keys = (grid[:, 2] * size[1] + grid[:, 1]) * size[0] + grid[:, 0]
+    order = np.argsort(keys, kind="stable")
+    keys = keys[order]
+
+    first = np.clip(np.floor((centers - radii[:, None] - low) / cell).astype(np.int64), 0, size - 1)
+    last = np.clip(np.floor((centers + radii[:, None] - low) / cell).astype(np.int64), 0, size - 1)
+    rows_y = last[:, 1] - first[:, 1] + 1
+    rows = rows_y * (last[:, 2] - first[:, 2] + 1)
+    sphere = np.repeat(np.arange(len(centers)), rows)
+    local = np.arange(rows.sum()) - np.repeat(np.cumsum(rows) - rows, rows)
+    row_key = ((first[sphere, 2] + local // rows_y[sphere]) * size[1] + first[sphere, 1] + local % rows_y[sphere]) * size[0]
+    lo = np.searchsorted(keys, row_key + first[sphere, 0], side='left')
+    hi = np.searchsorted(keys, row_key + last[sphere, 0], side='right')
+
+    counts = hi - lo
+    pair_spheres = np.repeat(sphere, counts)
+    pair_points = order[np.repeat(lo - (np.cumsum(counts) - counts), counts) + np.arange(counts.sum())]
+    offset = points[pair_points] - centers[pair_spheres]
+    inside = np.einsum("ij,ij->i", offset, offset) <= radii[pair_spheres] ** 2
+    return pair_points[inside], pair_spheres[inside]
+
+def nearest_points(points, targets, pair_points, pair_targets):
+    """ Index of the closest point to every target, from candidate pairs, by brute force for targets without any. """
+    dist = np.linalg.norm(points[pair_points] - targets[pair_targets], axis=1)
+    order = np.lexsort((dist, pair_targets))
+    found, first = np.unique(pair_targets[order], return_index=True)
+    nearest = np.full(len(targets), -1, dtype=np.int64)
+    nearest[found] = pair_points[order[first]]
+    for target in np.flatnonzero(nearest < 0):
+        nearest[target] = np.argmin(np.linalg.norm(points - targets[target], axis=1))
+    return nearest
+
+def chain_islands(labels, chains, nearest):
+    """ Find the mesh island each chain sits on by majority vote over the vertices nearest to its bones. """
+    bone_islands = np.empty(len(nearest), dtype=np.int64)
+    bone_index = 0
+    for chain in chains:
+        votes = labels[nearest[bone_index:bone_index + len(chain)]]
+        bone_islands[bone_index:bone_index + len(chain)] = np.bincount(votes).argmax()
+        bone_index += len(chain)
+    return bone_islands
+
+def weight_mesh(obj, bone_names, heads, tails, chains, reach, falloff, max_influences, use_islands, weight_steps):
+    """ Compute and write distance based weights of one mesh object, returns the weighted vertex count. """
+    mesh = obj.data
+    coords = mesh_vertex_coords(mesh, obj.matrix_world)
+    num_verts = len(coords)
+    if not num_verts:
+        return 0
+
+    # Candidate vertex/bone pairs from a range query around every bone, all bones at once
+    centers = (heads + tails) / 2
+    verts, bones = points_in_spheres(coords, centers, reach)
+
+    if use_islands:
+        # Prefer the island clusters stored by Build Hair Rig, they match its bones
+        fingerprint = mesh_fingerprint(mesh)
+        labels = read_cluster_labels(mesh, fingerprint)
+        if labels is None:
+            analysis = read_island_cache(mesh, fingerprint)
+            labels = analysis[0] if analysis else connected_components(num_verts, mesh_edge_indices(mesh))
+        bone_islands = chain_islands(labels, chains, nearest_points(coords, centers, verts, bones))
+        keep = labels[verts] == bone_islands[bones]
+        verts, bones = verts[keep], bones[keep]
+
+    dist = segment_distances(coords[verts], heads[bones], tails[bones])
+    weights = 1.0 / np.power(dist + 1e-4, falloff)
+
+    # Keep the strongest influences per vertex
+    order = np.lexsort((-weights, verts))
+    verts, bones, weights = verts[order], bones[order], weights[order]
+    rank = np.arange(len(verts)) - np.searchsorted(verts, verts)
+    keep = rank < max_influences
+    verts, bones, weights = verts[keep], bones[keep], weights[keep]
+
+    # Vertices out of reach of every bone go fully to the nearest one
+    orphans = np.setdiff1d(np.arange(num_verts), verts)
+    if len(orphans):
+        if use_islands:
+            nearest = nearest_island_segments(coords[orphans], labels[orphans], heads, tails, bone_islands)
+        else:
+            nearest = nearest_segment_indices(coords[orphans], heads, tails)
+        verts = np.concatenate((verts, orphans))
+        bones = np.concatenate((bones, nearest))
+        weights = np.concatenate((weights, np.ones(len(orphans))))
+
+    totals = np.bincount(verts, weights=weights, minlength=num_verts)
+    steps = np.round(weights / totals[verts] * weight_steps).astype(np.int64)
+    keep = steps > 0
+    verts, bones, steps = verts[keep], bones[keep], steps[keep]
+
+    # Write one batch per bone and weight value
+    order = np.lexsort((steps, bones))
+    verts, bones, steps = verts[order], bones[order], steps[order]
+    keys = bones * (weight_steps + 1) + steps
+    _, starts = np.unique(keys, return_index=True)
+    ends = np.append(starts[1:], len(keys))
+
+    groups = {}
+    for name in bone_names:
+        group = obj.vertex_groups.get(name)
+        if group:
+            obj.vertex_groups.remove(group)
+        groups[name] = obj.vertex_groups.new(name=name)
+    for start, end in zip(starts, ends):
+        group = groups[bone_names[bones[start]]]
+        group.add(verts[start:end].tolist(), steps[start] / weight_steps, 'REPLACE')
+
+    return num_verts
+
+#Automatically recalculates weight for selected bones
+def re_weight(context, bone_reach, falloff, max_influences, use_islands, weight_steps):
+    armature = context.active_object
+    if not armature or armature.type != 'ARMATURE':
+        raise ValueError("Active object must be an armature.")
+
+    meshes = [obj for obj in context.selected_objects if obj.type == 'MESH']
+    if not meshes:
+        raise ValueError("Select the mesh objects to weight together with the armature.")
+    if any(obj.mode == 'EDIT' for obj in meshes):
+        raise ValueError("Meshes must not be in edit mode.")
+
+    if armature.mode == 'EDIT':
+        armature.update_from_editmode()
+
+    selected_bones = [bone for bone in armature.data.bones if bone.select]
+    if not selected_bones:
+        raise ValueError("No bones selected.")
+
+    chains = get_bone_chains(selected_bones)
+    ordered_bones = [bone for chain in chains for bone in chain]
+    bone_names = [bone.name for bone in ordered_bones]
+
+    mat = np.array(armature.matrix_world)
+    heads = np.array([bone.head_local for bone in ordered_bones]) @ mat[:3, :3].T + mat[:3, 3]
+    tails = np.array([bone.tail_local for bone in ordered_bones]) @ mat[:3, :3].T + mat[:3, 3]
+    lengths = np.linalg.norm(tails - heads, axis=1)
+    reach = lengths * (0.5 + bone_reach)
+
+    weighted = 0
+    for obj in meshes:
+        weighted += weight_mesh(obj, bone_names, heads, tails, chains, reach, falloff, max_influences, use_islands, weight_steps)
+
+        if not any(mod.type == 'ARMATURE' and mod.object == armature for mod in obj.modifiers):
+            mod = obj.modifiers.new("Armature", 'ARMATURE')
+            mod.object = armature
+
+    return weighted
+
+class BONEWEIGHT_OT_Create(bpy.types.Operator):
+    """Weight selected meshes to the selected chain bones by distance"""
+    bl_idname = "reweight.create"
+    bl_label = "Auto Weight"
+    bl_options = {"REGISTER", "UNDO"}    
+    
+    bone_reach: bpy.props.FloatProperty(
+        name="Bone Reach",
+        default=1.0,
+        description="How far each bone reaches, relative to its length",
+        min=0.01,
+        max=10.0
+    )
+    
+    falloff: bpy.props.FloatProperty(
+        name="Falloff",
+        default=2.0,
+        description="Power of the distance falloff, higher values give harder weights",
+        min=0.1,
+        max=8.0
+    )
+    
+    max_influences: bpy.props.IntProperty(
+        name="Max Influences",
+        default=4,
+        description="Maximum number of bones influencing one vertex",
+        min=1,
+        max=8
+    )
+    
+    use_islands: bpy.props.BoolProperty(
+        name="Restrict To Islands",
+        default=True,
+        description="Only let chains influence the mesh island they sit on",
+    )
+    
+    weight_steps: bpy.props.IntProperty(
+        name="Weight Precision",
+        default=100,
+        description="Number of weight steps, weights are written in batches per step",
+        min=10,
+        max=1000
+    )
+    
+    def execute(self, context):
+        try:
+            weighted = re_weight(context, bone_reach=self.bone_reach, falloff=self.falloff, max_influences=self.max_influences, use_islands=self.use_islands, weight_steps=self.weight_steps)
+        except ValueError as e:
+            self.report({'ERROR'}, str(e))
+            return {'CANCELLED'}
+        self.report({'INFO'}, f"Weighted {weighted} vertices")
+        return {'FINISHED'}     
+
+### ------------------ DIRECTION TOOLS AND PANEL --------------------------------------------------------   
+
+def switch_chain(context):
+    
+    obj = context.active_object
+    # Check if an armature is selected and it's in edit mode
+    if not obj or obj.type != 'ARMATURE' or context.mode != 'EDIT_ARMATURE':
+        raise ValueError("No armature selected or not in edit mode.")
+        
+    armature = context.active_object
+    if not armature or armature.type != 'ARMATURE':
+        print("No armature selected.")
+        return
+
+    bpy.ops.object.mode_set(mode='EDIT')
+
+    bones = armature.data.edit_bones
+    selected_bones = [bone for bone in bones if bone.select]
+    if not selected_bones:
+        print("No bones selected.")
+        return
+    
+    # Identify the first bone in the chain
+    first_bone = None
+    for bone in selected_bones:
+        if not bone.parent or bone.parent not in selected_bones:
+            first_bone = bone
+            break
+
+    # Identify the last bone in the chain
+    last_bone = None
+    for bone in selected_bones:
+        if not any(child in selected_bones for child in bone.children):
+            last_bone = bone
+            break
+
+    if not first_bone or not last_bone:
+        print("Could not determine the first or last bone in the chain.")
+        return
+
+    # Store the parent of the first bone
     first_bone_parent = first_bone.parent
     
-    # Switch the direction of the selected bone chain
-    bpy.ops.armature.switch_direction()
-
-    # Re-parent the new last bone (previously the first bone) to the stored parent
-    new_last_bone = bones[last_bone.name]  # Refresh the reference
-    new_last_bone.parent = first_bone_parent
-    new_last_bone.use_connect = False 
+    # Switch the direction of the selected bone chain
+    bpy.ops.armature.switch_direction()
+
+    # Re-parent the new last bone (previously the first bone) to the stored parent
+    new_last_bone = bones[last_bone.name]  # Refresh the reference
+    new_last_bone.parent = first_bone_parent
+    new_last_bone.use_connect = False 
+    
+class SWITCHCHAIN_OT_Create(bpy.types.Operator):
+    """Switch the direction of the selected bone chain and adjust parent"""
+    bl_idname = "switch.create"
+    bl_label = "Switch Chain Direction"
+    bl_options = {"REGISTER", "UNDO"}    
+    
+    
+    def execute(self, context):
+        try:
+            switch_chain(context)
+        except ValueError as e:
+            self.report({'ERROR'}, str(e))
+            return {'CANCELLED'}
+        return {'FINISHED'}     
+           
+### ------------------ AUTO ALIGN TOOLS AND PANEL --------------------------------------------------------   
+
+#Automatically aligns selected bones
+def re_align(context):
+    obj = context.active_object
+    # Check if an armature is selected and it's in edit mode
+    if not obj or obj.type != 'ARMATURE' or context.mode != 'EDIT_ARMATURE':
+        raise ValueError("No armature selected or not in edit mode.")
+        
+    for eb in context.selected_editable_bones:
+        parent = eb        
+        v = (eb.tail - eb.head).normalized()
+
+        while len(parent.children):
+            bone = parent.children[0]
+            bone.head = parent.tail
+            bone.tail = parent.tail + bone.length * v
+            parent = bone
+
+class BONEALIGN_OT_Create(bpy.types.Operator):
+    """Align the bones based on the rotation of the first bone in the chain"""
+    bl_idname = "align.create"
+    bl_label = "Auto Align"
+    bl_options = {"REGISTER", "UNDO"}    
+    
+    
+    def execute(self, context):
+        try:
+            re_align(context)
+        except ValueError as e:
+            self.report({'ERROR'}, str(e))
+            return {'CANCELLED'}
+        return {'FINISHED'}     
+        
+### ------------------ KEY ALl TOOLS AND PANEL --------------------------------------------------------   
+
+def has_keyframe(action, bone_name, frame):
+    for fcurve in action.fcurves:
+        if bone_name in fcurve.data_path:
+            for keyframe_point in fcurve.keyframe_points:
+                if int(keyframe_point.co.x) == frame:
+                    return True
+    return False
+
+def mark_keyframe_as_breakdown(action, bone_name, frame):
+    for fcurve in action.fcurves:
+        if bone_name in fcurve.data_path:
+            for keyframe_point in fcurve.keyframe_points:
+                if int(keyframe_point.co.x) == frame:
+                    keyframe_point.type = 'BREAKDOWN'
+
+def clear_pose_bone(pose_bone):
+    """ Put the transform channels of one pose bone back to rest. """
+    pose_bone.location = (0.0, 0.0, 0.0)
+    pose_bone.rotation_quaternion = (1.0, 0.0, 0.0, 0.0)
+    pose_bone.rotation_euler = (0.0, 0.0, 0.0)
+    pose_bone.rotation_axis_angle = (0.0, 0.0, 1.0, 0.0)
+    pose_bone.scale = (1.0, 1.0, 1.0)
+
+def key_all_steps(context, use_custom, use_range, range_start, range_end, should_skip, skip_frame, clean_keys=False, clean_tolerance=0.001):
+    """ Step generator of key_all, yields (done, total) frames. """
+    obj = context.active_object
+
+    # Ensure armature is selected, we are in pose mode, and there are selected bones
+    if not obj or obj.type != 'ARMATURE' or context.mode != 'POSE' or not context.selected_pose_bones:
+        raise ValueError("An armature must be selected, in pose mode, with selected bones.")
+
+    action = obj.animation_data.action if obj.animation_data else None
+    if not action:
+        raise ValueError("No action found for the armature.")
+
+    scene = context.scene
+    frame_start = range_start if use_range else scene.frame_start
+    frame_end = range_end if use_range else scene.frame_end
+    frames = [frame for frame in range(frame_start, frame_end + 1) if not (should_skip and frame % skip_frame != 0)]
+    # The context is not valid between steps, keep what is needed
+    pose_bones = list(context.selected_pose_bones)
+    current_frame = scene.frame_current
+    yield 0, len(frames)
+
+    # Finishing, failing or being cancelled all return to the frame the run started on
+    try:
+        for index, frame in enumerate(frames):
+            scene.frame_set(frame)
+
+            for bone in pose_bones:
+                bone_name = f'pose.bones["{bone.name}"]'
+                key_needed = not has_keyframe(action, bone_name, frame)
+
+                if key_needed:
+                    clear_pose_bone(bone)
+                    bone.keyframe_insert(data_path="location", frame=frame, group=bone.name)
+                    bone.keyframe_insert(data_path="scale", frame=frame, group=bone.name)
+                    bone.keyframe_insert(data_path="rotation_euler", frame=frame, group=bone.name)
+                    bone.keyframe_insert(data_path="rotation_quaternion", frame=frame, group=bone.name)
+                    mark_keyframe_as_breakdown(action, bone_name, frame)
+
+                # Keying custom properties if needed
+                if use_custom:
+                    for prop in bone.keys():
+                        if key_needed:
+                            bone.keyframe_insert(data_path=f'["{prop}"]', frame=frame, group=bone.name)
+                            mark_keyframe_as_breakdown(action, bone_name, frame)
+            yield index + 1, len(frames)
+    finally:
+        scene.frame_set(current_frame)
+
+    # Collapse static channels and decimate the generated breakdown keys
+    if clean_keys:
+        clean_fcurves(bone_fcurves(action, pose_bones), clean_tolerance, decimate=True)
+
+def key_all(context, use_custom, use_range, range_start, range_end, should_skip, skip_frame, clean_keys=False, clean_tolerance=0.001):
+    run_steps(key_all_steps(context, use_custom, use_range, range_start, range_end, should_skip, skip_frame, clean_keys, clean_tolerance))
+
+class KEYALL_OT_Create(TimeSlicedOperator, bpy.types.Operator):
+    """Keys bones on all frames and resets thier transforms if there is no keyframe, useful for tweakers"""
+    bl_idname = "keyall.create"
+    bl_label = "Auto Key All Non Keyed"
+    bl_options = {"REGISTER", "UNDO"}    
+
+    use_custom: bpy.props.BoolProperty(
+        name="Key Custom Properties",
+        default=False,
+        description="Key Custom Properties",
+        )
+        
+    use_range: bpy.props.BoolProperty(
+        name="Use Key Range",
+        default=False,
+        description="Key Only In Defined Range",
+        )
+    
+    range_start: bpy.props.IntProperty(
+        name="Start", 
+        default=1,
+        description="Range Beginning",
+        )
+        
+    range_end: bpy.props.IntProperty(
+        name="End",
+        default=250,
+        description="Range End",
+        )
+        
+    should_skip: bpy.props.BoolProperty(
+        name="Custom Skip",
+        default=True,
+        description="Creates a gap between frames",
+        )
+
+    skip_frame: bpy.props.IntProperty(
+        name="Skip Frames",
+        default=2,
+        max = 10,
+        min = 0,
+        description="How many frames to gap between frames",
+        )
+    
+    clean_keys: bpy.props.BoolProperty(
+        name="Clean Keys",
+        default=False,
+        description="Remove generated breakdown keys that do not change the curves",
+        )
+    
+    clean_tolerance: bpy.props.FloatProperty(
+        name="Tolerance",
+        default=0.001,
+        min = 0.0,
+        precision = 4,
+        description="Maximum value error allowed when removing keys",
+        )
+    
+    def draw(self, context):
+        layout = self.layout
+        
+        layout.label(text = "Auto Key Settings", icon="MODIFIER_DATA")
+    
+        layout.prop(self, "use_custom")
+        
+        layout.separator(factor=2)
+        layout.label(text = "Custom Range Settings", icon="ARROW_LEFTRIGHT")
+        box = layout.box()
+        row = box.row()
+        row.prop(self, "use_range")
+        if self.use_range == True:
+            row = box.row()
+            row.prop(self, "range_start")
+            row.prop(self, "range_end")
+        row = box.row()
+        row.prop(self, "should_skip")   
+        if self.should_skip == True:
+            row = box.row()
+            row.prop(self, "skip_frame")
+        
+        layout.separator(factor=2)
+        layout.label(text = "Cleanup Settings", icon="IPO_LINEAR")
+        box = layout.box()
+        row = box.row()
+        row.prop(self, "clean_keys")
+        if self.clean_keys == True:
+            row = box.row()
+            row.prop(self, "clean_tolerance")
+    
+    def make_steps(self, context):
+        return key_all_steps(context, use_custom = self.use_custom, use_range = self.use_range, range_start = self.range_start, range_end = self.range_end, should_skip = self.should_skip, skip_frame = self.skip_frame, clean_keys = self.clean_keys, clean_tolerance = self.clean_tolerance)
+    
+    def finished(self, result):
+        return {'FINISHED'}    
+          
+### ------------------ KEY CLEANUP TOOLS AND PANEL --------------------------------------------------------   
+
+# Keyframe point properties copied when a curve is rewritten
+KEYFRAME_ATTRS = (
+    ("co", 2, np.float32),
+    ("handle_left", 2, np.float32),
+    ("handle_right", 2, np.float32),
+    ("interpolation", 1, np.int32),
+    ("easing", 1, np.int32),
+    ("back", 1, np.float32),
+    ("amplitude", 1, np.float32),
+    ("period", 1, np.float32),
+    ("type", 1, np.int32),
+    ("handle_left_type", 1, np.int32),
+    ("handle_right_type", 1, np.int32),
+)
+
+def bone_fcurves(action, pose_bones):
+    """ All fcurves of an action that animate the given pose bones. """
+    prefixes = tuple(f'{pb.path_from_id()}{sep}' for pb in pose_bones for sep in ".[")
+    return [fcurve for fcurve in action.fcurves if fcurve.data_path.startswith(prefixes)]
+
+def read_keyframe_points(fcurve):
+    """ Read every keyframe point property of an fcurve into arrays. """
+    points = fcurve.keyframe_points
+    data = {}
+    for attr, size, dtype in KEYFRAME_ATTRS:
+        values = np.empty(len(points) * size, dtype=dtype)
+        points.foreach_get(attr, values)
+        data[attr] = values.reshape(-1, size) if size > 1 else values
+    return data
+
+def rewrite_keyframe_points(fcurve, data, keep):
+    """ Replace the keys of an fcurve with the kept subset of previously read key data. """
+    points = fcurve.keyframe_points
+    points.clear()
+    points.add(int(np.count_nonzero(keep)))
+    for attr, size, dtype in KEYFRAME_ATTRS:
+        points.foreach_set(attr, np.ascontiguousarray(data[attr][keep]).ravel())
+    fcurve.update()
+
+def decimate_keys(frames, values, locked, tolerance):
+    """ Error bounded (RDP style) key reduction, returns a mask of the keys to keep.
+
+    Every pass splits all segments at once at their worst point until no key deviates more
+    than tolerance from the line between its kept neighbours. Locked keys are always kept.
+    """
+    keep = locked.copy()
+    keep[0] = keep[-1] = True
+    points = np.arange(len(frames))
+    while True:
+        kept = np.flatnonzero(keep)
+        segment = np.minimum(np.searchsorted(kept, points, side='right') - 1, len(kept) - 2)
+        start, end = kept[segment], kept[segment + 1]
+        t = (frames - frames[start]) / np.maximum(frames[end] - frames[start], 1e-9)
+        error = np.abs(values - (values[start] + (values[end] - values[start]) * t))
+        error[keep] = 0.0
+
+        # Worst point of every segment
+        order = np.lexsort((-error, segment))
+        worst = order[np.r_[True, segment[order][1:] != segment[order][:-1]]]
+        worst = worst[error[worst] > tolerance]
+        if not len(worst):
+            return keep
+        keep[worst] = True
+
+def clean_fcurves(fcurves, tolerance, decimate):
+    """ Collapse static curves and decimate the rest, only breakdown keys are removed. """
+    breakdown = bpy.types.Keyframe.bl_rna.properties["type"].enum_items["BREAKDOWN"].value
+    removed = 0
+    for fcurve in fcurves:
+        count = len(fcurve.keyframe_points)
+        if count < 2:
+            continue
+
+        data = read_keyframe_points(fcurve)
+        frames = data["co"][:, 0].astype(np.float64)
+        values = data["co"][:, 1].astype(np.float64)
+        locked = data["type"] != breakdown
+
+        if np.ptp(values) <= tolerance:
+            keep = locked.copy()
+            keep[0] = True
+        elif decimate:
+            keep = decimate_keys(frames, values, locked, tolerance)
+        else:
+            continue
+
+        if keep.all():
+            continue
+        rewrite_keyframe_points(fcurve, data, keep)
+        removed += count - int(np.count_nonzero(keep))
+    return removed
+
+def clean_keys(context, tolerance, decimate):
+    obj = context.active_object
+    if not obj or obj.type != 'ARMATURE':
+        raise ValueError("No armature selected")
+
+    action = obj.animation_data.action if obj.animation_data else None
+    if not action:
+        raise ValueError("No action found for the armature.")
+
+    # Clean the selected bones in pose mode, otherwise the whole action
+    if context.mode == 'POSE' and context.selected_pose_bones:
+        fcurves = bone_fcurves(action, context.selected_pose_bones)
+    else:
+        fcurves = list(action.fcurves)
+    return clean_fcurves(fcurves, tolerance, decimate)
+
+class KEYCLEAN_OT_Create(bpy.types.Operator):
+    """Collapse static channels and decimate generated breakdown keys"""
+    bl_idname = "keyclean.create"
+    bl_label = "Clean Generated Keys"
+    bl_options = {"REGISTER", "UNDO"}    
+
+    tolerance: bpy.props.FloatProperty(
+        name="Tolerance",
+        default=0.001,
+        min = 0.0,
+        precision = 4,
+        description="Maximum value error allowed when removing keys",
+        )
+    
+    decimate: bpy.props.BoolProperty(
+        name="Decimate",
+        default=True,
+        description="Also remove breakdown keys from animated channels, not only static ones",
+        )
+    
+    def execute(self, context):
+        try:
+            removed = clean_keys(context, tolerance = self.tolerance, decimate = self.decimate)
+        except ValueError as e:
+            self.report({'ERROR'}, str(e))
+            return {'CANCELLED'}
+        self.report({'INFO'}, f"Removed {removed} keys")
+        return {'FINISHED'}    
+          
+### ------------------ PHASE PROPAGATION TOOLS AND PANEL --------------------------------------------------------   
+
+# Rest values of bone channels, amplitude falloff scales the animation around them (others rest at 0)
+CHANNEL_REST = {"rotation_quaternion": (1.0, 0.0, 0.0, 0.0), "rotation_axis_angle": (0.0, 0.0, 1.0, 0.0), "scale": (1.0, 1.0, 1.0)}
+
+def chain_order_key(chain):
+    """ Sort key of a chain from its [name.a.000] style name, other chains sort by their root name. """
+    match = CHAIN_NAME_PATTERN.match(chain[0].name)
+    return (match.group(1), match.group(2)) if match else (chain[0].name, "")
+
+def chain_phase_steps(count, source, direction, ring):
+    """ Number of chains between the source and every chain, around the ring or along the row of chains. """
+    if not ring:
+        return np.abs(np.arange(count) - source)
+    steps = (np.arange(count) - source) % count
+    if direction == 'BOTH':
+        steps = np.minimum(steps, count - steps)
+    return steps
+
+def propagate_phase(context, frame_offset, falloff, direction):
+    obj = context.active_object
+
+    # Ensure armature is selected, we are in pose mode, and there are selected bones
+    if not obj or obj.type != 'ARMATURE' or context.mode != 'POSE' or not context.selected_pose_bones:
+        raise ValueError("An armature must be selected, in pose mode, with selected bones.")
+
+    action = obj.animation_data.action if obj.animation_data else None
+    if not action:
+        raise ValueError("No action found for the armature.")
+
+    active = context.active_pose_bone
+    if not active or not active.bone.select:
+        raise ValueError("The active bone must be part of the selected source chain.")
+
+    chains = sorted(get_bone_chains(context.selected_pose_bones), key=chain_order_key)
+    if len(chains) < 2:
+        raise ValueError("Select the source chain and at least one target chain.")
+    source = next(index for index, chain in enumerate(chains) if active.name in {pb.name for pb in chain})
+    # Only skirt chains close into a ring, other chains such as hair are a row with two ends
+    ring = all(SKIRT_BONE_PATTERN.match(chain[0].name) for chain in chains)
+    steps = chain_phase_steps(len(chains), source, direction, ring)
+
+    # Read every curve of the source chain once
+    source_chain = chains[source]
+    source_curves = []
+    for pb in source_chain:
+        prefix = pb.path_from_id()
+        source_curves.append([(fcurve.data_path[len(prefix):], fcurve.array_index, read_keyframe_points(fcurve)) for fcurve in bone_fcurves(action, [pb])])
+    if not any(source_curves):
+        raise ValueError("The source chain has no animation.")
+
+    written = 0
+    for chain, step in zip(chains, steps):
+        if step == 0:
+            continue
+        offset = frame_offset * step
+        factor = falloff ** step
+        for index, pb in enumerate(chain):
+            # Bones map by their relative position, so chains of other lengths follow too
+            source_index = round(index * (len(source_chain) - 1) / max(len(chain) - 1, 1))
+            prefix = pb.path_from_id()
+            for suffix, array_index, data in source_curves[source_index]:
+                rest = CHANNEL_REST.get(suffix.lstrip("."), (0.0,) * 4)[array_index] if suffix.startswith(".") else 0.0
+                shifted = dict(data)
+                for attr in ("co", "handle_left", "handle_right"):
+                    points = data[attr].astype(np.float64)
+                    points[:, 0] += offset
+                    points[:, 1] = rest + (points[:, 1] - rest) * factor
+                    shifted[attr] = points.astype(data[attr].dtype)
+
+                fcurve = action.fcurves.find(prefix + suffix, index=array_index)
+                if not fcurve:
+                    fcurve = action.fcurves.new(prefix + suffix, index=array_index, action_group=pb.name)
+                rewrite_keyframe_points(fcurve, shifted, np.ones(len(data["co"]), dtype=bool))
+                written += 1
+    return written
+
+class BONEPHASE_OT_Create(bpy.types.Operator):
+    """Copy the animation of the active bone's chain to the other selected chains with a phase offset"""
+    bl_idname = "bonephase.create"
+    bl_label = "Propagate Phase"
+    bl_options = {"REGISTER", "UNDO"}    
+
+    frame_offset: bpy.props.FloatProperty(
+        name="Frame Offset",
+        default=2.0,
+        description="Delay in frames added for every chain away from the source",
+        )
+    
+    falloff: bpy.props.FloatProperty(
+        name="Amplitude Falloff",
+        default=1.0,
+        min = 0.0,
+        max = 1.0,
+        description="Amplitude factor applied for every chain away from the source",
+        )
+    
+    direction: bpy.props.EnumProperty(
+        name="Direction",
+        items=[
+            ('FORWARD', "Forward", "The phase runs once around the chains in name order"),
+            ('BOTH', "Both Ways", "The phase spreads from the source in both directions"),
+        ],
+        default='FORWARD',
+        description="How the offset spreads around skirt chains, other chains always spread out from the source in name order",
+    )
+    
+    def execute(self, context):
+        try:
+            written = propagate_phase(context, frame_offset = self.frame_offset, falloff = self.falloff, direction = self.direction)
+        except ValueError as e:
+            self.report({'ERROR'}, str(e))
+            return {'CANCELLED'}
+        self.report({'INFO'}, f"Wrote {written} curves")
+        return {'FINISHED'}    
+          
+### ------------------ AUTO KEY SET AND PANEL --------------------------------------------------------   
+
+#Automatically creates keying set for armature based on names
+def auto_key_set(context):
+    obj = context.active_object
+    if not obj or obj.type != 'ARMATURE':
+        raise ValueError("No armature selected")
+    
+    
+   # Ensure an armature is selected and in pose mode
+    if bpy.context.active_object and bpy.context.active_object.type == 'ARMATURE':
+        armature = bpy.context.active_object
+        if bpy.context.mode != 'POSE':
+            bpy.ops.object.posemode_toggle()
+
+        # Create a new action named "00-keying"
+        action = bpy.data.actions.new("00-keying")
+        
+        # Ensure armature has animation data and assign the action
+        if not armature.animation_data:
+            armature.animation_data_create()
+        armature.animation_data.action = action
+
+        # Iterate through visible bones
+        for bone in armature.pose.bones:
+            if bone.bone.hide:  # Skip hidden bones
+                continue
+
+            bone_name = bone.name.upper()
+            # Key location and rotation for IK, POLE, CAM bones
+            if any(sub in bone_name for sub in ["IK", "POLE", "CAM"]):
+                bone.keyframe_insert(data_path="location", frame=0)
+                if bone.rotation_mode == 'QUATERNION':
+                    bone.keyframe_insert(data_path="rotation_quaternion", frame=0)
+                else:
+                    bone.keyframe_insert(data_path="rotation_euler", frame=0)
+            # Key custom properties for VIS and PROP bones
+            elif any(sub in bone_name for sub in ["VIS", "PROP"]):
+                for prop in [p for p in bone.keys() if p not in bone.bl_rna.properties]:
+                    bone.keyframe_insert(data_path=f'["{prop}"]', frame=0)
+            # For other bones, key location, rotation, and scale
+            else:
+                bone.keyframe_insert(data_path="location", frame=0)
+                bone.keyframe_insert(data_path="scale", frame=0)
+                if bone.rotation_mode == 'QUATERNION':
+                    bone.keyframe_insert(data_path="rotation_quaternion", frame=0)
+                else:
+                    bone.keyframe_insert(data_path="rotation_euler", frame=0)
+
+class AUTOKEYSET_OT_Create(bpy.types.Operator):
+    """Creates a simple keying set action"""
+    bl_idname = "autokeyset.create"
+    bl_label = "Auto Keying Set"
+    bl_options = {"REGISTER", "UNDO"}    
+    
+    
+    def execute(self, context):
+        try:
+            auto_key_set(context)
+        except ValueError as e:
+            self.report({'ERROR'}, str(e))
+            return {'CANCELLED'}
+        return {'FINISHED'}       
+    
+### ------------------ CHAIN DYNAMICS TOOLS AND PANEL --------------------------------------------------------   
+
+ROTATION_ATTRS = ("rotation_quaternion", "rotation_euler", "rotation_axis_angle")
+
+def chain_layout(armature, chains):
+    """ Padded (chains, bones) pose bone index table, short chains repeat their last bone. """
+    bone_index = {pb.name: i for i, pb in enumerate(armature.pose.bones)}
+    max_bones = max(len(chain) for chain in chains)
+    layout = np.array([[bone_index[chain[min(j, len(chain) - 1)].name] for j in range(max_bones)] for chain in chains])
+    valid = np.array([[j < len(chain) for j in range(max_bones)] for chain in chains])
+    parents = np.array([bone_index[chain[0].parent.name] if chain[0].parent else -1 for chain in chains])
+    return layout, valid, parents
+
+def mute_rotation_channels(action, pose_bones):
+    """ Mute the rotation fcurves of the given bones and reset their rotation, returns the muted fcurves. """
+    paths = {pb.path_from_id(attr) for pb in pose_bones for attr in ROTATION_ATTRS}
+    muted = [fcurve for fcurve in action.fcurves if fcurve.data_path in paths and not fcurve.mute]
+    for fcurve in muted:
+        fcurve.mute = True
+    for pb in pose_bones:
+        pb.rotation_quaternion = (1.0, 0.0, 0.0, 0.0)
+        pb.rotation_euler = (0.0, 0.0, 0.0)
+        pb.rotation_axis_angle = (0.0, 0.0, 1.0, 0.0)
+    return muted
+
+def chain_joints(pose, lengths):
+    """ Joint positions (every head plus the last tail) from (..., B, 4, 4) pose matrices. """
+    heads = pose[..., :3, 3]
+    y_axis = pose[..., :3, 1] / np.maximum(np.linalg.norm(pose[..., :3, 1], axis=-1, keepdims=True), 1e-12)
+    tails = heads + y_axis * lengths[..., None]
+    return np.concatenate((heads[..., :1, :], tails), axis=-2)
+
+def chain_rotations_from_joints(kinematic, joints, rest, parent_pose, parent_rest):
+    """ Local rotations that swing kinematic chain poses onto new joint positions.
+
+    kinematic is (F, C, B, 4, 4) in pose space, joints is (F, C, B + 1, 3), rest is (C, B, 4, 4)
+    and parent_pose/parent_rest describe the bone each chain hangs from. Returns the final pose
+    matrices and local rotations, both indexed like kinematic.
+    """
+    final = kinematic.copy()
+    rotations = np.empty(kinematic.shape[:-2] + (3, 3))
+    for j in range(kinematic.shape[2]):
+        k = kinematic[:, :, j]
+        y_axis = k[..., :3, 1] / np.maximum(np.linalg.norm(k[..., :3, 1], axis=-1, keepdims=True), 1e-12)
+        direction = joints[:, :, j + 1] - joints[:, :, j]
+        length = np.linalg.norm(direction, axis=-1, keepdims=True)
+        direction = np.where(length > 1e-9, direction / np.maximum(length, 1e-12), y_axis)
+
+        final[:, :, j, :3, :3] = swing_matrices(y_axis, direction) @ k[..., :3, :3]
+        final[:, :, j, :3, 3] = joints[:, :, j]
+        basis = pose_to_basis(final[:, :, j], rest[:, j], parent_pose, parent_rest)
+        rotations[:, :, j] = matrix_rotations(basis)
+
+        parent_pose, parent_rest = final[:, :, j], rest[:, j]
+    return final, rotations
+
+def simulate_chains(targets, lengths, stiffness, damping, gravity, substeps):
+    """ Verlet simulation of all chains at once.
+
+    targets is (F, C, J, 3) world space joint goals, the first joint of every chain is pinned.
+    Stiffness, damping and gravity are per chain, gravity is already scaled by the step time.
+    """
+    pos = targets[0].copy()
+    prev = pos.copy()
+    result = np.empty_like(targets)
+    result[0] = pos
+    for frame in range(1, len(targets)):
+        for step in range(1, substeps + 1):
+            target = targets[frame - 1] + (targets[frame] - targets[frame - 1]) * (step / substeps)
+            velocity = (pos - prev) * (1.0 - damping)[:, None, None]
+            prev = pos
+            pos = pos + velocity + gravity[:, None, :] + (target - pos) * stiffness[:, None, None]
+            pos[:, 0] = target[:, 0]
+
+            restore_lengths(pos, lengths)
+        result[frame] = pos
+    return result
+
+def bake_chain_dynamics_steps(context, stiffness, damping, gravity, substeps, use_range, range_start, range_end):
+    """ Step generator of bake_chain_dynamics, yields (done, total) sampled frames. """
+    obj = context.active_object
+
+    # Ensure armature is selected, we are in pose mode, and there are selected bones
+    if not obj or obj.type != 'ARMATURE' or context.mode != 'POSE' or not context.selected_pose_bones:
+        raise ValueError("An armature must be selected, in pose mode, with selected bones.")
+
+    scene = context.scene
+    frame_start = range_start if use_range else scene.frame_start
+    frame_end = range_end if use_range else scene.frame_end
+    if frame_end <= frame_start:
+        raise ValueError("The frame range must contain at least two frames.")
+    frames = np.arange(frame_start, frame_end + 1)
+
+    chains = get_bone_chains(context.selected_pose_bones)
+    layout, valid, parents = chain_layout(obj, chains)
+    yield 0, len(frames)
+
+    # Chain roots can override the settings with jiggle_stiffness, jiggle_damping and jiggle_gravity
+    stiffness = np.array([float(chain[0].get("jiggle_stiffness", stiffness)) for chain in chains])
+    damping = np.array([float(chain[0].get("jiggle_damping", damping)) for chain in chains])
+    gravity = np.array([float(chain[0].get("jiggle_gravity", gravity)) for chain in chains])
+    step_time = scene.render.fps_base / scene.render.fps / substeps
+    gravity = np.outer(gravity, (0.0, 0.0, -1.0)) * step_time ** 2
+
+    # Sample the motion the chains would have without their own rotation keys
+    action = ensure_action(obj)
+    chain_bones = [pb for chain in chains for pb in chain]
+    needed = np.unique(np.concatenate((layout.ravel(), parents[parents >= 0])))
+    muted = mute_rotation_channels(action, chain_bones)
+    try:
+        samples, worlds = yield from pose_sample_steps(scene, obj, frames, needed)
+    finally:
+        for fcurve in muted:
+            fcurve.mute = False
+
+    kinematic = samples[:, np.searchsorted(needed, layout)]
+    rest_all = np.array([pb.bone.matrix_local for pb in obj.pose.bones])
+    lengths = np.array([pb.bone.length for pb in obj.pose.bones])[layout]
+    joints = chain_joints(kinematic, lengths)
+
+    # Simulate in world space so gravity points down
+    world_joints = np.einsum("fij,fcnj->fcni", worlds[:, :3, :3], joints) + worlds[:, None, None, :3, 3]
+    segment_lengths = np.where(valid, lengths, 0.0)
+    world_joints = simulate_chains(world_joints, segment_lengths, stiffness, damping, gravity, substeps)
+    inverse = np.linalg.inv(worlds)
+    joints = np.einsum("fij,fcnj->fcni", inverse[:, :3, :3], world_joints) + inverse[:, None, None, :3, 3]
+
+    has_parent = parents >= 0
+    parent_pose = np.broadcast_to(np.eye(4), (len(frames), len(chains), 4, 4)).copy()
+    parent_rest = np.broadcast_to(np.eye(4), (len(chains), 4, 4)).copy()
+    parent_pose[:, has_parent] = samples[:, np.searchsorted(needed, parents[has_parent])]
+    parent_rest[has_parent] = rest_all[parents[has_parent]]
+    _, rotations = chain_rotations_from_joints(kinematic, joints, rest_all[layout], parent_pose, parent_rest)
+
+    for c, chain in enumerate(chains):
+        for j, pb in enumerate(chain):
+            write_bone_rotation(action, pb, frames, rotations[:, c, j])
+
+    scene.frame_set(scene.frame_current)
+    return len(chain_bones)
+
+def bake_chain_dynamics(context, stiffness, damping, gravity, substeps, use_range, range_start, range_end):
+    return run_steps(bake_chain_dynamics_steps(context, stiffness, damping, gravity, substeps, use_range, range_start, range_end))
+
+class BONEJIGGLE_OT_Create(TimeSlicedOperator, bpy.types.Operator):
+    """Simulate secondary motion on the selected chains and bake it to keys"""
+    bl_idname = "bonejiggle.create"
+    bl_label = "Bake Chain Dynamics"
+    bl_options = {"REGISTER", "UNDO"}    
+
+    stiffness: bpy.props.FloatProperty(
+        name="Stiffness",
+        default=0.1,
+        description="How strongly the chains are pulled back to their animated pose",
+        min=0.0,
+        max=1.0
+        )
+        
+    damping: bpy.props.FloatProperty(
+        name="Damping",
+        default=0.1,
+        description="How much velocity is lost per step",
+        min=0.0,
+        max=1.0
+        )
+    
+    gravity: bpy.props.FloatProperty(
+        name="Gravity",
+        default=9.81,
+        description="Gravity acceleration pulling the chains down",
+        min=0.0,
+        max=100.0
+        )
+        
+    substeps: bpy.props.IntProperty(
+        name="Substeps",
+        default=2,
+        description="Simulation steps per frame",
+        min=1,
+        max=10
+        )
+    
+    use_range: bpy.props.BoolProperty(
+        name="Use Bake Range",
+        default=False,
+        description="Bake Only In Defined Range",
+        )
+    
+    range_start: bpy.props.IntProperty(
+        name="Start", 
+        default=1,
+        description="Range Beginning",
+        )
+        
+    range_end: bpy.props.IntProperty(
+        name="End",
+        default=250,
+        description="Range End",
+        )
+    
+    def draw(self, context):
+        layout = self.layout
+        
+        layout.label(text = "Dynamics Settings", icon="FORCE_HARMONIC")
+        layout.prop(self, "stiffness")
+        layout.prop(self, "damping")
+        layout.prop(self, "gravity")
+        layout.prop(self, "substeps")
+        
+        layout.separator(factor=2)
+        layout.label(text = "Custom Range Settings", icon="ARROW_LEFTRIGHT")
+        box = layout.box()
+        row = box.row()
+        row.prop(self, "use_range")
+        if self.use_range == True:
+            row = box.row()
+            row.prop(self, "range_start")
+            row.prop(self, "range_end")
+    
+    def make_steps(self, context):
+        return bake_chain_dynamics_steps(context, stiffness = self.stiffness, damping = self.damping, gravity = self.gravity, substeps = self.substeps, use_range = self.use_range, range_start = self.range_start, range_end = self.range_end)
+    
+    def finished(self, baked):
+        self.report({'INFO'}, f"Baked dynamics on {baked} bones")
+        return {'FINISHED'}    
+
+### ------------------ CHAIN BAKE TOOLS AND PANEL --------------------------------------------------------   
+
+def disable_in_range(action, constraint, group, frame_start, frame_end):
+    """ Key the influence of a constraint to zero from frame_start to frame_end, keeping its value around them. """
+    influence = constraint.influence
+    frames = np.array([frame_start - 1, frame_start, frame_end + 1], dtype=np.float32)
+    fcurve = write_fcurve(action, constraint.path_from_id("influence"), 0, frames, (influence, 0.0, influence), group=group)
+    for point in fcurve.keyframe_points:
+        if frames[0] - 1e-4 <= point.co.x <= frames[-1] + 1e-4:
+            point.interpolation = 'CONSTANT'
+
+def bake_chains_to_fk_steps(context, use_range, range_start, range_end, frame_step, bake_location, bake_scale, remove_constraints):
+    """ Step generator of bake_chains_to_fk, yields (done, total) sampled frames. """
+    obj = context.active_object
+
+    # Ensure armature is selected, we are in pose mode, and there are selected bones
+    if not obj or obj.type != 'ARMATURE' or context.mode != 'POSE' or not context.selected_pose_bones:
+        raise ValueError("An armature must be selected, in pose mode, with selected bones.")
+
+    scene = context.scene
+    frame_start = range_start if use_range else scene.frame_start
+    frame_end = range_end if use_range else scene.frame_end
+    if frame_end < frame_start:
+        raise ValueError("The frame range is empty.")
+    frames = np.arange(frame_start, frame_end + 1, frame_step)
+
+    bone_index = {pb.name: i for i, pb in enumerate(obj.pose.bones)}
+    pose_bones = list(context.selected_pose_bones)
+    bones = np.array([bone_index[pb.name] for pb in pose_bones])
+    parents = np.array([bone_index[pb.parent.name] if pb.parent else -1 for pb in pose_bones])
+    has_parent = parents >= 0
+    yield 0, len(frames)
+
+    # Evaluate once per frame and read every needed matrix in one go
+    needed = np.unique(np.concatenate((bones, parents[has_parent])))
+    samples, _ = yield from pose_sample_steps(scene, obj, frames, needed)
+
+    rest_all = np.array([pb.bone.matrix_local for pb in obj.pose.bones])
+    parent_pose = np.broadcast_to(np.eye(4), (len(frames), len(bones), 4, 4)).copy()
+    parent_rest = np.broadcast_to(np.eye(4), (len(bones), 4, 4)).copy()
+    parent_pose[:, has_parent] = samples[:, np.searchsorted(needed, parents[has_parent])]
+    parent_rest[has_parent] = rest_all[parents[has_parent]]
+
+    # Convert every bone and frame to local channel values at once
+    basis = pose_to_basis(samples[:, np.searchsorted(needed, bones)], rest_all[bones], parent_pose, parent_rest)
+    locations = basis[..., :3, 3]
+    scales = np.linalg.norm(basis[..., :3, :3], axis=-2)
+    rotations = matrix_rotations(basis)
+
+    action = ensure_action(obj)
+    if remove_constraints and use_range:
+        # Outside the range the constraints still drive the bones, so they are only switched off inside it
+        for pb in pose_bones:
+            for constraint in pb.constraints:
+                disable_in_range(action, constraint, pb.name, frame_start, frame_end)
+    elif remove_constraints:
+        for pb in pose_bones:
+            for constraint in list(pb.constraints):
+                pb.constraints.remove(constraint)
+
+    for index, pb in enumerate(pose_bones):
+        if bake_location and not pb.bone.use_connect:
+            write_bone_channels(action, pb, "location", frames, locations[:, index])
+        write_bone_rotation(action, pb, frames, rotations[:, index])
+        if bake_scale:
+            write_bone_channels(action, pb, "scale", frames, scales[:, index])
+
+    scene.frame_set(scene.frame_current)
+    return len(pose_bones)
+
+def bake_chains_to_fk(context, use_range, range_start, range_end, frame_step, bake_location, bake_scale, remove_constraints):
+    return run_steps(bake_chains_to_fk_steps(context, use_range, range_start, range_end, frame_step, bake_location, bake_scale, remove_constraints))
+
+class BONEBAKE_OT_Create(TimeSlicedOperator, bpy.types.Operator):
+    """Bake the evaluated pose of the selected bones to FK keys"""
+    bl_idname = "bonebake.create"
+    bl_label = "Bake Chains To FK"
+    bl_options = {"REGISTER", "UNDO"}    
+
+    use_range: bpy.props.BoolProperty(
+        name="Use Bake Range",
+        default=False,
+        description="Bake Only In Defined Range",
+        )
+    
+    range_start: bpy.props.IntProperty(
+        name="Start", 
+        default=1,
+        description="Range Beginning",
+        )
+        
+    range_end: bpy.props.IntProperty(
+        name="End",
+        default=250,
+        description="Range End",
+        )
+    
+    frame_step: bpy.props.IntProperty(
+        name="Frame Step",
+        default=1,
+        min = 1,
+        max = 10,
+        description="Bake every Nth frame",
+        )
     
-class SWITCHCHAIN_OT_Create(bpy.types.Operator):
-    """Switch the direction of the selected bone chain and adjust parent"""
-    bl_idname = "switch.create"
-    bl_label = "Switch Chain Direction"
-    bl_options = {"REGISTER", "UNDO"}    
+    bake_location: bpy.props.BoolProperty(
+        name="Bake Location",
+        default=True,
+        description="Key location of bones that are not connected",
+        )
     
+    bake_scale: bpy.props.BoolProperty(
+        name="Bake Scale",
+        default=True,
+        description="Key scale",
+        )
     
-    def execute(self, context):
-        try:
-            switch_chain(context)
-        except ValueError as e:
-            self.report({'ERROR'}, str(e))
-            return {'CANCELLED'}
-        return {'FINISHED'}     
-           
-### ------------------ AUTO ALIGN TOOLS AND PANEL --------------------------------------------------------   
+    remove_constraints: bpy.props.BoolProperty(
+        name="Remove Constraints",
+        default=True,
+        description="Remove the constraints of the baked bones, with Use Bake Range only switch them off inside the range",
+        )
+    
+    def draw(self, context):
+        layout = self.layout
+        
+        layout.label(text = "Bake Settings", icon="MODIFIER_DATA")
+        layout.prop(self, "bake_location")
+        layout.prop(self, "bake_scale")
+        layout.prop(self, "remove_constraints")
+        
+        layout.separator(factor=2)
+        layout.label(text = "Custom Range Settings", icon="ARROW_LEFTRIGHT")
+        box = layout.box()
+        row = box.row()
+        row.prop(self, "use_range")
+        if self.use_range == True:
+            row = box.row()
+            row.prop(self, "range_start")
+            row.prop(self, "range_end")
+        row = box.row()
+        row.prop(self, "frame_step")
+    
+    def make_steps(self, context):
+        return bake_chains_to_fk_steps(context, use_range = self.use_range, range_start = self.range_start, range_end = self.range_end, frame_step = self.frame_step, bake_location = self.bake_location, bake_scale = self.bake_scale, remove_constraints = self.remove_constraints)
+    
+    def finished(self, baked):
+        self.report({'INFO'}, f"Baked {baked} bones")
+        return {'FINISHED'}    
 
-#Automatically aligns selected bones
-def re_align(context):
+### ------------------ CLOTH TRANSFER TOOLS AND PANEL --------------------------------------------------------   
+
+def fit_patch_transforms(bind_points, weights, points):
+    """ Weighted best fit rotations and centroids of point patches (Kabsch), batched over leading axes.
+
+    bind_points are the (J, K, 3) patch points at bind time relative to their weighted centroid,
+    weights are (J, K) and sum to one per patch, points are the (..., J, K, 3) current patch points.
+    Returns (..., J, 3, 3) rotations and (..., J, 3) centroids.
+    """
+    centroid = np.einsum("jk,...jki->...ji", weights, points)
+    moved = points - centroid[..., None, :]
+    covariance = np.einsum("jk,jki,...jkl->...jil", weights, bind_points, moved)
+    u, _, vt = np.linalg.svd(covariance)
+    v = np.swapaxes(vt, -1, -2)
+    # Flip the weakest axis where the best fit would be a reflection
+    v[..., :, 2] *= np.sign(np.linalg.det(v @ np.swapaxes(u, -1, -2)))[..., None]
+    return v @ np.swapaxes(u, -1, -2), centroid
+
+def transfer_cloth_steps(context, bind_count, use_range, range_start, range_end, bake_location):
+    """ Step generator of transfer_cloth, yields (done, total) sampled frames. """
     obj = context.active_object
-    # Check if an armature is selected and it's in edit mode
-    if not obj or obj.type != 'ARMATURE' or context.mode != 'EDIT_ARMATURE':
-        raise ValueError("No armature selected or not in edit mode.")
-        
-    for eb in context.selected_editable_bones:
-        parent = eb        
-        v = (eb.tail - eb.head).normalized()
 
-        while len(parent.children):
-            bone = parent.children[0]
-            bone.head = parent.tail
-            bone.tail = parent.tail + bone.length * v
-            parent = bone
+    # Ensure armature is selected, we are in pose mode, and there are selected bones
+    if not obj or obj.type != 'ARMATURE' or context.mode != 'POSE' or not context.selected_pose_bones:
+        raise ValueError("An armature must be selected, in pose mode, with selected bones.")
+    cloths = [other for other in context.selected_objects if other.type == 'MESH']
+    if len(cloths) != 1:
+        raise ValueError("Select exactly one cloth mesh together with the armature.")
+    cloth = cloths[0]
 
-class BONEALIGN_OT_Create(bpy.types.Operator):
-    """Align the bones based on the rotation of the first bone in the chain"""
-    bl_idname = "align.create"
-    bl_label = "Auto Align"
+    scene = context.scene
+    frame_start = range_start if use_range else scene.frame_start
+    frame_end = range_end if use_range else scene.frame_end
+    if frame_end < frame_start:
+        raise ValueError("The frame range is empty.")
+    frames = np.arange(frame_start, frame_end + 1)
+    depsgraph = context.evaluated_depsgraph_get()
+
+    # Joints are the head of every bone plus the tip of every chain
+    chains = get_bone_chains(context.selected_pose_bones)
+    pose_bones = [pb for chain in chains for pb in chain]
+    bone_index = {pb.name: i for i, pb in enumerate(obj.pose.bones)}
+    bones = np.array([bone_index[pb.name] for pb in pose_bones])
+    head_joint, chain_parent, outside_parent = [], [], []
+    joint_count = 0
+    for chain in chains:
+        for i, pb in enumerate(chain):
+            head_joint.append(joint_count + i)
+            chain_parent.append(len(chain_parent) - 1 if i else -1)
+            outside_parent.append(bone_index[pb.parent.name] if i == 0 and pb.parent else -1)
+        joint_count += len(chain) + 1
+    head_joint = np.array(head_joint)
+    tail_joint = head_joint + 1
+    chain_parent = np.array(chain_parent)
+    outside_parent = np.array(outside_parent)
+    outside = np.unique(outside_parent[outside_parent >= 0])
+    yield 0, len(frames)
+
+    current_frame = scene.frame_current
+    try:
+        # Bind every joint to its nearest cloth vertices on the first frame
+        scene.frame_set(int(frames[0]))
+        cloth_eval = cloth.evaluated_get(depsgraph)
+        coords = mesh_vertex_coords(cloth_eval.data, cloth_eval.matrix_world)
+        if not len(coords):
+            raise ValueError("The cloth mesh has no vertices.")
+        bind_pose = np.array(obj.matrix_world) @ read_matrices(obj.pose.bones, "matrix")[bones]
+        bind_rot = matrix_rotations(bind_pose)
+        joints = np.empty((joint_count, 3))
+        joints[tail_joint] = bind_pose[:, :3, 3] + bind_rot[:, :, 1] * np.array([pb.bone.length for pb in pose_bones])[:, None]
+        joints[head_joint] = bind_pose[:, :3, 3]
+
+        kd = mathutils.kdtree.KDTree(len(coords))
+        for index, co in enumerate(coords):
+            kd.insert(co, index)
+        kd.balance()
+        count = min(bind_count, len(coords))
+        neighbours = np.array([[hit[1] for hit in kd.find_n(joint, count)] for joint in joints])
+        weights = 1.0 / (np.linalg.norm(coords[neighbours] - joints[:, None], axis=-1) + 1e-6)
+        weights /= weights.sum(axis=1, keepdims=True)
+        bind_centroid = np.einsum("jk,jki->ji", weights, coords[neighbours])
+        bind_points = coords[neighbours] - bind_centroid[:, None]
+        joint_offsets = joints - bind_centroid
+
+        # One foreach_get and one batched fit per frame
+        fitted_joints = np.empty((len(frames), joint_count, 3))
+        patch_rotations = np.empty((len(frames), joint_count, 3, 3))
+        outside_pose = np.empty((len(frames), len(outside), 4, 4))
+        worlds = np.empty((len(frames), 4, 4))
+        for index, frame in enumerate(frames):
+            scene.frame_set(int(frame))
+            cloth_eval = cloth.evaluated_get(depsgraph)
+            points = mesh_vertex_coords(cloth_eval.data, cloth_eval.matrix_world)
+            if len(points) != len(coords):
+                raise ValueError("The vertex count of the cloth mesh changes within the frame range.")
+            rotations, centroids = fit_patch_transforms(bind_points, weights, points[neighbours])
+            fitted_joints[index] = np.einsum("jil,jl->ji", rotations, joint_offsets) + centroids
+            patch_rotations[index] = rotations
+            outside_pose[index] = read_matrices(obj.pose.bones, "matrix")[outside]
+            worlds[index] = np.array(obj.matrix_world)
+            yield index + 1, len(frames)
+    finally:
+        scene.frame_set(current_frame)
+
+    # Bones turn with the cloth around their head, then swing onto the fitted joints
+    rot = patch_rotations[:, head_joint] @ bind_rot
+    direction = fitted_joints[:, tail_joint] - fitted_joints[:, head_joint]
+    direction /= np.maximum(np.linalg.norm(direction, axis=-1, keepdims=True), 1e-12)
+    rot = swing_matrices(rot[..., :, 1], direction) @ rot
+    pose = np.zeros((len(frames), len(pose_bones), 4, 4))
+    pose[..., :3, :3] = rot
+    pose[..., :3, 3] = fitted_joints[:, head_joint]
+    pose[..., 3, 3] = 1.0
+    pose = np.linalg.inv(worlds)[:, None] @ pose
+
+    # Local channels relative to the fitted parent in the chain, or the evaluated parent outside of it
+    rest_all = np.array([pb.bone.matrix_local for pb in obj.pose.bones])
+    parent_pose = np.broadcast_to(np.eye(4), pose.shape).copy()
+    parent_rest = np.broadcast_to(np.eye(4), (len(pose_bones), 4, 4)).copy()
+    inside = chain_parent >= 0
+    parent_pose[:, inside] = pose[:, chain_parent[inside]]
+    parent_rest[inside] = rest_all[bones[chain_parent[inside]]]
+    has_outside = outside_parent >= 0
+    parent_pose[:, has_outside] = outside_pose[:, np.searchsorted(outside, outside_parent[has_outside])]
+    parent_rest[has_outside] = rest_all[outside_parent[has_outside]]
+    basis = pose_to_basis(pose, rest_all[bones], parent_pose, parent_rest)
+
+    action = ensure_action(obj)
+    for index, pb in enumerate(pose_bones):
+        write_bone_rotation(action, pb, frames, matrix_rotations(basis[:, index]))
+        if bake_location and not pb.bone.use_connect:
+            write_bone_channels(action, pb, "location", frames, basis[:, index, :3, 3])
+
+    scene.frame_set(scene.frame_current)
+    return len(pose_bones)
+
+def transfer_cloth(context, bind_count, use_range, range_start, range_end, bake_location):
+    return run_steps(transfer_cloth_steps(context, bind_count, use_range, range_start, range_end, bake_location))
+
+class BONECLOTH_OT_Create(TimeSlicedOperator, bpy.types.Operator):
+    """Bake the motion of a selected cloth mesh onto the selected chains"""
+    bl_idname = "bonecloth.create"
+    bl_label = "Transfer Cloth To Chains"
     bl_options = {"REGISTER", "UNDO"}    
+
+    bind_count: bpy.props.IntProperty(
+        name="Bind Vertices",
+        default=8,
+        min = 3,
+        max = 32,
+        description="Number of nearest cloth vertices every joint follows",
+        )
     
+    bake_location: bpy.props.BoolProperty(
+        name="Bake Location",
+        default=True,
+        description="Key location of bones that are not connected",
+        )
     
-    def execute(self, context):
-        try:
-            re_align(context)
-        except ValueError as e:
-            self.report({'ERROR'}, str(e))
-            return {'CANCELLED'}
-        return {'FINISHED'}     
+    use_range: bpy.props.BoolProperty(
+        name="Use Bake Range",
+        default=False,
+        description="Bake Only In Defined Range",
+        )
+    
+    range_start: bpy.props.IntProperty(
+        name="Start", 
+        default=1,
+        description="Range Beginning",
+        )
         
-### ------------------ KEY ALl TOOLS AND PANEL --------------------------------------------------------   
+    range_end: bpy.props.IntProperty(
+        name="End",
+        default=250,
+        description="Range End",
+        )
+    
+    def draw(self, context):
+        layout = self.layout
+        
+        layout.label(text = "Transfer Settings", icon="MOD_CLOTH")
+        layout.prop(self, "bind_count")
+        layout.prop(self, "bake_location")
+        
+        layout.separator(factor=2)
+        layout.label(text = "Custom Range Settings", icon="ARROW_LEFTRIGHT")
+        box = layout.box()
+        row = box.row()
+        row.prop(self, "use_range")
+        if self.use_range == True:
+            row = box.row()
+            row.prop(self, "range_start")
+            row.prop(self, "range_end")
+    
+    def make_steps(self, context):
+        return transfer_cloth_steps(context, bind_count = self.bind_count, use_range = self.use_range, range_start = self.range_start, range_end = self.range_end, bake_location = self.bake_location)
+    
+    def finished(self, transferred):
+        self.report({'INFO'}, f"Transferred cloth motion to {transferred} bones")
+        return {'FINISHED'}    
 
-def has_keyframe(action, bone_name, frame):
-    for fcurve in action.fcurves:
-        if bone_name in fcurve.data_path:
-            for keyframe_point in fcurve.keyframe_points:
-                if int(keyframe_point.co.x) == frame:
-                    return True
-    return False
+### ------------------ CHAIN RETARGET TOOLS AND PANEL --------------------------------------------------------   
 
-def mark_keyframe_as_breakdown(action, bone_name, frame):
-    for fcurve in action.fcurves:
-        if bone_name in fcurve.data_path:
-            for keyframe_point in fcurve.keyframe_points:
-                if int(keyframe_point.co.x) == frame:
-                    keyframe_point.type = 'BREAKDOWN'
+def polyline_points_at(points, params):
+    """ Points at normalized arc length positions along (..., N, 3) polylines, returns (..., M, 3).
+
+    Like resample_polylines, all polylines share one searchsorted by offsetting their parameters
+    by twice the polyline index.
+    """
+    shape = points.shape
+    points = points.reshape(-1, shape[-2], 3)
+    count, size = points.shape[:2]
+    arc = np.concatenate((np.zeros((count, 1)), np.cumsum(np.linalg.norm(np.diff(points, axis=1), axis=2), axis=1)), axis=1)
+    arc /= np.maximum(arc[:, -1:], 1e-12)
 
-def key_all(context, use_custom, use_range, range_start, range_end, should_skip, skip_frame):
+    rows = np.arange(count)[:, None]
+    index = np.searchsorted((arc + rows * 2.0).ravel(), (params[None, :] + rows * 2.0).ravel(), side='right') - 1
+    index = np.clip(index.reshape(count, -1) - rows * size, 0, size - 2)
+    t = np.clip((params[None, :] - arc[rows, index]) / np.maximum(arc[rows, index + 1] - arc[rows, index], 1e-12), 0.0, 1.0)
+    result = points[rows, index] + (points[rows, index + 1] - points[rows, index]) * t[..., None]
+    return result.reshape(shape[:-2] + (len(params), 3))
+
+def retarget_chains_steps(context, use_range, range_start, range_end, frame_step):
+    """ Step generator of retarget_chains, yields (done, total) sampled frames. """
     obj = context.active_object
 
     # Ensure armature is selected, we are in pose mode, and there are selected bones
     if not obj or obj.type != 'ARMATURE' or context.mode != 'POSE' or not context.selected_pose_bones:
         raise ValueError("An armature must be selected, in pose mode, with selected bones.")
 
-    action = obj.animation_data.action if obj.animation_data else None
-    if not action:
-        raise ValueError("No action found for the armature.")
+    active = context.active_pose_bone
+    if not active or not active.bone.select:
+        raise ValueError("The active bone must be part of the selected source chain.")
 
-    frame_start = range_start if use_range else bpy.context.scene.frame_start
-    frame_end = range_end if use_range else bpy.context.scene.frame_end
+    scene = context.scene
+    frame_start = range_start if use_range else scene.frame_start
+    frame_end = range_end if use_range else scene.frame_end
+    if frame_end < frame_start:
+        raise ValueError("The frame range is empty.")
+    frames = np.arange(frame_start, frame_end + 1, frame_step)
 
-    for frame in range(frame_start, frame_end + 1):
-        if should_skip and frame % skip_frame != 0:
-            continue
+    chains = get_bone_chains(context.selected_pose_bones)
+    source = next(chain for chain in chains if active.name in {pb.name for pb in chain})
+    targets = [chain for chain in chains if chain is not source]
+    if not targets:
+        raise ValueError("Select the source chain and at least one target chain.")
+    yield 0, len(frames)
 
-        bpy.context.scene.frame_set(frame)
+    bone_index = {pb.name: i for i, pb in enumerate(obj.pose.bones)}
+    source_bones = np.array([bone_index[pb.name] for pb in source])
+    target_bones = [np.array([bone_index[pb.name] for pb in chain]) for chain in targets]
+    parents = np.array([bone_index[chain[0].parent.name] if chain[0].parent else -1 for chain in targets])
+    needed = np.unique(np.concatenate([source_bones, parents[parents >= 0]] + target_bones))
 
-        for bone in context.selected_pose_bones:
-            bone_name = f'pose.bones["{bone.name}"]'
-            key_needed = not has_keyframe(action, bone_name, frame)
+    # Sample the source as animated and the targets without their own rotation keys
+    action = ensure_action(obj)
+    target_pose_bones = [pb for chain in targets for pb in chain]
+    muted = mute_rotation_channels(action, target_pose_bones)
+    try:
+        samples, _ = yield from pose_sample_steps(scene, obj, frames, needed)
+    finally:
+        for fcurve in muted:
+            fcurve.mute = False
 
-            if key_needed:
-                bpy.ops.pose.transforms_clear()
-                bone.keyframe_insert(data_path="location", frame=frame, group=bone.name)
-                bone.keyframe_insert(data_path="scale", frame=frame, group=bone.name)
-                bone.keyframe_insert(data_path="rotation_euler", frame=frame, group=bone.name)
-                bone.keyframe_insert(data_path="rotation_quaternion", frame=frame, group=bone.name)
-                mark_keyframe_as_breakdown(action, bone_name, frame)
+    rest_all = np.array([pb.bone.matrix_local for pb in obj.pose.bones])
+    lengths_all = np.array([pb.bone.length for pb in obj.pose.bones])
+    source_joints = chain_joints(samples[:, np.searchsorted(needed, source_bones)], lengths_all[source_bones])
+    source_rest = chain_joints(rest_all[source_bones], lengths_all[source_bones])
 
-            # Keying custom properties if needed
-            if use_custom:
-                for prop in bone.keys():
-                    if key_needed:
-                        bone.keyframe_insert(data_path=f'["{prop}"]', frame=frame, group=bone.name)
-                        mark_keyframe_as_breakdown(action, bone_name, frame)
+    for chain, bones, parent in zip(targets, target_bones, parents):
+        # Sample the source curve where the target joints sit along their own rest chain
+        target_rest = chain_joints(rest_all[bones], lengths_all[bones])
+        joints = polyline_points_at(source_joints, arc_parameters(target_rest))
 
-class KEYALL_OT_Create(bpy.types.Operator):
-    """Keys bones on all frames and resets thier transforms if there is no keyframe, useful for tweakers"""
-    bl_idname = "keyall.create"
-    bl_label = "Auto Key All Non Keyed"
+        # Turn the motion over to chains that hang in another direction
+        chords = np.array([source_rest[-1] - source_rest[0], target_rest[-1] - target_rest[0]])
+        chords /= np.maximum(np.linalg.norm(chords, axis=1, keepdims=True), 1e-12)
+        align = swing_matrices(chords[0], chords[1])
+        joints = joints @ align.T
+
+        parent_pose = np.broadcast_to(np.eye(4), (len(frames), 1, 4, 4)).copy()
+        parent_rest = np.eye(4)[None]
+        if parent >= 0:
+            parent_pose[:, 0] = samples[:, np.searchsorted(needed, parent)]
+            parent_rest = rest_all[parent][None]
+        kinematic = samples[:, np.searchsorted(needed, bones)][:, None]
+        _, rotations = chain_rotations_from_joints(kinematic, joints[:, None], rest_all[bones][None], parent_pose, parent_rest)
+
+        for j, pb in enumerate(chain):
+            write_bone_rotation(action, pb, frames, rotations[:, 0, j])
+
+    scene.frame_set(scene.frame_current)
+    return len(target_pose_bones)
+
+def retarget_chains(context, use_range, range_start, range_end, frame_step):
+    return run_steps(retarget_chains_steps(context, use_range, range_start, range_end, frame_step))
+
+class BONERETARGET_OT_Create(TimeSlicedOperator, bpy.types.Operator):
+    """Bake the motion of the active bone's chain onto the other selected chains, whatever their bone count"""
+    bl_idname = "boneretarget.create"
+    bl_label = "Retarget Chains"
     bl_options = {"REGISTER", "UNDO"}    
 
-    use_custom: bpy.props.BoolProperty(
-        name="Key Custom Properties",
-        default=False,
-        description="Key Custom Properties",
-        )
-        
     use_range: bpy.props.BoolProperty(
-        name="Use Key Range",
+        name="Use Bake Range",
         default=False,
-        description="Key Only In Defined Range",
+        description="Bake Only In Defined Range",
         )
     
     range_start: bpy.props.IntProperty(
@@ -846,29 +4487,18 @@ class KEYALL_OT_Create(bpy.types.Operator):
         default=250,
         description="Range End",
         )
-        
-    should_skip: bpy.props.BoolProperty(
-        name="Custom Skip",
-        default=True,
-        description="Creates a gap between frames",
-        )
-
-    skip_frame: bpy.props.IntProperty(
-        name="Skip Frames",
-        default=2,
+    
+    frame_step: bpy.props.IntProperty(
+        name="Frame Step",
+        default=1,
+        min = 1,
         max = 10,
-        min = 0,
-        description="How many frames to gap between frames",
+        description="Bake every Nth frame",
         )
     
     def draw(self, context):
         layout = self.layout
         
-        layout.label(text = "Auto Key Settings", icon="MODIFIER_DATA")
-    
-        layout.prop(self, "use_custom")
-        
-        layout.separator(factor=2)
         layout.label(text = "Custom Range Settings", icon="ARROW_LEFTRIGHT")
         box = layout.box()
         row = box.row()
@@ -878,105 +4508,202 @@ class KEYALL_OT_Create(bpy.types.Operator):
             row.prop(self, "range_start")
             row.prop(self, "range_end")
         row = box.row()
-        row.prop(self, "should_skip")   
-        if self.should_skip == True:
-            row = box.row()
-            row.prop(self, "skip_frame")
+        row.prop(self, "frame_step")
     
-    def execute(self, context):
-        try:
-            key_all(context, use_custom = self.use_custom, use_range = self.use_range, range_start = self.range_start, range_end = self.range_end, should_skip = self.should_skip, skip_frame = self.skip_frame)
-        except ValueError as e:
-            self.report({'ERROR'}, str(e))
-            return {'CANCELLED'}
+    def make_steps(self, context):
+        return retarget_chains_steps(context, use_range = self.use_range, range_start = self.range_start, range_end = self.range_end, frame_step = self.frame_step)
+    
+    def finished(self, retargeted):
+        self.report({'INFO'}, f"Retargeted {retargeted} bones")
         return {'FINISHED'}    
-          
-### ------------------ AUTO KEY SET AND PANEL --------------------------------------------------------   
 
-#Automatically creates keying set for armature based on names
-def auto_key_set(context):
-    obj = context.active_object
-    if not obj or obj.type != 'ARMATURE':
-        raise ValueError("No armature selected")
-    
-    
-   # Ensure an armature is selected and in pose mode
-    if bpy.context.active_object and bpy.context.active_object.type == 'ARMATURE':
-        armature = bpy.context.active_object
-        if bpy.context.mode != 'POSE':
-            bpy.ops.object.posemode_toggle()
+### ------------------ RIG PIPELINE TOOLS AND PANEL --------------------------------------------------------   
 
-        # Create a new action named "00-keying"
-        action = bpy.data.actions.new("00-keying")
-        
-        # Ensure armature has animation data and assign the action
-        if not armature.animation_data:
-            armature.animation_data_create()
-        armature.animation_data.action = action
+# Text datablock holding the JSON preset of the pipeline, created with DEFAULT_PIPELINE when missing
+PIPELINE_TEXT = "BCT Pipeline.json"
 
-        # Iterate through visible bones
-        for bone in armature.pose.bones:
-            if bone.bone.hide:  # Skip hidden bones
-                continue
+# Stage name: (object mode it runs in, function, default arguments the preset params override)
+PIPELINE_STAGES = {
+    "skirt": ('OBJECT', create_skirt_chain, {"rad": 1.0, "chain_length": 4, "root_bone_size": 0.5, "num_chains": 8, "chain_angle": 45.0,
+                                            "flare_angle": 0.0, "auto_rotation_step": True, "curve_angle": 0.0, "edit_size": 1.0}),
+    "hair": ('OBJECT', create_bone_chain, {"root_bone_size": 1.0}),
+    "name": ('EDIT', bone_chain_name, {"chain_name": "Hair", "reverse": False, "custom_letter": False, "da_letter": "x", "skip_letter": False}),
+    "roll": ('EDIT', bone_roll_align, {}),
+    "align": ('EDIT', re_align, {}),
+    "smooth": ('EDIT', smooth_chains, {"iterations": 5, "factor": 0.5, "curvature_weight": 0.5}),
+    "fix": ('POSE', bone_fix, {}),
+    "shapes": ('POSE', create_bone_shapes, {"shape": 'CIRCLE', "scale": 1.0, "colors": 'CHAIN', "theme": 1}),
+    "keyset": ('POSE', auto_key_set, {}),
+}
 
-            bone_name = bone.name.upper()
-            # Key location and rotation for IK, POLE, CAM bones
-            if any(sub in bone_name for sub in ["IK", "POLE", "CAM"]):
-                bone.keyframe_insert(data_path="location", frame=0)
-                if bone.rotation_mode == 'QUATERNION':
-                    bone.keyframe_insert(data_path="rotation_quaternion", frame=0)
-                else:
-                    bone.keyframe_insert(data_path="rotation_euler", frame=0)
-            # Key custom properties for VIS and PROP bones
-            elif any(sub in bone_name for sub in ["VIS", "PROP"]):
-                for prop in [p for p in bone.keys() if p not in bone.bl_rna.properties]:
-                    bone.keyframe_insert(data_path=f'["{prop}"]', frame=0)
-            # For other bones, key location, rotation, and scale
-            else:
-                bone.keyframe_insert(data_path="location", frame=0)
-                bone.keyframe_insert(data_path="scale", frame=0)
-                if bone.rotation_mode == 'QUATERNION':
-                    bone.keyframe_insert(data_path="rotation_quaternion", frame=0)
-                else:
-                    bone.keyframe_insert(data_path="rotation_euler", frame=0)
+# Name and Roll work on the first chain only, Align Bones on the chain roots only, so the skirt keeps its radial rolls and its ring
+DEFAULT_PIPELINE = {
+    "stages": [
+        {"stage": "skirt", "params": {"num_chains": 8, "chain_length": 4}},
+        {"stage": "name", "select": r"^skirt\.a\.\d{3}$", "params": {"chain_name": "skirt", "custom_letter": True, "da_letter": "a"}},
+        {"stage": "roll", "select": r"^skirt\.a\.\d{3}$"},
+        {"stage": "align", "select": r"^skirt\.[a-z]\.000$"},
+        {"stage": "fix", "select": SKIRT_BONE_PATTERN.pattern},
+        {"stage": "keyset"},
+    ]
+}
 
-class AUTOKEYSET_OT_Create(bpy.types.Operator):
-    """Creates a simple keying set action"""
-    bl_idname = "autokeyset.create"
-    bl_label = "Auto Keying Set"
+def pipeline_preset(name):
+    """ Read and check the stages of a pipeline preset text, writing the default preset first if it does not exist.
+
+    Every stage is checked before anything runs, so a bad preset never leaves a half built rig.
+    """
+    text = bpy.data.texts.get(name)
+    if not text:
+        text = bpy.data.texts.new(name)
+        text.write(json.dumps(DEFAULT_PIPELINE, indent=2))
+    try:
+        stages = json.loads(text.as_string())["stages"]
+    except (ValueError, KeyError, TypeError) as e:
+        raise ValueError(f"The pipeline preset '{name}' is not valid: {e}")
+
+    for index, stage in enumerate(stages):
+        if stage.get("stage") not in PIPELINE_STAGES:
+            raise ValueError(f"Unknown pipeline stage '{stage.get('stage')}', use one of: {', '.join(PIPELINE_STAGES)}.")
+        mode, function, defaults = PIPELINE_STAGES[stage["stage"]]
+        try:
+            inspect.signature(function).bind(None, **dict(defaults, **stage.get("params", {})))
+        except TypeError as e:
+            raise ValueError(f"Stage {index + 1} ({stage['stage']}) has invalid params: {e}")
+        if "select" in stage:
+            if mode == 'OBJECT':
+                raise ValueError(f"Stage {index + 1} ({stage['stage']}) runs in object mode and cannot select bones.")
+            try:
+                re.compile(stage["select"])
+            except re.error as e:
+                raise ValueError(f"Stage {index + 1} ({stage['stage']}) has an invalid select pattern: {e}")
+    return stages
+
+def select_bones(obj, mode, pattern):
+    """ Select exactly the bones whose name matches a pattern, in edit or pose mode, the first match becomes active. """
+    regex = re.compile(pattern)
+    bones = obj.data.edit_bones if mode == 'EDIT' else obj.data.bones
+    matched = None
+    for bone in bones:
+        bone.select = bool(regex.search(bone.name))
+        if mode == 'EDIT':
+            bone.select_head = bone.select_tail = bone.select
+        if bone.select and matched is None:
+            matched = bone
+    if matched is None:
+        raise ValueError(f"No bone matches '{pattern}'.")
+    bones.active = matched
+
+def run_pipeline(context, preset):
+    """ Run the stages of a preset in one go, returns (stage, seconds) per finished stage and an error or None.
+
+    Stages call the tool functions directly, so the operator running the pipeline pushes the only
+    undo step, and the mode only changes when a stage needs another one than the stage before it.
+    A failing stage stops the pipeline, the stages before it stay done.
+    """
+    stages = pipeline_preset(preset)
+    timings = []
+    for index, stage in enumerate(stages):
+        mode, function, defaults = PIPELINE_STAGES[stage["stage"]]
+        start = time.perf_counter()
+        try:
+            obj = context.active_object
+            if obj and obj.mode != mode:
+                bpy.ops.object.mode_set(mode=mode)
+            if "select" in stage:
+                if not obj or obj.type != 'ARMATURE':
+                    raise ValueError("Bones can only be selected on an armature.")
+                select_bones(obj, mode, stage["select"])
+            function(context, **dict(defaults, **stage.get("params", {})))
+        except ValueError as e:
+            return timings, f"Stage {index + 1} ({stage['stage']}) failed: {e}"
+        timings.append((stage["stage"], time.perf_counter() - start))
+    return timings, None
+
+class BONEPIPELINE_OT_Create(bpy.types.Operator):
+    """Run the tool stages of a preset text as a single undo step"""
+    bl_idname = "bonepipeline.create"
+    bl_label = "Run Rig Pipeline"
     bl_options = {"REGISTER", "UNDO"}    
     
+    preset: bpy.props.StringProperty(
+        name="Preset Text",
+        default=PIPELINE_TEXT,
+        description="Text datablock with the JSON stage list, created with a default pipeline if missing",
+    )
     
     def execute(self, context):
         try:
-            auto_key_set(context)
+            timings, error = run_pipeline(context, preset = self.preset)
         except ValueError as e:
+            # The preset is checked before any stage runs, nothing changed yet
             self.report({'ERROR'}, str(e))
             return {'CANCELLED'}
-        return {'FINISHED'}       
-    
+        summary = ", ".join(f"{stage} {seconds:.2f}s" for stage, seconds in timings)
+        if error:
+            # Finish anyway so the stages that did run can be undone in one step
+            self.report({'ERROR'}, f"{error}. Finished stages: {summary or 'none'}")
+            return {'FINISHED'}
+        total = sum(seconds for stage, seconds in timings)
+        self.report({'INFO'}, f"Pipeline took {total:.2f}s: {summary}")
+        return {'FINISHED'}
+
 # ======================================================
 # Registration
 # ======================================================
 
 classes = (
+    SkirtRigSettings,
+    BONECACHE_OT_Clear,
+    BONESHAPE_OT_Create,
     BONECHAIN_OT_Create,
     BONESKIRT_OT_Create,
     BONEROLL_OT_Create,
+    BONESURFACEROLL_OT_Create,
     BONENAME_OT_Create,
     BONECONNECT_OT_Create,
+    BONEMIRROR_OT_Create,
+    BONERESAMPLE_OT_Create,
+    BONESMOOTH_OT_Create,
+    BONELOD_OT_Create,
+    BONESPLINE_OT_Create,
+    BONELAYOUTEXPORT_OT_Create,
+    BONELAYOUTIMPORT_OT_Create,
     BONEFIX_OT_Create,
+    BONEPROFILE_OT_Create,
+    BONEWEIGHT_OT_Create,
     BONEALIGN_OT_Create,
     SWITCHCHAIN_OT_Create,
     KEYALL_OT_Create,
-    AUTOKEYSET_OT_Create
+    AUTOKEYSET_OT_Create,
+    KEYCLEAN_OT_Create,
+    BONEPHASE_OT_Create,
+    BONEJIGGLE_OT_Create,
+    BONEBAKE_OT_Create,
+    BONECLOTH_OT_Create,
+    BONERETARGET_OT_Create,
+    BONEPIPELINE_OT_Create,
 )
 
 def register():
     for cls in classes:
         bpy.utils.register_class(cls)
+    bpy.types.Armature.bct_skirt = bpy.props.PointerProperty(type=SkirtRigSettings)
+    bpy.types.Armature.bct_use_lod = bpy.props.BoolProperty(
+        name="Use LOD Chains",
+        default=False,
+        description="Evaluate the reduced LOD chains instead of the full chains, renders always use the full chains",
+        update=update_lod_switch,
+    )
+    for handlers, handler in LOD_HANDLERS:
+        handlers.append(handler)
 
 def unregister():
+    for handlers, handler in LOD_HANDLERS:
+        if handler in handlers:
+            handlers.remove(handler)
+    del bpy.types.Armature.bct_use_lod
+    del bpy.types.Armature.bct_skirt
     for cls in reversed(classes):
         bpy.utils.unregister_class(cls)
     
@@ -1,5 +1,8 @@
 import bpy
+import os
+import numpy as np
 from bpy.types import Operator
+from bpy.app.handlers import persistent
 
 # ======================================================
 # Bone Light Tools (Remove System)
@@ -248,6 +251,245 @@ class BONELIGHT_OT_AddAffectorHigh(bpy.types.Operator):
         self.report({'INFO'}, f"Added {sphere.name} to Affector HIGH")
         return {'FINISHED'}
     
+# ======================================================
+# Affector Influence Cache
+# ======================================================
+
+AFFECTOR_COLLECTIONS = ("Affector LOW", "Affector HIGH")
+AFFECTOR_MODIFIER = "Shadow Affector"
+# Scene property describing the active cache
+CACHE_PROP = "bct_affector_cache"
+# Memory mapped cache arrays by file path, opened on first use
+cache_arrays = {}
+
+def get_affectors():
+    """Objects in the affector collections that carry the Shadow Affector modifier"""
+    affectors = []
+    for collection_name in AFFECTOR_COLLECTIONS:
+        collection = bpy.data.collections.get(collection_name)
+        if collection:
+            affectors += [obj for obj in collection.all_objects if obj.modifiers.get(AFFECTOR_MODIFIER)]
+    return affectors
+
+def cache_directory():
+    """Cache folder next to the blend file, or in the session temp folder for unsaved files"""
+    if bpy.data.filepath:
+        return bpy.path.abspath("//bct_affector_cache")
+    return os.path.join(bpy.app.tempdir, "bct_affector_cache")
+
+def play_affector_cache(scene):
+    """Write the cached influence of the current frame into the target mesh attributes"""
+    info = scene.get(CACHE_PROP)
+    if not info:
+        return
+    row = min(max(scene.frame_current - info["frame_start"], 0), info["frame_count"] - 1)
+    for name, path in info["targets"].items():
+        obj = bpy.data.objects.get(name)
+        if not obj or not os.path.exists(path):
+            continue
+        values = cache_arrays.get(path)
+        if values is None:
+            values = cache_arrays[path] = np.load(path, mmap_mode='r')
+        attribute = obj.data.attributes.get(info["attribute"])
+        if attribute and len(attribute.data) == values.shape[1]:
+            attribute.data.foreach_set("value", values[row].astype(np.float32))
+            obj.data.update()
+
+def clear_affector_cache(scene):
+    """Drop the active cache and switch the affectors back to live evaluation"""
+    info = scene.get(CACHE_PROP)
+    if not info:
+        return False
+    muted = [(name, AFFECTOR_MODIFIER) for name in info["muted"]] + [tuple(entry) for entry in info.get("muted_targets", [])]
+    for name, modifier_name in muted:
+        obj = bpy.data.objects.get(name)
+        modifier = obj.modifiers.get(modifier_name) if obj else None
+        if modifier:
+            modifier.show_viewport = True
+            modifier.show_render = True
+    for path in info["targets"].values():
+        cache_arrays.pop(path, None)
+    del scene[CACHE_PROP]
+    return True
+
+@persistent
+def affector_cache_frame_change(scene, *args):
+    play_affector_cache(scene)
+
+@persistent
+def affector_cache_depsgraph_update(scene, depsgraph):
+    # A moved affector makes the baked influence stale
+    info = scene.get(CACHE_PROP)
+    if not info:
+        return
+    affectors = set(info["affectors"])
+    for update in depsgraph.updates:
+        if update.is_updated_transform and isinstance(update.id, bpy.types.Object) and update.id.name in affectors:
+            clear_affector_cache(scene)
+            return
+
+handlers = (
+    (bpy.app.handlers.frame_change_post, affector_cache_frame_change),
+    (bpy.app.handlers.depsgraph_update_post, affector_cache_depsgraph_update),
+)
+
+# Playback writes the attribute on the original meshes. A modifier on them that creates the attribute
+# keeps being evaluated every frame and overwrites the cache, unless it is named as Target Modifier
+class BONELIGHT_OT_BakeAffectorCache(Operator):
+    """Bake affector influence on the selected meshes once per frame and play it back from disk"""
+    bl_idname = "bonelight.bake_affector_cache"
+    bl_label = "Bake Affector Cache"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    attribute_name: bpy.props.StringProperty(
+        name="Attribute",
+        default="affector_influence",
+        description="Float point attribute the affectors write on the target meshes",
+    )
+    use_scene_range: bpy.props.BoolProperty(
+        name="Scene Frame Range",
+        default=True,
+        description="Bake the scene frame range instead of a custom one",
+    )
+    frame_start: bpy.props.IntProperty(
+        name="Start Frame",
+        default=1,
+        description="First frame to bake when not using the scene frame range",
+    )
+    frame_end: bpy.props.IntProperty(
+        name="End Frame",
+        default=250,
+        description="Last frame to bake when not using the scene frame range",
+    )
+    target_modifier: bpy.props.StringProperty(
+        name="Target Modifier",
+        default="",
+        description="Modifier on the selected meshes that computes the attribute, muted while the cache plays so it is not evaluated every frame",
+    )
+
+    def execute(self, context):
+        scene = context.scene
+        affectors = get_affectors()
+        if not affectors:
+            self.report({'ERROR'}, f"No affectors with a '{AFFECTOR_MODIFIER}' modifier found")
+            return {'CANCELLED'}
+        targets = [obj for obj in context.selected_objects if obj.type == 'MESH' and obj not in affectors]
+        if not targets:
+            self.report({'ERROR'}, "Select the meshes the affectors light")
+            return {'CANCELLED'}
+
+        frame_start, frame_end = self.frame_start, self.frame_end
+        if self.use_scene_range:
+            frame_start, frame_end = scene.frame_start, scene.frame_end
+        frames = range(frame_start, frame_end + 1)
+        if not frames:
+            self.report({'ERROR'}, "The frame range is empty")
+            return {'CANCELLED'}
+
+        if self.target_modifier and any(not obj.modifiers.get(self.target_modifier) for obj in targets):
+            self.report({'ERROR'}, f"Every selected mesh needs the modifier '{self.target_modifier}'")
+            return {'CANCELLED'}
+
+        # Bake from live evaluation
+        clear_affector_cache(scene)
+
+        # One float16 array of (frames, vertices) per target mesh, written next to the cache file
+        # and only moved in place once every frame is baked
+        directory = cache_directory()
+        os.makedirs(directory, exist_ok=True)
+        # clean_name maps different names to the same file, the index keeps every target's file apart
+        paths = {obj.name: os.path.join(directory, f"{bpy.path.clean_name(obj.name)}_{index}.npy") for index, obj in enumerate(targets)}
+        parts = {name: f"{path}.part" for name, path in paths.items()}
+        arrays = {obj.name: np.lib.format.open_memmap(parts[obj.name], mode='w+', dtype=np.float16, shape=(len(frames), len(obj.data.vertices))) for obj in targets}
+        buffers = {obj.name: np.empty(len(obj.data.vertices), dtype=np.float32) for obj in targets}
+
+        current_frame = scene.frame_current
+        completed = False
+        try:
+            for row, frame in enumerate(frames):
+                scene.frame_set(frame)
+                depsgraph = context.evaluated_depsgraph_get()
+                for obj in targets:
+                    attribute = obj.evaluated_get(depsgraph).data.attributes.get(self.attribute_name)
+                    buffer = buffers[obj.name]
+                    if not attribute or attribute.data_type != 'FLOAT' or attribute.domain != 'POINT' or len(attribute.data) != len(buffer):
+                        self.report({'ERROR'}, f"'{obj.name}' has no float point attribute '{self.attribute_name}'")
+                        return {'CANCELLED'}
+                    attribute.data.foreach_get("value", buffer)
+                    arrays[obj.name][row] = buffer
+            completed = True
+        finally:
+            # Close the memory maps before the files are moved or removed
+            for name in list(arrays):
+                arrays.pop(name).flush()
+            scene.frame_set(current_frame)
+            for name, part in parts.items():
+                if completed:
+                    os.replace(part, paths[name])
+                elif os.path.exists(part):
+                    os.remove(part)
+
+        # Without a target modifier the attribute has to live on the original mesh, otherwise
+        # whatever creates it keeps being evaluated and overwrites the played back values
+        generated = [obj.name for obj in targets if not obj.data.attributes.get(self.attribute_name)]
+        if generated and not self.target_modifier:
+            self.report({'WARNING'}, f"'{self.attribute_name}' is created by a modifier on {', '.join(generated)}, set Target Modifier so the cache can replace it")
+
+        # Playback writes into the original meshes
+        for obj in targets:
+            attribute = obj.data.attributes.get(self.attribute_name)
+            if not attribute or attribute.data_type != 'FLOAT' or attribute.domain != 'POINT':
+                if attribute:
+                    obj.data.attributes.remove(attribute)
+                obj.data.attributes.new(self.attribute_name, 'FLOAT', 'POINT')
+
+        # Skip live evaluation while the cache plays
+        muted = []
+        for affector in affectors:
+            modifier = affector.modifiers[AFFECTOR_MODIFIER]
+            if modifier.show_viewport or modifier.show_render:
+                modifier.show_viewport = False
+                modifier.show_render = False
+                muted.append(affector.name)
+
+        # The modifier computing the attribute is replaced by the cache as well
+        muted_targets = []
+        if self.target_modifier:
+            for obj in targets:
+                modifier = obj.modifiers[self.target_modifier]
+                if modifier.show_viewport or modifier.show_render:
+                    modifier.show_viewport = False
+                    modifier.show_render = False
+                    muted_targets.append([obj.name, modifier.name])
+
+        scene[CACHE_PROP] = {
+            "attribute": self.attribute_name,
+            "frame_start": frame_start,
+            "frame_count": len(frames),
+            "targets": paths,
+            "affectors": [affector.name for affector in affectors],
+            "muted": muted,
+            "muted_targets": muted_targets,
+        }
+        play_affector_cache(scene)
+
+        size = sum(os.path.getsize(path) for path in paths.values()) / (1024 * 1024)
+        self.report({'INFO'}, f"Cached {len(frames)} frames for {len(targets)} meshes ({size:.1f} MB)")
+        return {'FINISHED'}
+
+class BONELIGHT_OT_ClearAffectorCache(Operator):
+    """Stop cache playback and evaluate the affectors live again"""
+    bl_idname = "bonelight.clear_affector_cache"
+    bl_label = "Clear Affector Cache"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    def execute(self, context):
+        if clear_affector_cache(context.scene):
+            self.report({'INFO'}, "Affectors are evaluated live again")
+        else:
+            self.report({'INFO'}, "No affector cache active")
+        return {'FINISHED'}
+
 # ======================================================
 # Registration
 # ======================================================
@@ -257,12 +499,19 @@ classes = (
     BONELIGHT_OT_ToggleNodeInput,
     BONELIGHT_OT_AddAffectorLow,
     BONELIGHT_OT_AddAffectorHigh,
+    BONELIGHT_OT_BakeAffectorCache,
+    BONELIGHT_OT_ClearAffectorCache,
 )
 
 def register():
     for cls in classes:
         bpy.utils.register_class(cls)
+    for handler_list, handler in handlers:
+        handler_list.append(handler)
 
 def unregister():
+    for handler_list, handler in handlers:
+        if handler in handler_list:
+            handler_list.remove(handler)
     for cls in reversed(classes):
         bpy.utils.unregister_class(cls)
\ No newline at end of file
@@ -1,5 +1,6 @@
 import bpy
 from bpy.types import Panel
+from .bone_chain_ops import LOD_PREFIX, CONTROL_PREFIX
 
 class VIEW3D_PT_Bone_Hair_Tools(Panel):
     bl_label = "Bone Chain Tools"
@@ -19,15 +20,56 @@ class VIEW3D_PT_Bone_Hair_Tools(Panel):
         col = box.column(align=True)
         col.operator("bonechain.create", text="Build Hair Rig", icon="NOCURVE")
         col.operator("boneskirt.create", text="Build Skirt Rig", icon="SPHERECURVE")
+        col.operator("bonepipeline.create", text="Run Rig Pipeline", icon="PRESET")
         col.operator("boneconnect.create", text="Connect Chain", icon="LIBRARY_DATA_DIRECT")
+        col.operator("bonemirror.create", text="Mirror Chains", icon="MOD_MIRROR")
+        row = col.row(align=True)
+        row.operator("bonelayout.export", text="Export Layout", icon="EXPORT")
+        row.operator("bonelayout.import", text="Import Layout", icon="IMPORT")
+        col.operator("bonecache.clear", text="Clear Rig Cache", icon="TRASH")
+
+        # Live Skirt Rig Settings
+        obj = context.active_object
+        # Rigs built before is_generated existed are only recognised while live
+        if obj and obj.type == 'ARMATURE' and (obj.data.bct_skirt.is_generated or obj.data.bct_skirt.is_live):
+            settings = obj.data.bct_skirt
+            box = layout.box()
+            box.label(text="Live Skirt Rig")
+            box.prop(settings, "is_live")
+            if any(bone.name.startswith((LOD_PREFIX, CONTROL_PREFIX)) for bone in obj.data.bones):
+                box.label(text="LOD and Spline IK chains are not updated", icon="INFO")
+            col = box.column(align=True)
+            col.enabled = settings.is_live
+            col.prop(settings, "chain_radius")
+            col.prop(settings, "num_chains")
+            col.prop(settings, "chain_length")
+            col = box.column(align=True)
+            col.enabled = settings.is_live
+            col.prop(settings, "auto_rotation_step")
+            if settings.auto_rotation_step == False:
+                col.prop(settings, "chain_angle")
+            col.prop(settings, "flare_angle")
+            col.prop(settings, "curve_angle")
+            col = box.column(align=True)
+            col.enabled = settings.is_live
+            col.prop(settings, "root_bone_size")
+            col.prop(settings, "edit_size")
 
         # Bone Edit Tools
         box = layout.box()
         box.label(text="Bone Edit Tools")
         col = box.column(align=True)
         col.operator("boneroll.create", text="Align Roll", icon="SNAP_MIDPOINT")
+        col.operator("bonesurfaceroll.create", text="Roll To Surface", icon="NORMALS_FACE")
         col.operator("bonefix.create", text="Fix Constraints", icon="TOOL_SETTINGS")
+        col.operator("boneprofile.create", text="Profile Rig", icon="TIME")
+        col.operator("reweight.create", text="Auto Weight", icon="MOD_VERTEX_WEIGHT")
         col.operator("align.create", text="Align Bones", icon="CURVE_PATH")
+        col.operator("boneresample.create", text="Resample Chains", icon="MOD_DECIM")
+        col.operator("bonesmooth.create", text="Smooth Chains", icon="MOD_SMOOTH")
+        col.operator("bonelod.create", text="Build LOD Chains", icon="MOD_REMESH")
+        col.operator("bonespline.create", text="Spline IK Chains", icon="CURVE_NCURVE")
+        col.operator("boneshape.create", text="Bone Shapes", icon="MESH_CIRCLE")
         col.operator("bonename.create", text="Name Chain", icon="OUTLINER_OB_FONT")
         col.operator("switch.create", text="Switch Chain Direction", icon="FILE_REFRESH")
         
@@ -37,6 +79,14 @@ class VIEW3D_PT_Bone_Hair_Tools(Panel):
         col = box.column(align=True)
         col.operator("autokeyset.create", text="Auto Keying Set", icon="KEY_HLT")
         col.operator("keyall.create", text="Key All", icon="KEYINGSET")
+        if obj and obj.type == 'ARMATURE':
+            col.prop(obj.data, "bct_use_lod", text="Use LOD Chains", toggle=True)
+        col.operator("keyclean.create", text="Clean Keys", icon="IPO_LINEAR")
+        col.operator("bonephase.create", text="Propagate Phase", icon="MOD_WAVE")
+        col.operator("bonejiggle.create", text="Bake Chain Dynamics", icon="FORCE_HARMONIC")
+        col.operator("bonebake.create", text="Bake Chains To FK", icon="REC")
+        col.operator("bonecloth.create", text="Transfer Cloth To Chains", icon="MOD_CLOTH")
+        col.operator("boneretarget.create", text="Retarget Chains", icon="MOD_ARMATURE")
 
 class VIEW3D_PT_Light_Tools(Panel):
     bl_idname = "VIEW3D_PT_Light_Tools"
@@ -57,6 +107,12 @@ class VIEW3D_PT_Light_Tools(Panel):
         col.operator("bonelight.add_low_affector", text="Add Affector LOW", icon="IPO_SINE")
         col.operator("bonelight.add_high_affector", text="Add Affector HIGH", icon="IPO_QUAD")
 
+        box = layout.box()
+        box.label(text="Affector Cache")
+        col = box.column(align=True)
+        col.operator("bonelight.bake_affector_cache", text="Bake Affector Cache", icon="FILE_CACHE")
+        col.operator("bonelight.clear_affector_cache", text="Clear Affector Cache", icon="X")
+
         
         box = layout.box()
         box.label(text="Light Setup")